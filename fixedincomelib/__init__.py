@@ -1,4 +1,5 @@
 from .apis import *
 from .date import *
 from .market import *
-from .product import *
\ No newline at end of file
+from .product import *
+from .valuation import *
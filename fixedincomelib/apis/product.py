@@ -5,6 +5,7 @@ from fixedincomelib.market import *
 from fixedincomelib.product import *
 from fixedincomelib.product.linear_products import ProductRFRFuture, ProductRFRSwap
 from fixedincomelib.product.product_interfaces import ProductBuilderRegistry
+from fixedincomelib.product.product_store import is_product_file, filter_products, read_product_file, write_product_file
 
 def qfDisplayProduct(product : Product):
     visitor = ProductDisplayVisitor()
@@ -12,17 +13,40 @@ def qfDisplayProduct(product : Product):
     return visitor.display()
 
 def qfWriteProductToFile(product : Product, path : str):
-    this_dict = product.serialize()
-    with open(path, 'wb') as handle:
-        pickle.dump(this_dict, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    write_product_file(product, path)
     return 'DONE'
 
-def qfReadProductFromFile(path : str):
-    with open(path, 'rb') as handle:
-        this_dict = pickle.load(handle)
-        prod_type = this_dict['TYPE']
-        func = ProductBuilderRegistry().get(f'{prod_type}_DES')
-        return func(this_dict)
+def qfReadProductFromFile(
+    path : str,
+    num_workers : Optional[int]=1,
+    product_type : Optional[str]='',
+    currency : Optional[str]='',
+    index : Optional[str]='',
+    maturity_from : Optional[str]='',
+    maturity_to : Optional[str]=''):
+
+    maturity_from_ = None if maturity_from == '' else Date(maturity_from)
+    maturity_to_ = None if maturity_to == '' else Date(maturity_to)
+    if not is_product_file(path):
+        # files written before the columnar format, built in full and then filtered
+        with open(path, 'rb') as handle:
+            this_dict = pickle.load(handle)
+            prod_type = this_dict['TYPE']
+            if prod_type == ProductPortfolio._product_type and num_workers != 1:
+                product = deserialize_portfolio(this_dict, num_workers)[0]
+            else:
+                func = ProductBuilderRegistry().get(f'{prod_type}_DES')
+                product = func(this_dict)
+        return filter_products(product, product_type, currency, index, maturity_from_, maturity_to_)
+
+    return read_product_file(
+        path,
+        product_type,
+        currency,
+        index,
+        maturity_from_,
+        maturity_to_,
+        num_workers)
 
 
 def qfCreateProductBulletCashflow(
@@ -0,0 +1,3 @@
+### benchmarks, not imported by fixedincomelib, run the modules with python -m
+###   suite : timings / memory of the hot paths against a saved baseline
+###   registry_threads : registry read throughput against the number of threads
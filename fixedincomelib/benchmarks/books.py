@@ -0,0 +1,134 @@
+import os
+import numpy as np
+import QuantLib as ql
+import pandas as pd
+from typing import List, Optional, Tuple
+from fixedincomelib.date import Date, Period, add_period_batch, serials_to_datetime64
+from fixedincomelib.market.basics import BusinessDayConvention, HolidayConvention
+
+### synthetic market data and books for the benchmarks, deterministic for a given seed
+### swap books are serialized contents (as ProductRFRSwap.serialize), so building them is what gets timed
+
+_swap_terms = ['1Y', '2Y', '3Y', '5Y', '7Y', '10Y', '15Y', '20Y', '30Y']
+_swap_term_weights = [0.08, 0.12, 0.1, 0.2, 0.1, 0.2, 0.08, 0.06, 0.06]
+
+def swap_book_contents(
+        num_swaps : int,
+        seed : Optional[int]=0,
+        trade_date : Optional[str]='2025-01-02',
+        num_trade_days : Optional[int]=500,
+        on_index : Optional[str]='SOFR-1B',
+        accrual_period : Optional[str]='1Y') -> List[dict]:
+
+    ### SOFR OIS book : spot starting swaps traded over num_trade_days business days,
+    ### market-like term mix, notionals of 1mm to 100mm either way
+    rng = np.random.default_rng(seed)
+    start = Date(trade_date).serialNumber()
+    trade_days = add_period_batch(
+        np.arange(start, start + num_trade_days * 2), Period('2D'),
+        BusinessDayConvention('F'), HolidayConvention('USGS'))
+    effective_dates = np.unique(trade_days)[:num_trade_days]
+    effective = serials_to_datetime64(effective_dates[rng.integers(0, len(effective_dates), size=num_swaps)])
+    terms = rng.choice(_swap_terms, size=num_swaps, p=_swap_term_weights)
+    notionals = np.round(rng.uniform(1., 100., size=num_swaps)) * 1e6
+    rates = np.round(rng.uniform(0.025, 0.05, size=num_swaps), 5)
+    pay = rng.random(num_swaps) < 0.5
+
+    contents = []
+    for i in range(num_swaps):
+        contents.append({
+            'VERSION' : 1,
+            'TYPE' : 'PRODUCT_RFR_SWAP',
+            'EFFECTIVE_DATE' : str(effective[i]),
+            'TERM_OR_TERMINATION_DATE' : str(terms[i]),
+            'PAYMENT_OFFSET' : '2D',
+            'ON_INDEX' : on_index,
+            'FIXED_RATE' : float(rates[i]),
+            'PAY_OR_REC' : 'PAY' if pay[i] else 'RECEIVE',
+            'NOTIONAL' : float(notionals[i]),
+            'ACCRUAL_PERIOD' : accrual_period,
+            'FLOATING_LEG_ACCRUAL_PERIOD' : accrual_period,
+            'ACCRUAL_BASIS' : 'ACT/360',
+            'PAY_BUSINESS_DAY_CONVENTION' : 'MF',
+            'PAY_HOLIDAY_CONVENTION' : 'USGS',
+            'SPREAD' : 0.0,
+            'COMPOUNDING_METHOD' : 'COMPOUND'})
+    return contents
+
+def portfolio_contents(contents : List[dict], seed : Optional[int]=0) -> dict:
+    # ProductPortfolio.serialize layout
+    rng = np.random.default_rng(seed)
+    res = {'VERSION' : 1, 'TYPE' : 'PRODUCT_PORTFOLIO'}
+    for i, content in enumerate(contents):
+        res[f'ELEMENT_{i}'] = content
+    res['WEIGHTS'] = rng.uniform(0.5, 1.5, size=len(contents)).tolist()
+    return res
+
+def pillar_curve(num_pillars : Optional[int]=50, max_time : Optional[float]=50., seed : Optional[int]=0) -> Tuple[np.ndarray, np.ndarray]:
+    # year fractions with a short end denser than the long end, forward rates around 3% - 5%
+    rng = np.random.default_rng(seed)
+    times = max_time * np.linspace(0., 1., num_pillars + 1)[1:] ** 2
+    rates = 0.04 + 0.01 * np.sin(times / 7.) + 0.001 * rng.standard_normal(num_pillars)
+    return times, rates
+
+def fixing_history(
+        years : Optional[int]=25,
+        end_date : Optional[str]='2025-01-02',
+        holiday_convention : Optional[str]='USGS',
+        seed : Optional[int]=0) -> Tuple[np.ndarray, np.ndarray]:
+
+    ### business-day fixings over the last `years` years, a floored random walk
+    end = Date(end_date).serialNumber()
+    days = np.arange(end - int(365.25 * years), end + 1)
+    is_business = HolidayConvention(holiday_convention).business_day_index.is_business_day(days)
+    dates = days[is_business].astype(np.int32)
+    rng = np.random.default_rng(seed)
+    fixings = np.maximum(0.02 + np.cumsum(rng.normal(0., 0.0005, size=len(dates))), 0.0001)
+    return dates, fixings
+
+def write_fixing_csv(path : str, dates : np.ndarray, fixings : np.ndarray) -> str:
+    # same layout as the fixing sources, date (%Y-%m-%d) and fixing
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    pd.DataFrame({
+        'date' : pd.to_datetime(serials_to_datetime64(dates)).strftime('%Y-%m-%d'),
+        'fixing' : fixings}).to_csv(path, index=False)
+    return path
+
+_curve_swap_terms = ['1M', '2M', '3M', '4M', '5M', '6M', '9M', '1Y', '18M', '2Y', '3Y', '4Y', '5Y', '6Y', '7Y',
+                     '8Y', '9Y', '10Y', '12Y', '15Y', '20Y', '25Y', '30Y', '35Y', '40Y', '45Y', '50Y']
+
+def sofr_curve_quotes(
+        valuation_date : Optional[str]='2025-01-02',
+        num_futures : Optional[int]=13,
+        swap_terms : Optional[List[str]]=_curve_swap_terms) -> Tuple[List[dict], List[Tuple[str, str, float]]]:
+
+    ### a SOFR curve's instruments : spot starting annual OIS (serialized, at a par-like fixed rate)
+    ### and 3M futures on consecutive IMM periods (effective, termination, price), 40 of them by default
+    spot = Date(ql.TARGET().advance(Date(valuation_date), 2, ql.Days))
+    swaps = []
+    for term in swap_terms:
+        years = Period(term).length() / (12. if Period(term).units() == ql.Months else 1.)
+        swaps.append({
+            'VERSION' : 1,
+            'TYPE' : 'PRODUCT_RFR_SWAP',
+            'EFFECTIVE_DATE' : spot.ISO(),
+            'TERM_OR_TERMINATION_DATE' : term,
+            'PAYMENT_OFFSET' : '2D',
+            'ON_INDEX' : 'SOFR-1B',
+            'FIXED_RATE' : round(0.043 - 0.004 * (1. - np.exp(-years / 3.)) + 0.0002 * np.log1p(years), 6),
+            'PAY_OR_REC' : 'PAY',
+            'NOTIONAL' : 1e6,
+            'ACCRUAL_PERIOD' : '1Y',
+            'FLOATING_LEG_ACCRUAL_PERIOD' : '1Y',
+            'ACCRUAL_BASIS' : 'ACT/360',
+            'PAY_BUSINESS_DAY_CONVENTION' : 'MF',
+            'PAY_HOLIDAY_CONVENTION' : 'USGS',
+            'SPREAD' : 0.0,
+            'COMPOUNDING_METHOD' : 'COMPOUND'})
+    futures = []
+    imm = ql.IMM.nextDate(Date(valuation_date))
+    for k in range(num_futures):
+        next_imm = ql.IMM.nextDate(imm + 1)
+        futures.append((Date(imm).ISO(), Date(next_imm).ISO(), round(100. - 100. * (0.0425 - 0.0003 * k), 4)))
+        imm = next_imm
+    return swaps, futures
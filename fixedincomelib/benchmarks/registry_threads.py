@@ -0,0 +1,86 @@
+import os, sys, time, threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from fixedincomelib.market.fixings import IndexFixingSeries
+from fixedincomelib.market.registries import IndexRegistry
+from fixedincomelib.product.product_interfaces import ProductBuilderRegistry
+from fixedincomelib.product.product_loader import register_product_builders
+
+### read throughput of the shared registries against the number of reader threads
+### every reader does the same mix : index lookup by name, index handle resolution,
+### product builder lookup and a vectorized fixing lookup on a synthetic series,
+### while one writer keeps inserting fixings into that series (copy-on-write, readers never lock)
+### run from a directory next to fixedincomelib (the registries read ../fixedincomelib/static_files), e.g.,
+###   python -m fixedincomelib.benchmarks.registry_threads 200000 1 2 4 8
+
+_result_columns = ['Threads', 'Operations', 'Seconds', 'OpsPerSecond', 'Speedup', 'WriterInserts']
+
+def _reader(num_ops : int, series : IndexFixingSeries, seed : int) -> int:
+    index_keys = IndexRegistry().get_keys
+    builder_keys = ProductBuilderRegistry().get_keys
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, 1 << 30, size=num_ops)
+    dates = series.dates
+    queries = dates[rng.integers(0, len(dates), size=(num_ops, 8))]
+    for i in range(num_ops):
+        k = int(picks[i])
+        IndexRegistry().get(index_keys[k % len(index_keys)])
+        IndexRegistry.resolve(index_keys[(k >> 8) % len(index_keys)])
+        ProductBuilderRegistry().get(builder_keys[(k >> 16) % len(builder_keys)])
+        series.get_many(queries[i])
+    return num_ops
+
+def _writer(series : IndexFixingSeries, stop : threading.Event, first_serial : int) -> int:
+    # fixings after the last one, so readers' queries stay valid
+    serial, num_inserted = first_serial, 0
+    while not stop.is_set():
+        num_inserted += series.insert(serial, 0.01)
+        serial += 1
+        time.sleep(0)
+    return num_inserted
+
+def benchmark_registry_threads(
+        num_ops : Optional[int]=100_000,
+        thread_counts : Optional[List[int]]=[1, 2, 4, 8],
+        with_writer : Optional[bool]=True,
+        num_fixings : Optional[int]=5_000) -> pd.DataFrame:
+
+    ### total reads per second for each thread count, num_ops reads split evenly between threads
+    # registries are built before the clock starts, lazy init is not what is measured
+    IndexRegistry()
+    register_product_builders()
+    first = 45000
+    base = IndexFixingSeries(np.arange(first, first + num_fixings), np.full(num_fixings, 0.05))
+
+    rows = []
+    for num_threads in thread_counts:
+        series = IndexFixingSeries.from_arrays(*base.snapshot())
+        stop = threading.Event()
+        writer = ThreadPoolExecutor(max_workers=1) if with_writer else None
+        inserted = writer.submit(_writer, series, stop, first + num_fixings) if with_writer else None
+        per_thread = max(1, num_ops // num_threads)
+        with ThreadPoolExecutor(max_workers=num_threads) as pool:
+            start = time.perf_counter()
+            done = sum(pool.map(lambda i: _reader(per_thread, series, i), range(num_threads)))
+            seconds = time.perf_counter() - start
+        stop.set()
+        num_inserted = inserted.result() if with_writer else 0
+        if writer is not None:
+            writer.shutdown()
+        rows.append([num_threads, done, seconds, done / seconds, 0., num_inserted])
+
+    res = pd.DataFrame(rows, columns=_result_columns)
+    res['Speedup'] = res['OpsPerSecond'] / res['OpsPerSecond'].iloc[0]
+    return res
+
+if __name__ == '__main__':
+    num_ops = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    thread_counts = [int(x) for x in sys.argv[2:]] or [1, 2, 4, 8]
+    # with a single cpu (or the GIL held throughout) the speedup stays near 1, and with the writer
+    # running readers mostly gain the time slices the writer no longer gets
+    print(f'cpu count : {os.cpu_count()}')
+    for with_writer in [False, True]:
+        print(f'writer : {with_writer}')
+        print(benchmark_registry_threads(num_ops, thread_counts, with_writer).to_string(index=False))
@@ -0,0 +1,568 @@
+import os, sys, json, time, platform, argparse, tempfile, tracemalloc
+import numpy as np
+import pandas as pd
+import QuantLib as ql
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from fixedincomelib.apis import *
+from fixedincomelib.date import (
+    Date,
+    Period,
+    add_period_batch,
+    make_schedule_batch,
+    schedule_cache)
+from fixedincomelib.market.basics import AccrualBasis, BusinessDayConvention, HolidayConvention
+from fixedincomelib.market.fixings import IndexFixingSeries, load_fixing_series
+from fixedincomelib.market.curves import YieldCurve
+from fixedincomelib.market.data_conventions import CompoundingMethod
+from fixedincomelib.market.registries import IndexFixingsManager
+from fixedincomelib.product import (
+    ProductPortfolio,
+    MutableProductPortfolio,
+    build_product_list)
+from fixedincomelib.product.linear_products import ProductRFRSwap
+from fixedincomelib.utilities.numerics import ExtrapMethod, Interpolator1DPCP
+from fixedincomelib.valuation import OvernightIndexProjectionEngine, ProductPricingVisitor, CurveCalibrator
+from fixedincomelib.benchmarks.books import (
+    swap_book_contents,
+    portfolio_contents,
+    pillar_curve,
+    sofr_curve_quotes,
+    fixing_history,
+    write_fixing_csv)
+
+### benchmark suite over the date, schedule, interpolation, curve, fixing, product, portfolio and valuation hot paths
+### a case is a setup(size) returning (run, num_ops); setup is not timed, run is timed `repeat` times
+### and once more under tracemalloc for the peak python / numpy allocation (QuantLib's own heap is not seen)
+### cold cases empty the schedule cache before every run
+### results are a frame (and json) keyed by (Name, Size); compare_results flags anything slower, or
+### heavier, than a saved baseline by more than the threshold
+### run from a directory next to fixedincomelib (the registries read ../fixedincomelib/static_files), e.g.,
+###   python -m fixedincomelib.benchmarks.suite --scale full --output results.json
+###   python -m fixedincomelib.benchmarks.suite --baseline results.json --threshold 0.2
+
+_scales = ['quick', 'full']
+_result_columns = [
+    'Name', 'Group', 'Size', 'Operations', 'Repeat',
+    'BestSeconds', 'MedianSeconds', 'MicrosPerOp', 'PeakMemoryMB', 'Error']
+
+class BenchmarkCase:
+
+    def __init__(
+            self,
+            name : str,
+            group : str,
+            setup : Callable[[int], Tuple[Callable[[], Any], int]],
+            sizes : Dict[str, List[int]],
+            cold : Optional[bool]=False) -> None:
+        self.name_ = name
+        self.group_ = group
+        self.setup_ = setup
+        self.sizes_ = sizes
+        self.cold_ = cold
+
+    @property
+    def name(self) -> str:
+        return self.name_
+
+    @property
+    def group(self) -> str:
+        return self.group_
+
+    def sizes(self, scale : str) -> List[int]:
+        return self.sizes_[scale]
+
+    def measure(self, size : int, repeat : int, memory : bool) -> list:
+        run, num_ops = self.setup_(size)
+        seconds = []
+        for _ in range(repeat):
+            if self.cold_:
+                schedule_cache.clear()
+            start = time.perf_counter()
+            run()
+            seconds.append(time.perf_counter() - start)
+        peak = np.nan
+        if memory:
+            if self.cold_:
+                schedule_cache.clear()
+            tracemalloc.start()
+            try:
+                run()
+                peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            finally:
+                tracemalloc.stop()
+        best = min(seconds)
+        return [self.name_, self.group_, size, num_ops, repeat,
+                best, float(np.median(seconds)), best / num_ops * 1e6, peak, '']
+
+    def failed(self, size : int, repeat : int, error : Exception) -> list:
+        # the row of a case that raised, no timings
+        return [self.name_, self.group_, size, 0, repeat,
+                np.nan, np.nan, np.nan, np.nan, f'{type(error).__name__}: {error}']
+
+_cases : Dict[str, BenchmarkCase] = {}
+
+def benchmark(
+        name : str,
+        group : str,
+        quick : Optional[List[int]]=[1],
+        full : Optional[List[int]]=None,
+        cold : Optional[bool]=False):
+    # registers the decorated setup as a case, full sizes default to the quick ones
+    def register(setup):
+        if name in _cases:
+            raise Exception(f'Benchmark {name} is already registered.')
+        _cases[name] = BenchmarkCase(name, group, setup, {'quick' : quick, 'full' : quick if full is None else full}, cold)
+        return setup
+    return register
+
+def list_benchmarks() -> pd.DataFrame:
+    return pd.DataFrame(
+        [[c.name, c.group, c.sizes('quick'), c.sizes('full')] for c in _cases.values()],
+        columns=['Name', 'Group', 'QuickSizes', 'FullSizes'])
+
+### date
+
+_iso_dates = [str(np.datetime64('2025-01-01') + k) for k in range(0, 3650, 7)]
+
+@benchmark('date.qfAddPeriod', 'date', quick=[2000])
+def _(size):
+    dates = (_iso_dates * (size // len(_iso_dates) + 1))[:size]
+    return lambda: [qfAddPeriod(d, '3M', 'MF', 'USGS') for d in dates], size
+
+@benchmark('date.qfAccrued', 'date', quick=[2000])
+def _(size):
+    dates = (_iso_dates * (size // len(_iso_dates) + 1))[:size]
+    return lambda: [qfAccrued(d, '2035-06-30', 'ACT/365 FIXED', 'MF', 'USGS') for d in dates], size
+
+@benchmark('date.qfMoveToBusinessDay', 'date', quick=[2000])
+def _(size):
+    dates = (_iso_dates * (size // len(_iso_dates) + 1))[:size]
+    return lambda: [qfMoveToBusinessDay(d, 'MF', 'USGS') for d in dates], size
+
+@benchmark('date.qfIsBusinessDay', 'date', quick=[2000])
+def _(size):
+    dates = (_iso_dates * (size // len(_iso_dates) + 1))[:size]
+    return lambda: [qfIsBusinessDay(d, 'USGS') for d in dates], size
+
+@benchmark('date.add_period_batch', 'date', quick=[100_000], full=[100_000, 1_000_000])
+def _(size):
+    serials = Date('2000-01-03').serialNumber() + np.arange(size, dtype=np.int32) % 10_000
+    bdc, hol = BusinessDayConvention('MF'), HolidayConvention('USGS')
+    return lambda: add_period_batch(serials, Period('3M'), bdc, hol), size
+
+### schedule
+
+@benchmark('schedule.qfCreateSchedule.30Y3M', 'schedule', quick=[200], cold=True)
+def _(size):
+    starts = [str(np.datetime64('2025-01-02') + k) for k in range(size)]
+    return lambda: [qfCreateSchedule(s, str(np.datetime64(s) + 10957), '3M', 'USGS', 'MF', 'ACT/360',
+                                     fix_in_arrear=True, payment_offset='2D') for s in starts], size
+
+@benchmark('schedule.qfCreateSchedule.30Y3M.cached', 'schedule', quick=[200])
+def _(size):
+    starts = [str(np.datetime64('2025-01-02') + k % 20) for k in range(size)]
+    return lambda: [qfCreateSchedule(s, str(np.datetime64(s) + 10957), '3M', 'USGS', 'MF', 'ACT/360',
+                                     fix_in_arrear=True, payment_offset='2D') for s in starts], size
+
+@benchmark('schedule.make_schedule_batch.30Y3M', 'schedule', quick=[1000], full=[1000, 10_000])
+def _(size):
+    start = Date('2025-01-02').serialNumber()
+    starts = start + np.arange(size, dtype=np.int32)
+    ends = starts + 10957
+    args = (Period('3M'), HolidayConvention('USGS'), BusinessDayConvention('MF'), AccrualBasis('ACT/360'))
+    return lambda: make_schedule_batch(starts, ends, *args, fix_in_arrear=True, payment_offset=Period('2D')), size
+
+### interpolation, 50 pillars
+
+def _pcp() -> Interpolator1DPCP:
+    times, rates = pillar_curve(50)
+    return Interpolator1DPCP(times, rates, ExtrapMethod.FLAT)
+
+@benchmark('interp.pcp.interpolate', 'interpolation', quick=[10_000])
+def _(size):
+    interp, x = _pcp(), np.random.default_rng(0).uniform(0., 55., size)
+    return lambda: [interp.interpolate(v) for v in x.tolist()], size
+
+@benchmark('interp.pcp.interpolate_batch', 'interpolation', quick=[1_000_000])
+def _(size):
+    interp, x = _pcp(), np.random.default_rng(0).uniform(0., 55., size)
+    return lambda: interp.interpolate_batch(x), size
+
+@benchmark('interp.pcp.integrate_batch', 'interpolation', quick=[1_000_000])
+def _(size):
+    interp, x = _pcp(), np.random.default_rng(0).uniform(0., 55., size)
+    return lambda: interp.integrate_batch(np.zeros(size), x), size
+
+@benchmark('interp.pcp.integrated_gradient_batch', 'interpolation', quick=[100_000])
+def _(size):
+    interp, x = _pcp(), np.random.default_rng(0).uniform(0., 55., size)
+    return lambda: interp.gradient_of_integrated_value_wrt_ordinate_batch(np.zeros(size), x), size
+
+@benchmark('interp.pcp.integrated_query_jacobian', 'interpolation', quick=[100_000])
+def _(size):
+    interp, x = _pcp(), np.random.default_rng(0).uniform(0., 55., size)
+    def run():
+        interp.set_query_intervals(np.zeros(size), x)
+        return interp.integrated_query_jacobian
+    return run, size
+
+### curves, 50 pillars over 50 years
+
+def _yield_curve(accrual_basis : str) -> YieldCurve:
+    times, rates = pillar_curve(50)
+    reference = Date('2025-01-02').serialNumber()
+    return YieldCurve(reference, reference + np.round(times * 365.).astype(int), rates, AccrualBasis(accrual_basis))
+
+@benchmark('curve.discount_factors', 'curve', quick=[1_000_000])
+def _(size):
+    curve = _yield_curve('ACT/365 FIXED')
+    dates = curve.reference_date.serialNumber() + np.random.default_rng(0).integers(0, 18000, size)
+    return lambda: curve.discount_factors(dates), size
+
+@benchmark('curve.forward_rates', 'curve', quick=[1_000_000])
+def _(size):
+    curve = _yield_curve('ACT/365 FIXED')
+    starts = curve.reference_date.serialNumber() + np.random.default_rng(0).integers(0, 18000, size)
+    return lambda: curve.forward_rates(starts, starts + 91, AccrualBasis('ACT/360')), size
+
+@benchmark('curve.times.act_act.cold', 'curve', quick=[100_000])
+def _(size):
+    curve = _yield_curve('ACT/ACT')
+    dates = curve.reference_date.serialNumber() + np.random.default_rng(0).integers(0, 18000, size)
+    def run():
+        curve.clear_time_cache()
+        return curve.times(dates)
+    return run, size
+
+@benchmark('curve.times.act_act', 'curve', quick=[100_000])
+def _(size):
+    curve = _yield_curve('ACT/ACT')
+    dates = curve.reference_date.serialNumber() + np.random.default_rng(0).integers(0, 18000, size)
+    curve.times(dates)
+    return lambda: curve.times(dates), size
+
+### fixings, 25 years of daily SOFR
+
+def _fixing_series() -> IndexFixingSeries:
+    return IndexFixingSeries(*fixing_history(25))
+
+@benchmark('fixings.load_csv', 'fixings')
+def _(size):
+    folder = tempfile.mkdtemp(prefix='fil_bench_')
+    path = write_fixing_csv(os.path.join(folder, 'sofr-1b.csv'), *fixing_history(25))
+    return lambda: load_fixing_series(path), len(fixing_history(25)[0])
+
+@benchmark('fixings.load_cached', 'fixings')
+def _(size):
+    folder = tempfile.mkdtemp(prefix='fil_bench_')
+    path = write_fixing_csv(os.path.join(folder, 'sofr-1b.csv'), *fixing_history(25))
+    cache = os.path.join(folder, '.fixing_cache')
+    load_fixing_series(path, cache)
+    return lambda: load_fixing_series(path, cache), len(fixing_history(25)[0])
+
+@benchmark('fixings.get_many', 'fixings', quick=[100_000])
+def _(size):
+    series = _fixing_series()
+    queries = np.random.default_rng(0).choice(series.dates, size)
+    return lambda: series.get_many(queries), size
+
+def _fixings_manager() -> IndexFixingsManager:
+    # a manager of its own on a temporary SOFR-1B source, neither the config's FIXING_SOURCE
+    # nor the process' manager are touched
+    folder = tempfile.mkdtemp(prefix='fil_bench_')
+    write_fixing_csv(os.path.join(folder, 'sofr-1b.csv'), *fixing_history(25))
+    saved = (IndexFixingsManager._instance, IndexFixingsManager._fixing_path, IndexFixingsManager._fixing_cache_path)
+    try:
+        IndexFixingsManager._instance = None
+        IndexFixingsManager._fixing_path, IndexFixingsManager._fixing_cache_path = folder, None
+        manager = IndexFixingsManager()
+        if not manager.exists('SOFR-1B'):
+            manager.register('SOFR-1B', 'sofr-1b')
+    finally:
+        IndexFixingsManager._instance, IndexFixingsManager._fixing_path, IndexFixingsManager._fixing_cache_path = saved
+    return manager
+
+@benchmark('fixings.manager.get_fixing', 'fixings', quick=[5000])
+def _(size):
+    manager = _fixings_manager()
+    dates = fixing_history(25)[0]
+    queries = [Date.from_serial(int(d)) for d in np.random.default_rng(0).choice(dates, size)]
+    return lambda: [manager.get_fixing('SOFR-1B', d) for d in queries], size
+
+@benchmark('fixings.manager.get_fixings_in_range', 'fixings', quick=[2000])
+def _(size):
+    manager = _fixings_manager()
+    dates = fixing_history(25)[0]
+    starts = np.random.default_rng(0).choice(dates[:-100], size)
+    windows = [(Date.from_serial(int(s)), Date.from_serial(int(s) + 91)) for s in starts]
+    return lambda: [manager.get_fixings_in_range('SOFR-1B', s, e) for s, e in windows], size
+
+### products, SOFR OIS books
+
+@benchmark('product.qfCreateProductRFRSwap', 'product', quick=[1000], full=[1000, 10_000], cold=True)
+def _(size):
+    book = swap_book_contents(size)
+    def run():
+        return [qfCreateProductRFRSwap(
+            c['EFFECTIVE_DATE'], c['TERM_OR_TERMINATION_DATE'], c['PAYMENT_OFFSET'], c['ON_INDEX'],
+            c['FIXED_RATE'], c['PAY_OR_REC'].lower(), c['NOTIONAL'], c['ACCRUAL_PERIOD'], c['ACCRUAL_BASIS'],
+            c['FLOATING_LEG_ACCRUAL_PERIOD'], c['PAY_BUSINESS_DAY_CONVENTION'], c['PAY_HOLIDAY_CONVENTION'],
+            c['SPREAD'], c['COMPOUNDING_METHOD'].lower()) for c in book]
+    return run, size
+
+@benchmark('product.rfr_swap.deserialize', 'product', quick=[1000], full=[1000, 10_000, 100_000])
+def _(size):
+    book = swap_book_contents(size)
+    return lambda: [ProductRFRSwap.deserialize(c) for c in book], size
+
+@benchmark('product.rfr_swap.deserialize.cold', 'product', quick=[1000], full=[1000, 10_000], cold=True)
+def _(size):
+    book = swap_book_contents(size)
+    return lambda: [ProductRFRSwap.deserialize(c) for c in book], size
+
+@benchmark('product.rfr_swap.deserialize_many', 'product', quick=[1000], full=[1000, 10_000, 100_000])
+def _(size):
+    book = swap_book_contents(size)
+    return lambda: ProductRFRSwap.deserialize_many(book), size
+
+@benchmark('product.rfr_swap.deserialize_many.cold', 'product', quick=[1000], full=[1000, 10_000, 100_000], cold=True)
+def _(size):
+    book = swap_book_contents(size)
+    return lambda: ProductRFRSwap.deserialize_many(book), size
+
+@benchmark('product.rfr_swap.serialize', 'product', quick=[1000], full=[1000, 10_000])
+def _(size):
+    swaps = ProductRFRSwap.deserialize_many(swap_book_contents(size))
+    return lambda: [s.serialize() for s in swaps], size
+
+@benchmark('product.rfr_swap.cashflows', 'product', quick=[1000])
+def _(size):
+    # every cashflow product materialized, on freshly built swaps
+    book = swap_book_contents(size)
+    def run():
+        for s in ProductRFRSwap.deserialize_many(book):
+            for leg in [s.floating_leg, s.fixed_leg]:
+                for i in range(leg.num_cashflows()):
+                    leg.cashflow(i)
+    return run, size
+
+@benchmark('product.qfCreateProductOvernightIndexCashflow', 'product', quick=[2000])
+def _(size):
+    starts = [str(np.datetime64('2025-01-02') + k % 700) for k in range(size)]
+    return lambda: [qfCreateProductOvernightIndexCashflow(s, '3M', 'SOFR-1B', 1e6) for s in starts], size
+
+### portfolios
+
+@benchmark('portfolio.build_product_list', 'portfolio', quick=[1000], full=[1000, 10_000, 100_000])
+def _(size):
+    book = swap_book_contents(size)
+    return lambda: build_product_list(book), size
+
+@benchmark('portfolio.ProductPortfolio', 'portfolio', quick=[1000], full=[1000, 10_000, 100_000])
+def _(size):
+    swaps = build_product_list(swap_book_contents(size))
+    weights = [1.] * size
+    return lambda: ProductPortfolio(swaps, weights), size
+
+@benchmark('portfolio.deserialize', 'portfolio', quick=[1000], full=[1000, 10_000])
+def _(size):
+    contents = portfolio_contents(swap_book_contents(size))
+    return lambda: ProductPortfolio.deserialize(contents), size
+
+@benchmark('portfolio.query', 'portfolio', quick=[1000], full=[1000, 10_000, 100_000])
+def _(size):
+    portfolio = ProductPortfolio(build_product_list(swap_book_contents(size)))
+    portfolio.portfolio_index
+    lo, hi = Date('2030-01-01'), Date('2031-01-01')
+    return lambda: portfolio.query(currency='USD', index='SOFR-1B', maturity_from=lo, maturity_to=hi), 1
+
+@benchmark('portfolio.mutable.add_remove', 'portfolio', quick=[1000], full=[1000, 10_000])
+def _(size):
+    swaps = build_product_list(swap_book_contents(size))
+    book = MutableProductPortfolio(swaps)
+    extra = build_product_list(swap_book_contents(100, seed=1))
+    def run():
+        handles = [book.add(s) for s in extra]
+        for h in handles:
+            book.remove(h)
+    return run, 2 * len(extra)
+
+@benchmark('portfolio.qfWriteProductToFile', 'portfolio', quick=[1000], full=[1000, 10_000])
+def _(size):
+    portfolio = ProductPortfolio(build_product_list(swap_book_contents(size)))
+    path = os.path.join(tempfile.mkdtemp(prefix='fil_bench_'), 'book.qfp')
+    return lambda: qfWriteProductToFile(portfolio, path), size
+
+### valuation, overnight cashflow projection on a 50 pillar curve
+
+def _projection_inputs(size : int, method : CompoundingMethod, spread : float):
+    times, rates = pillar_curve(50)
+    engine = OvernightIndexProjectionEngine(
+        'SOFR-1B', Interpolator1DPCP(times, rates, ExtrapMethod.FLAT), Date('2025-01-02'))
+    starts = Date('2025-01-06').serialNumber() + np.random.default_rng(0).integers(0, 10_000, size)
+    return engine, starts, starts + 91, method, spread
+
+@benchmark('valuation.overnight_projection.compound', 'valuation', quick=[10_000], full=[10_000, 100_000])
+def _(size):
+    engine, starts, ends, method, spread = _projection_inputs(size, CompoundingMethod.COMPOUND, 0.)
+    return lambda: engine.project_arrays(starts, ends, method, spread), size
+
+@benchmark('valuation.overnight_projection.compound_spread', 'valuation', quick=[10_000], full=[10_000, 100_000])
+def _(size):
+    engine, starts, ends, method, spread = _projection_inputs(size, CompoundingMethod.COMPOUND, 0.001)
+    return lambda: engine.project_arrays(starts, ends, method, spread), size
+
+@benchmark('valuation.overnight_projection.arithmetic', 'valuation', quick=[10_000], full=[10_000, 100_000])
+def _(size):
+    engine, starts, ends, method, spread = _projection_inputs(size, CompoundingMethod.ARITHMETIC, 0.)
+    return lambda: engine.project_arrays(starts, ends, method, spread), size
+
+@benchmark('valuation.curve_calibration.sofr40', 'valuation')
+def _(size):
+    swaps, futures = sofr_curve_quotes()
+    swaps = ProductRFRSwap.deserialize_many(swaps)
+    def run():
+        calibrator = CurveCalibrator('SOFR-1B', '2025-01-02')
+        for swap in swaps:
+            calibrator.add_swap(swap)
+        for future in futures:
+            calibrator.add_future(*future)
+        return calibrator.calibrate()
+    return run, 1
+
+@benchmark('valuation.pricing_visitor.swap_book', 'valuation', quick=[1000], full=[1000, 10_000, 100_000])
+def _(size):
+    engine = _projection_inputs(0, CompoundingMethod.COMPOUND, 0.)[0]
+    portfolio = ProductPortfolio(build_product_list(swap_book_contents(size)))
+    def run():
+        visitor = ProductPricingVisitor(engine.forward_curve, engine.valuation_date, engine)
+        portfolio.accept(visitor)
+        return visitor.price()
+    return run, size
+
+@benchmark('valuation.bucketed_delta.swap_book', 'valuation', quick=[1000], full=[1000, 10_000, 100_000])
+def _(size):
+    # one pricing and one adjoint pass over the gathered leaves, 50 pillars
+    engine = _projection_inputs(0, CompoundingMethod.COMPOUND, 0.)[0]
+    visitor = ProductPricingVisitor(engine.forward_curve, engine.valuation_date, engine)
+    ProductPortfolio(build_product_list(swap_book_contents(size))).accept(visitor)
+    return lambda: visitor.bucketed_delta(), size
+
+@benchmark('portfolio.qfReadProductFromFile', 'portfolio', quick=[1000], full=[1000, 10_000])
+def _(size):
+    path = os.path.join(tempfile.mkdtemp(prefix='fil_bench_'), 'book.qfp')
+    qfWriteProductToFile(ProductPortfolio(build_product_list(swap_book_contents(size))), path)
+    return lambda: qfReadProductFromFile(path), size
+
+@benchmark('portfolio.qfReadProductFromFile.filtered', 'portfolio', quick=[1000], full=[1000, 10_000])
+def _(size):
+    path = os.path.join(tempfile.mkdtemp(prefix='fil_bench_'), 'book.qfp')
+    qfWriteProductToFile(ProductPortfolio(build_product_list(swap_book_contents(size))), path)
+    return lambda: qfReadProductFromFile(path, maturity_from='2030-01-01', maturity_to='2031-01-01'), size
+
+### runner
+
+def run_benchmarks(
+        scale : Optional[str]='quick',
+        names : Optional[List[str]]=None,
+        repeat : Optional[int]=3,
+        memory : Optional[bool]=True,
+        verbose : Optional[bool]=False) -> pd.DataFrame:
+
+    ### one row per (case, size); names are prefixes, e.g., ['schedule', 'product.rfr_swap']
+    ### a case that raises is recorded with its error and no timings, the other cases still run
+    if scale not in _scales:
+        raise Exception(f'Scale {scale} is not one of {_scales}.')
+    rows = []
+    for case in _cases.values():
+        if names and not any(case.name.startswith(n) for n in names):
+            continue
+        for size in case.sizes(scale):
+            try:
+                row = case.measure(size, repeat, memory)
+            except Exception as e:
+                row = case.failed(size, repeat, e)
+            if verbose and row[9]:
+                print(f'{case.name:<50} {size:>9} FAILED {row[9]}', file=sys.stderr)
+            elif verbose:
+                print(f'{case.name:<50} {size:>9} {row[7]:>12.3f} us/op {row[8]:>9.2f} MB', file=sys.stderr)
+            rows.append(row)
+    return pd.DataFrame(rows, columns=_result_columns)
+
+def environment() -> dict:
+    return {
+        'python' : platform.python_version(),
+        'platform' : platform.platform(),
+        'processor' : platform.processor(),
+        'cpu_count' : os.cpu_count(),
+        'numpy' : np.__version__,
+        'pandas' : pd.__version__,
+        'quantlib' : ql.__version__,
+        'timestamp' : time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+def write_results(results : pd.DataFrame, path : str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'environment' : environment(),
+            'results' : json.loads(results.to_json(orient='records'))}, f, indent=1)
+
+def read_results(path : str) -> pd.DataFrame:
+    with open(path, 'r', encoding='utf-8') as f:
+        res = pd.DataFrame(json.load(f)['results'], columns=_result_columns)
+    # results written before failures were recorded
+    res['Error'] = res['Error'].fillna('')
+    return res
+
+def compare_results(
+        results : pd.DataFrame,
+        baseline : pd.DataFrame,
+        threshold : Optional[float]=0.2,
+        memory_threshold : Optional[float]=None,
+        min_memory_mb : Optional[float]=1.) -> pd.DataFrame:
+
+    ### ratios of current to baseline best time and peak memory, for the cases found in both
+    ### a case regresses when a ratio exceeds 1 + threshold (memory only above min_memory_mb)
+    ### cases that failed in either run are left out, run_benchmarks reports them
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    res = results[results['Error'] == ''].merge(
+        baseline[baseline['Error'] == ''], on=['Name', 'Size'], suffixes=('', 'Baseline'))
+    res['TimeRatio'] = res['BestSeconds'] / res['BestSecondsBaseline']
+    res['MemoryRatio'] = res['PeakMemoryMB'] / res['PeakMemoryMBBaseline']
+    slower = res['TimeRatio'] > 1. + threshold
+    heavier = (res['MemoryRatio'] > 1. + memory_threshold) & (res['PeakMemoryMBBaseline'] >= min_memory_mb)
+    res['Regression'] = np.where(slower & heavier, 'TIME+MEMORY', np.where(slower, 'TIME', np.where(heavier, 'MEMORY', '')))
+    return res[['Name', 'Group', 'Size', 'BestSecondsBaseline', 'BestSeconds', 'TimeRatio',
+                'PeakMemoryMBBaseline', 'PeakMemoryMB', 'MemoryRatio', 'Regression']]
+
+def main(argv : Optional[List[str]]=None) -> int:
+    parser = argparse.ArgumentParser(description='fixedincomelib benchmarks')
+    parser.add_argument('--scale', default='quick', choices=_scales)
+    parser.add_argument('--filter', nargs='*', default=None, help='case name prefixes')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true')
+    parser.add_argument('--output', default=None, help='json file for the results')
+    parser.add_argument('--baseline', default=None, help='json file of a previous run')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    parser.add_argument('--list', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print(list_benchmarks().to_string(index=False))
+        return 0
+    results = run_benchmarks(args.scale, args.filter, args.repeat, not args.no_memory, verbose=True)
+    if args.output:
+        write_results(results, args.output)
+    failed = results['Error'] != ''
+    with pd.option_context('display.width', 200, 'display.max_rows', None, 'display.max_colwidth', None):
+        print(results[~failed].drop(columns='Error').to_string(index=False))
+        if failed.any():
+            print(results.loc[failed, ['Name', 'Size', 'Error']].to_string(index=False))
+        if args.baseline is None:
+            return int(failed.any())
+        compared = compare_results(results, read_results(args.baseline), args.threshold)
+        print(compared.to_string(index=False))
+    # non-zero exit status on any failure or regression, e.g., to fail a ci job
+    return int(failed.any() or (compared['Regression'] != '').any())
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,11 @@
-from fixedincomelib.date.basics import (Date, Period, TermOrTerminationDate)
+from fixedincomelib.date.basics import (
+    Date, 
+    Period, 
+    TermOrTerminationDate, 
+    to_serials,
+    to_dates,
+    serials_to_datetime64,
+    datetime64_to_serials)
 from fixedincomelib.date.utilities import (
     add_period, 
     accrued, 
@@ -7,4 +14,15 @@ from fixedincomelib.date.utilities import (
     is_holiday, 
     is_end_of_month, 
     end_of_month, 
-    make_schedule)
\ No newline at end of file
+    make_schedule,
+    add_period_batch,
+    move_to_business_day_batch,
+    is_business_day_batch,
+    accrued_batch,
+    year_fraction_batch,
+    make_schedule_batch,
+    BatchSchedule,
+    trade_schedule,
+    trade_schedules,
+    ScheduleCache,
+    schedule_cache)
\ No newline at end of file
@@ -1,29 +1,58 @@
 import datetime as dt
+from functools import lru_cache
 from typing import Union
+import numpy as np
 import QuantLib as ql
 
+### dates as arrays are QuantLib serial numbers (int32) or numpy.datetime64[D]
+_UNIX_EPOCH_SERIAL = 25569  # ql.Date(1, 1, 1970).serialNumber()
+
+@lru_cache(maxsize=65536)
+def _iso_to_serial(iso : str) -> int:
+    return ql.Date(iso.split()[0], '%Y-%m-%d').serialNumber()
+
 class Date(ql.Date):
 
     ### Extend QunatLib Date Class
-    ### 1) args = iso str, e.g., 2025-05-25
+    ### 1) args = iso str, e.g., 2025-05-25 (parsed once, then served from a cache)
     ### 2) args = datetime object, e.g., dt.datetime(2025, 5, 25)
+    ### 3) args = ql.Date, numpy.datetime64 or serial number
     
     def __init__(self, *args) -> None:
         these_args = args
         if len(these_args) == 1:
             this_arg = these_args[0]
             if isinstance(this_arg, ql.Date):
-                these_args = (this_arg.dayOfMonth(), this_arg.month(), this_arg.year())
+                these_args = (this_arg.serialNumber(),)
             elif isinstance(this_arg, str):
-                iso = this_arg.split()[0]
-                these_args = (iso, '%Y-%m-%d')
+                these_args = (_iso_to_serial(this_arg),)
+            elif isinstance(this_arg, np.datetime64):
+                these_args = (int(this_arg.astype('datetime64[D]').astype(np.int64)) + _UNIX_EPOCH_SERIAL,)
             elif isinstance(this_arg, dt.date):
                 these_args = (this_arg.day, this_arg.month, this_arg.year)
+            elif isinstance(this_arg, np.integer):
+                these_args = (int(this_arg),)
         super().__init__(*these_args)
 
+    @classmethod
+    def from_serial(cls, serial : int) -> 'Date':
+        # fast path, skips argument dispatch
+        obj = cls.__new__(cls)
+        ql.Date.__init__(obj, int(serial))
+        return obj
+
+    def to_datetime64(self) -> np.datetime64:
+        return np.datetime64(self.serialNumber() - _UNIX_EPOCH_SERIAL, 'D')
+
+    def __reduce__(self):
+        # swig objects do not pickle, the serial number is all it takes
+        return (type(self), (self.serialNumber(),))
+
 class Period(ql.Period):
     ### Just rename the class
-    pass
+
+    def __reduce__(self):
+        return (type(self), (self.length(), self.units()))
 
 class TermOrTerminationDate:
     
@@ -49,4 +78,33 @@ class TermOrTerminationDate:
         return self.this_date
     
     def get_term(self) -> Period:
-        return self.this_term
\ No newline at end of file
+        return self.this_term
+
+def serials_to_datetime64(serials : np.ndarray) -> np.ndarray:
+    return (np.asarray(serials, dtype=np.int64) - _UNIX_EPOCH_SERIAL).astype('datetime64[D]')
+
+def datetime64_to_serials(dates : np.ndarray) -> np.ndarray:
+    return (np.asarray(dates, dtype='datetime64[D]').astype(np.int64) + _UNIX_EPOCH_SERIAL).astype(np.int32)
+
+def to_serials(dates) -> np.ndarray:
+    ### Dates, iso strings, datetimes, datetime64 or serial numbers -> int32 array of serial numbers
+    if isinstance(dates, np.ndarray):
+        if np.issubdtype(dates.dtype, np.integer):
+            return dates.astype(np.int32, copy=False)
+        if np.issubdtype(dates.dtype, np.datetime64):
+            return datetime64_to_serials(dates)
+    serials = []
+    for d in dates:
+        if isinstance(d, ql.Date):
+            serials.append(d.serialNumber())
+        elif isinstance(d, str):
+            serials.append(_iso_to_serial(d))
+        elif isinstance(d, (np.datetime64, dt.date)):
+            serials.append(Date(d).serialNumber())
+        else:
+            serials.append(int(d))
+    return np.asarray(serials, dtype=np.int32)
+
+def to_dates(serials : np.ndarray) -> list:
+    ### int32 serial numbers -> Date objects, for callers that need QuantLib dates
+    return [Date.from_serial(s) for s in np.asarray(serials).tolist()]
@@ -1,8 +1,18 @@
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
-from typing import Optional
+from typing import Any, Callable, List, Optional, Union
 import QuantLib as ql
 from QuantLib import Period
-from fixedincomelib.date.basics import Date, Period
+from fixedincomelib.date.basics import (
+    Date,
+    Period,
+    to_serials,
+    to_dates,
+    datetime64_to_serials,
+    serials_to_datetime64,
+)
 from fixedincomelib.market import HolidayConvention, BusinessDayConvention, AccrualBasis
 
 
@@ -16,9 +26,11 @@ def add_period(
     end_of_month: Optional[bool] = False,
 ):
 
-    this_cal = holiday_convention.value
-    return Date(
-        this_cal.advance(start_date, term, business_day_convention.value, end_of_month)
+    this_index = holiday_convention.business_day_index
+    return Date.from_serial(
+        this_index.advance_serial(
+            start_date.serialNumber(), term, business_day_convention.value, end_of_month
+        )
     )
 
 
@@ -27,8 +39,10 @@ def move_to_business_day(
     business_day_convention: BusinessDayConvention,
     holiday_convention: HolidayConvention,
 ):
-    return Date(
-        holiday_convention.value.adjust(input_date, business_day_convention.value)
+    return Date.from_serial(
+        holiday_convention.business_day_index.adjust_serial(
+            input_date.serialNumber(), business_day_convention.value
+        )
     )
 
 
@@ -49,11 +63,13 @@ def accrued(
 
 
 def is_business_day(input_date: Date, holiday_convention: HolidayConvention):
-    return holiday_convention.value.isBusinessDay(input_date)
+    return holiday_convention.business_day_index.is_business_day_serial(
+        input_date.serialNumber()
+    )
 
 
 def is_holiday(input_date: Date, holiday_convention: HolidayConvention):
-    return holiday_convention.value.isHoliday(input_date)
+    return not is_business_day(input_date, holiday_convention)
 
 
 def is_end_of_month(input_date: Date, holiday_convention: HolidayConvention):
@@ -64,6 +80,126 @@ def end_of_month(input_date: Date, holiday_convention: HolidayConvention):
     return holiday_convention.value.endOfMonth(input_date)
 
 
+### memoized schedules
+### books hold many trades with identical schedule arguments (e.g., all spot-starting 10Y swaps of a day),
+### so generated schedules sit in a bounded LRU keyed by the normalized argument tuple;
+### make_schedule hands out a copy of the cached frame, trade_schedule the shared read-only arrays
+
+
+class ScheduleCache:
+
+    def __init__(self, max_size: Optional[int] = 4096) -> None:
+        assert max_size >= 0
+        self.max_size_ = max_size
+        self.entries_ = OrderedDict()
+        self.lock_ = threading.Lock()
+        self.hits_ = 0
+        self.misses_ = 0
+        self.evictions_ = 0
+
+    def get(self, key: tuple) -> Optional[Any]:
+        # None on a miss, cached values are never None
+        with self.lock_:
+            if key in self.entries_:
+                self.entries_.move_to_end(key)
+                self.hits_ += 1
+                return self.entries_[key]
+            self.misses_ += 1
+        return None
+
+    def put(self, key: tuple, value: Any) -> Any:
+        # returns what is cached under key, which is value unless another thread stored one first
+        with self.lock_:
+            if self.max_size_ == 0:
+                return value
+            value = self.entries_.setdefault(key, value)
+            self.entries_.move_to_end(key)
+            while len(self.entries_) > self.max_size_:
+                self.entries_.popitem(last=False)
+                self.evictions_ += 1
+        return value
+
+    def get_or_build(self, key: tuple, build: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            # built outside the lock, two threads may build the same entry, the first one stored wins
+            value = self.put(key, build())
+        return value
+
+    def resize(self, max_size: int) -> None:
+        # 0 disables caching
+        assert max_size >= 0
+        with self.lock_:
+            self.max_size_ = max_size
+            while len(self.entries_) > self.max_size_:
+                self.entries_.popitem(last=False)
+                self.evictions_ += 1
+
+    def clear(self) -> None:
+        with self.lock_:
+            self.entries_.clear()
+            self.hits_ = self.misses_ = self.evictions_ = 0
+
+    def __len__(self) -> int:
+        return len(self.entries_)
+
+    @property
+    def max_size(self) -> int:
+        return self.max_size_
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits_,
+            "misses": self.misses_,
+            "evictions": self.evictions_,
+            "size": len(self.entries_),
+            "max_size": self.max_size_,
+        }
+
+
+schedule_cache = ScheduleCache()
+
+
+def _period_key(period) -> tuple:
+    # not normalized, 14D (business days) and 2W (calendar weeks) advance differently
+    if isinstance(period, str):
+        return (period,) if period == "" else _period_key(Period(period))
+    return (period.length(), int(period.units()))
+
+
+def _schedule_key(
+    start_serial,
+    end_serial,
+    accrual_period,
+    holiday_convention,
+    business_day_convention,
+    accrual_basis,
+    rule,
+    end_of_month,
+    fix_in_arrear,
+    fixing_offset,
+    payment_offset,
+    payment_business_day_convention,
+    payment_holiday_convention,
+) -> tuple:
+    return (
+        int(start_serial),
+        int(end_serial),
+        _period_key(accrual_period),
+        holiday_convention.value_str.upper(),
+        business_day_convention.value_str.upper(),
+        accrual_basis.value_str.upper(),
+        rule.upper(),
+        bool(end_of_month),
+        bool(fix_in_arrear),
+        _period_key(fixing_offset),
+        _period_key(payment_offset),
+        payment_business_day_convention.value_str.upper(),
+        payment_holiday_convention.value_str.upper(),
+    )
+
+
 def make_schedule(
     start_date: Date,
     end_date: Date,
@@ -80,6 +216,158 @@ def make_schedule(
         BusinessDayConvention
     ] = BusinessDayConvention("F"),
     payment_holiday_convention: Optional[HolidayConvention] = HolidayConvention("USGS"),
+    use_cache: Optional[bool] = True,
+) -> pd.DataFrame:
+
+    args = (
+        start_date,
+        end_date,
+        accrual_period,
+        holiday_convention,
+        business_day_convention,
+        accrual_basis,
+        rule,
+        end_of_month,
+        fix_in_arrear,
+        fixing_offset,
+        payment_offset,
+        payment_business_day_convention,
+        payment_holiday_convention,
+    )
+    if not use_cache:
+        return _make_schedule(*args)
+    key = _schedule_key(start_date.serialNumber(), end_date.serialNumber(), *args[2:])
+    df = schedule_cache.get_or_build(("FRAME",) + key, lambda: _make_schedule(*args))
+    # the caller owns the frame it gets, as on the uncached path
+    return df.copy()
+
+
+def trade_schedule(
+    start_date: Date,
+    end_date: Date,
+    accrual_period: Period,
+    holiday_convention: HolidayConvention,
+    business_day_convention: BusinessDayConvention,
+    accrual_basis: AccrualBasis,
+    rule: Optional[str] = "BACKWARD",
+    end_of_month: Optional[bool] = False,
+    fix_in_arrear: Optional[bool] = False,
+    fixing_offset: Optional[Period] = Period("0D"),
+    payment_offset: Optional[Period] = Period("0D"),
+    payment_business_day_convention: Optional[
+        BusinessDayConvention
+    ] = BusinessDayConvention("F"),
+    payment_holiday_convention: Optional[HolidayConvention] = HolidayConvention("USGS"),
+) -> "BatchSchedule":
+
+    ### columnar schedule of one trade, same rows as make_schedule
+    ### the result is shared through schedule_cache, its arrays are read-only
+    args = (
+        start_date,
+        end_date,
+        accrual_period,
+        holiday_convention,
+        business_day_convention,
+        accrual_basis,
+        rule,
+        end_of_month,
+        fix_in_arrear,
+        fixing_offset,
+        payment_offset,
+        payment_business_day_convention,
+        payment_holiday_convention,
+    )
+
+    def build():
+        schedule = make_schedule_batch([start_date], [end_date], *args[2:])
+        schedule.set_read_only()
+        return schedule
+
+    key = _schedule_key(start_date.serialNumber(), end_date.serialNumber(), *args[2:])
+    return schedule_cache.get_or_build(("BATCH",) + key, build)
+
+
+def trade_schedules(
+    start_dates,
+    end_dates,
+    accrual_period: Union[Period, List[Period]],
+    holiday_convention: Union[HolidayConvention, List[HolidayConvention]],
+    business_day_convention: Union[BusinessDayConvention, List[BusinessDayConvention]],
+    accrual_basis: Union[AccrualBasis, List[AccrualBasis]],
+    rule: Optional[str] = "BACKWARD",
+    end_of_month: Optional[bool] = False,
+    fix_in_arrear: Optional[bool] = False,
+    fixing_offset: Optional[Period] = Period("0D"),
+    payment_offset: Optional[Period] = Period("0D"),
+    payment_business_day_convention: Optional[
+        BusinessDayConvention
+    ] = BusinessDayConvention("F"),
+    payment_holiday_convention: Optional[HolidayConvention] = HolidayConvention("USGS"),
+) -> List["BatchSchedule"]:
+
+    ### trade_schedule over many trades, arguments as in make_schedule_batch
+    ### cached schedules are reused, the distinct missing ones are generated in one make_schedule_batch call
+    starts, ends = to_serials(start_dates), to_serials(end_dates)
+    n = len(starts)
+    if len(ends) != n:
+        raise Exception("start_dates and end_dates must have the same length.")
+    columns = [
+        _broadcast(accrual_period, n, (ql.Period,)),
+        _broadcast(holiday_convention, n, (HolidayConvention,)),
+        _broadcast(business_day_convention, n, (BusinessDayConvention,)),
+        _broadcast(accrual_basis, n, (AccrualBasis,)),
+        _broadcast(rule, n, (str,)),
+        _broadcast(end_of_month, n, (bool,)),
+        _broadcast(fix_in_arrear, n, (bool,)),
+        _broadcast(fixing_offset, n, (ql.Period,)),
+        _broadcast(payment_offset, n, (ql.Period,)),
+        _broadcast(payment_business_day_convention, n, (BusinessDayConvention,)),
+        _broadcast(payment_holiday_convention, n, (HolidayConvention,)),
+    ]
+    rows = list(zip(*columns)) if n > 0 else []
+
+    res = [None] * n
+    missing = {}
+    for i in range(n):
+        key = ("BATCH",) + _schedule_key(starts[i], ends[i], *rows[i])
+        schedule = schedule_cache.get(key)
+        if schedule is None:
+            missing.setdefault(key, []).append(i)
+        else:
+            res[i] = schedule
+    if len(missing) == 0:
+        return res
+
+    first = [members[0] for members in missing.values()]
+    built = make_schedule_batch(
+        starts[first], ends[first], *[[column[i] for i in first] for column in columns]
+    )
+    for j, (key, members) in enumerate(missing.items()):
+        # views of the batch, read-only as for trade_schedule
+        schedule = built.trade(j)
+        schedule.set_read_only()
+        schedule = schedule_cache.put(key, schedule)
+        for i in members:
+            res[i] = schedule
+    return res
+
+
+def _make_schedule(
+    start_date: Date,
+    end_date: Date,
+    accrual_period: Period,
+    holiday_convention: HolidayConvention,
+    business_day_convention: BusinessDayConvention,
+    accrual_basis: AccrualBasis,
+    rule: Optional[str] = "BACKWARD",
+    end_of_month: Optional[bool] = False,
+    fix_in_arrear: Optional[bool] = False,
+    fixing_offset: Optional[Period] = Period("0D"),
+    payment_offset: Optional[Period] = Period("0D"),
+    payment_business_day_convention: Optional[
+        BusinessDayConvention
+    ] = BusinessDayConvention("F"),
+    payment_holiday_convention: Optional[HolidayConvention] = HolidayConvention("USGS"),
 ) -> pd.DataFrame:
 
     this_rule = (
@@ -96,7 +384,7 @@ def make_schedule(
         business_day_convention.value,
         business_day_convention.value,
         this_rule,
-        end_of_month,
+        bool(end_of_month),
     )
 
     # add fixing date and payment date
@@ -137,3 +425,419 @@ def make_schedule(
     df["Accrued"] = accs
 
     return df
+
+
+### array versions of the utilities above
+### dates go in as int32 serial numbers or numpy.datetime64 and come back in the same form,
+### no QuantLib date object is created per element
+
+
+def _as_serials(dates):
+    dates = np.asarray(dates)
+    if np.issubdtype(dates.dtype, np.datetime64):
+        return datetime64_to_serials(dates), True
+    return to_serials(dates), False
+
+
+def _as_input_form(serials: np.ndarray, is_datetime64: bool) -> np.ndarray:
+    return serials_to_datetime64(serials) if is_datetime64 else serials
+
+
+def add_period_batch(
+    start_dates: np.ndarray,
+    term: Period,
+    business_day_convention: Optional[BusinessDayConvention] = BusinessDayConvention(
+        "F"
+    ),
+    holiday_convention: Optional[HolidayConvention] = HolidayConvention("USGS"),
+    end_of_month: Optional[bool] = False,
+) -> np.ndarray:
+    serials, is_dt64 = _as_serials(start_dates)
+    moved = holiday_convention.business_day_index.advance(
+        serials, term, business_day_convention.value, end_of_month
+    )
+    return _as_input_form(moved, is_dt64)
+
+
+def move_to_business_day_batch(
+    input_dates: np.ndarray,
+    business_day_convention: BusinessDayConvention,
+    holiday_convention: HolidayConvention,
+) -> np.ndarray:
+    serials, is_dt64 = _as_serials(input_dates)
+    moved = holiday_convention.business_day_index.adjust(
+        serials, business_day_convention.value
+    )
+    return _as_input_form(moved, is_dt64)
+
+
+def is_business_day_batch(
+    input_dates: np.ndarray, holiday_convention: HolidayConvention
+) -> np.ndarray:
+    serials, _ = _as_serials(input_dates)
+    return holiday_convention.business_day_index.is_business_day(serials)
+
+
+def accrued_batch(
+    start_dates: np.ndarray,
+    end_dates: np.ndarray,
+    accrual_basis: Optional[AccrualBasis] = AccrualBasis("ACT/ACT"),
+    business_day_convention: Optional[BusinessDayConvention] = BusinessDayConvention(
+        "F"
+    ),
+    holiday_convention: Optional[HolidayConvention] = HolidayConvention("USGS"),
+) -> np.ndarray:
+    starts, _ = _as_serials(start_dates)
+    ends, _ = _as_serials(end_dates)
+    adjusted_ends = _adjust_serials(ends, business_day_convention, holiday_convention)
+    return _year_fractions(starts, adjusted_ends, accrual_basis)
+
+
+def year_fraction_batch(
+    start_dates: np.ndarray,
+    end_dates: np.ndarray,
+    accrual_basis: Union[AccrualBasis, ql.DayCounter],
+) -> np.ndarray:
+    # plain day count fractions, no business-day adjustment (unlike accrued_batch)
+    # accrual_basis may also be a QuantLib day counter, e.g., that of an index
+    starts, _ = _as_serials(start_dates)
+    ends, _ = _as_serials(end_dates)
+    starts, ends = np.broadcast_arrays(starts, ends)
+    return _year_fractions(starts, ends, accrual_basis)
+
+
+### batch schedule generation
+### many trades share dates and conventions, so schedules and accruals are built once per
+### distinct input, and fixing / payment dates come from the compiled business-day index
+
+
+class BatchSchedule:
+
+    ### columnar container for the schedules of many trades
+    ### periods of trade i live in rows offsets[i] : offsets[i + 1]
+    ### dates are QuantLib serial numbers (int32), accrued is float64
+
+    def __init__(
+        self,
+        offsets: np.ndarray,
+        start_dates: np.ndarray,
+        end_dates: np.ndarray,
+        fixing_dates: np.ndarray,
+        payment_dates: np.ndarray,
+        accrued: np.ndarray,
+    ) -> None:
+        self.offsets_ = offsets
+        self.start_dates_ = start_dates
+        self.end_dates_ = end_dates
+        self.fixing_dates_ = fixing_dates
+        self.payment_dates_ = payment_dates
+        self.accrued_ = accrued
+
+    @property
+    def num_trades(self) -> int:
+        return len(self.offsets_) - 1
+
+    @property
+    def num_periods(self) -> int:
+        return int(self.offsets_[-1])
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self.offsets_
+
+    @property
+    def start_dates(self) -> np.ndarray:
+        return self.start_dates_
+
+    @property
+    def end_dates(self) -> np.ndarray:
+        return self.end_dates_
+
+    @property
+    def fixing_dates(self) -> np.ndarray:
+        return self.fixing_dates_
+
+    @property
+    def payment_dates(self) -> np.ndarray:
+        return self.payment_dates_
+
+    @property
+    def accrued(self) -> np.ndarray:
+        return self.accrued_
+
+    def trade_slice(self, i: int) -> slice:
+        assert 0 <= i < self.num_trades
+        return slice(int(self.offsets_[i]), int(self.offsets_[i + 1]))
+
+    def set_read_only(self) -> None:
+        # for schedules shared between products
+        for array in [
+            self.offsets_,
+            self.start_dates_,
+            self.end_dates_,
+            self.fixing_dates_,
+            self.payment_dates_,
+            self.accrued_,
+        ]:
+            array.setflags(write=False)
+
+    def trade(self, i: int) -> "BatchSchedule":
+        # single-trade schedule over views of this one
+        rows = self.trade_slice(i)
+        return BatchSchedule(
+            np.array([0, rows.stop - rows.start], dtype=np.int64),
+            self.start_dates_[rows],
+            self.end_dates_[rows],
+            self.fixing_dates_[rows],
+            self.payment_dates_[rows],
+            self.accrued_[rows],
+        )
+
+    def to_frame(self, i: int) -> pd.DataFrame:
+        # same layout as make_schedule
+        rows = self.trade_slice(i)
+        df = pd.DataFrame(
+            columns=["StartDate", "EndDate", "FixingDate", "PaymentDate", "Accrued"]
+        )
+        df["StartDate"] = to_dates(self.start_dates_[rows])
+        df["EndDate"] = to_dates(self.end_dates_[rows])
+        df["FixingDate"] = to_dates(self.fixing_dates_[rows])
+        df["PaymentDate"] = to_dates(self.payment_dates_[rows])
+        df["Accrued"] = self.accrued_[rows].astype(float)
+        return df
+
+
+def _broadcast(value, n: int, scalar_types: tuple) -> list:
+    # strings (e.g., '' offsets) and numpy scalars (e.g., np.bool_ flags) are single values too
+    if isinstance(value, scalar_types + (str, np.generic)):
+        return [value] * n
+    value = list(value)
+    if len(value) != n:
+        raise Exception(f"Expect {n} entries, got {len(value)}.")
+    return value
+
+
+def _is_no_offset(offset) -> bool:
+    return isinstance(offset, str) and offset == ""
+
+
+def _as_period(period) -> Period:
+    return Period(period) if isinstance(period, str) else period
+
+
+def _advance_serials(
+    serials: np.ndarray,
+    term: Period,
+    business_day_convention: BusinessDayConvention,
+    holiday_convention: HolidayConvention,
+    end_of_month: bool = False,
+) -> np.ndarray:
+    return holiday_convention.business_day_index.advance(
+        serials, term, business_day_convention.value, end_of_month
+    )
+
+
+def _adjust_serials(
+    serials: np.ndarray,
+    business_day_convention: BusinessDayConvention,
+    holiday_convention: HolidayConvention,
+) -> np.ndarray:
+    return holiday_convention.business_day_index.adjust(
+        serials, business_day_convention.value
+    )
+
+
+# QuantLib day counter names of the fixed-denominator bases
+_fixed_denominators = {
+    "ACT/360": 360.0,
+    "ACT/365 FIXED": 365.0,
+    "ACTUAL/360": 360.0,
+    "ACTUAL/365 (FIXED)": 365.0,
+}
+
+
+def _year_fractions(
+    start_serials: np.ndarray,
+    end_serials: np.ndarray,
+    accrual_basis: Union[AccrualBasis, ql.DayCounter],
+) -> np.ndarray:
+    # fixed-denominator bases do not need QuantLib at all
+    days = (end_serials - start_serials).astype(np.float64)
+    if isinstance(accrual_basis, AccrualBasis):
+        name, day_counter = accrual_basis.value_str.upper(), accrual_basis.value
+    else:
+        name, day_counter = accrual_basis.name().upper(), accrual_basis
+    if name in _fixed_denominators:
+        return days / _fixed_denominators[name]
+    # one QuantLib call per distinct period
+    pairs = np.stack([start_serials, end_serials], axis=1)
+    uniques, inverse = np.unique(pairs, axis=0, return_inverse=True)
+    fractions = np.fromiter(
+        (
+            day_counter.yearFraction(ql.Date(int(s)), ql.Date(int(e)))
+            for s, e in uniques
+        ),
+        dtype=np.float64,
+        count=len(uniques),
+    )
+    return fractions[inverse.reshape(-1)]
+
+
+def make_schedule_batch(
+    start_dates,
+    end_dates,
+    accrual_period: Union[Period, List[Period]],
+    holiday_convention: Union[HolidayConvention, List[HolidayConvention]],
+    business_day_convention: Union[BusinessDayConvention, List[BusinessDayConvention]],
+    accrual_basis: Union[AccrualBasis, List[AccrualBasis]],
+    rule: Optional[str] = "BACKWARD",
+    end_of_month: Optional[bool] = False,
+    fix_in_arrear: Optional[bool] = False,
+    fixing_offset: Optional[Period] = Period("0D"),
+    payment_offset: Optional[Period] = Period("0D"),
+    payment_business_day_convention: Optional[
+        BusinessDayConvention
+    ] = BusinessDayConvention("F"),
+    payment_holiday_convention: Optional[HolidayConvention] = HolidayConvention("USGS"),
+) -> BatchSchedule:
+
+    ### vectorized make_schedule over many trades
+    ### start_dates / end_dates : Dates, iso strings or serial numbers, one per trade
+    ### every other argument is either a single value shared by all trades or one value per trade
+    ### trade i yields exactly the rows of make_schedule(start_dates[i], end_dates[i], ...)
+
+    starts, ends = to_serials(start_dates), to_serials(end_dates)
+    n = len(starts)
+    if len(ends) != n:
+        raise Exception("start_dates and end_dates must have the same length.")
+
+    conventions = list(
+        zip(
+            _broadcast(accrual_period, n, (ql.Period,)),
+            _broadcast(holiday_convention, n, (HolidayConvention,)),
+            _broadcast(business_day_convention, n, (BusinessDayConvention,)),
+            _broadcast(accrual_basis, n, (AccrualBasis,)),
+            _broadcast(rule, n, (str,)),
+            _broadcast(end_of_month, n, (bool,)),
+            _broadcast(fix_in_arrear, n, (bool,)),
+            _broadcast(fixing_offset, n, (ql.Period,)),
+            _broadcast(payment_offset, n, (ql.Period,)),
+            _broadcast(payment_business_day_convention, n, (BusinessDayConvention,)),
+            _broadcast(payment_holiday_convention, n, (HolidayConvention,)),
+        )
+    )
+
+    # group trades by convention, conventions are keyed by their string form
+    groups = {}
+    for i, conv in enumerate(conventions):
+        key = (
+            str(conv[0]),
+            conv[1].value_str.upper(),
+            conv[2].value_str.upper(),
+            conv[3].value_str.upper(),
+            conv[4].upper(),
+            conv[5],
+            conv[6],
+            str(conv[7]),
+            str(conv[8]),
+            conv[9].value_str.upper(),
+            conv[10].value_str.upper(),
+        )
+        groups.setdefault(key, (conv, []))[1].append(i)
+
+    per_trade = [None] * n
+    for conv, members in groups.values():
+        (
+            this_period,
+            this_hol,
+            this_bdc,
+            this_basis,
+            this_rule,
+            this_eom,
+            this_fia,
+            this_fixing_offset,
+            this_payment_offset,
+            this_pay_bdc,
+            this_pay_hol,
+        ) = conv
+        ql_rule = (
+            ql.DateGeneration.Backward
+            if this_rule.upper() == "BACKWARD"
+            else ql.DateGeneration.Forward
+        )
+        this_eom, this_fia = bool(this_eom), bool(this_fia)
+
+        # roll dates, one ql.Schedule per distinct (start, end) pair
+        members = np.asarray(members)
+        pairs = np.stack([starts[members], ends[members]], axis=1)
+        unique_pairs, pair_idx = np.unique(pairs, axis=0, return_inverse=True)
+        pair_idx = pair_idx.reshape(-1)
+        rolls = []
+        for s, e in unique_pairs:
+            this_schedule = ql.Schedule(
+                ql.Date(int(s)),
+                ql.Date(int(e)),
+                this_period,
+                this_hol.value,
+                this_bdc.value,
+                this_bdc.value,
+                ql_rule,
+                this_eom,
+            )
+            rolls.append(
+                np.fromiter(
+                    (d.serialNumber() for d in this_schedule.dates()), dtype=np.int32
+                )
+            )
+
+        # periods of all distinct schedules in this group
+        counts = np.array([len(r) - 1 for r in rolls], dtype=np.int64)
+        s_col = np.concatenate([r[:-1] for r in rolls])
+        e_col = np.concatenate([r[1:] for r in rolls])
+        # an offset of '' means none, as in make_schedule : fixing on the start, payment on the roll date
+        f_col = (
+            s_col
+            if _is_no_offset(this_fixing_offset)
+            else _advance_serials(
+                e_col if this_fia else s_col,
+                _as_period(this_fixing_offset),
+                this_bdc,
+                this_hol,
+            )
+        )
+        p_col = (
+            e_col
+            if _is_no_offset(this_payment_offset)
+            else _advance_serials(
+                e_col, _as_period(this_payment_offset), this_pay_bdc, this_pay_hol
+            )
+        )
+        adj_e = _adjust_serials(e_col, this_bdc, this_hol)
+        a_col = _year_fractions(s_col, adj_e, this_basis)
+
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        for trade, k in zip(members, pair_idx):
+            rows = slice(bounds[k], bounds[k + 1])
+            per_trade[trade] = (
+                s_col[rows],
+                e_col[rows],
+                f_col[rows],
+                p_col[rows],
+                a_col[rows],
+            )
+
+    # stitch back in the original trade order
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(t[0]) for t in per_trade])
+    columns = [
+        np.concatenate([t[j] for t in per_trade]) if n > 0 else np.empty(0)
+        for j in range(5)
+    ]
+    return BatchSchedule(
+        offsets,
+        columns[0].astype(np.int32),
+        columns[1].astype(np.int32),
+        columns[2].astype(np.int32),
+        columns[3].astype(np.int32),
+        columns[4].astype(np.float64),
+    )
@@ -4,9 +4,13 @@ from fixedincomelib.market.basics import (
     BusinessDayConvention,
     HolidayConvention,
 )
+from fixedincomelib.market.calendars import BusinessDayIndex
+from fixedincomelib.market.fixings import IndexFixingSeries
+from fixedincomelib.market.curves import YieldCurve
 from fixedincomelib.market.registries import (
     # DataConventionRegistry,
     IndexRegistry,
+    IndexHandle,
     IndexFixingsManager,
     DataIdentifierRegistry,
 )
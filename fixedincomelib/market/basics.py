@@ -1,10 +1,92 @@
+import inspect
 from typing import Optional
 import QuantLib as ql
 
 ### below are some wrappers to allow str -> quantlib object conversion
 ### currency, businessdayconvention, holidayconvention, accrualbasis
 
-class Currency:
+### wrappers are interned (flyweight): each input string maps to one shared immutable instance,
+### so the if/elif chain and the quantlib objects are built once per string per process
+
+class InternedMeta(type):
+
+    def __init__(cls, name, bases, namespace) -> None:
+        super().__init__(name, bases, namespace)
+        cls._instances = {}
+        cls._num_constructed = 0
+        cls._num_avoided = 0
+        cls._signature = inspect.signature(cls.__init__)
+
+    def _intern_value(cls, args : tuple, kwargs : dict):
+        # the convention string, however it was passed, defaults applied
+        if len(args) == 1 and not kwargs:
+            return args[0]
+        bound = cls._signature.bind(None, *args, **kwargs)
+        bound.apply_defaults()
+        return list(bound.arguments.values())[1]
+
+    def __call__(cls, *args, **kwargs):
+        value = cls._intern_value(args, kwargs)
+        # spellings of one convention share an instance, it keeps the spelling it was first built with
+        key = value.upper() if isinstance(value, str) else value
+        obj = cls._instances.get(key)
+        if obj is not None:
+            cls._num_avoided += 1
+            return obj
+        obj = super().__call__(value)
+        object.__setattr__(obj, '_intern_args', (value,))
+        object.__setattr__(obj, '_intern_key', key)
+        object.__setattr__(obj, '_frozen', True)
+        # two threads may construct the same convention, the first stored wins for both
+        obj = cls._instances.setdefault(key, obj)
+        cls._num_constructed += 1
+        return obj
+
+    def interning_stats(cls) -> dict:
+        return {
+            'instances' : len(cls._instances),
+            'constructed' : cls._num_constructed,
+            'constructions_avoided' : cls._num_avoided }
+
+    def clear_interned(cls) -> None:
+        cls._instances.clear()
+        cls._num_constructed = 0
+        cls._num_avoided = 0
+
+class InternedConvention(metaclass=InternedMeta):
+
+    _frozen = False
+
+    def __setattr__(self, name, value) -> None:
+        if self._frozen:
+            raise AttributeError(f'{type(self).__name__} is immutable.')
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable.')
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if type(self) is not type(other):
+            return NotImplemented
+        return self._intern_key == other._intern_key
+
+    def __ne__(self, other) -> bool:
+        res = self.__eq__(other)
+        return res if res is NotImplemented else not res
+
+    def __hash__(self) -> int:
+        return hash((type(self).__name__, self._intern_key))
+
+    def __reduce__(self):
+        # rebuild through the constructor so unpickled / copied objects are interned too
+        return (type(self), self._intern_args)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._intern_key!r})'
+
+class Currency(InternedConvention):
 
     def __init__(self, input : str) -> None:
 
@@ -38,7 +120,7 @@ class Currency:
     def is_valid(self):
         return self.is_valid_
 
-class BusinessDayConvention:
+class BusinessDayConvention(InternedConvention):
     
     def __init__(self, input : Optional[str]='NONE') -> None:
         self.value_str_ = input
@@ -60,8 +142,13 @@ class BusinessDayConvention:
     def value_str(self):
         return self.value_str_
     
-class HolidayConvention:
-    
+class HolidayConvention(InternedConvention):
+
+    ### business-day indices are compiled lazily, once per holiday center and date range
+    _index_first = 25569 # 1970-01-01
+    _index_last = 73415 # 2100-12-31
+    _business_day_indices = {}
+
     def __init__(self, input : Optional[str]='NONE') -> None:
         self.value_str_ = input
         self.value_ = ql.NullCalendar()
@@ -88,7 +175,25 @@ class HolidayConvention:
     def value_str(self):
         return self.value_str_
 
-class AccrualBasis(ql.DayCounter):
+    @property
+    def business_day_index(self) -> 'BusinessDayIndex':
+        key = self.value_.name()
+        index = self._business_day_indices.get(key)
+        if index is None:
+            # imported here, calendars depends on fixedincomelib.date which depends on this module
+            from fixedincomelib.market.calendars import BusinessDayIndex
+            index = self._business_day_indices.setdefault(
+                key, BusinessDayIndex(self.value_, self._index_first, self._index_last))
+        return index
+
+    @classmethod
+    def set_business_day_index_range(cls, first : int, last : int) -> None:
+        # serial numbers; compiled indices are dropped and rebuilt on next use
+        assert first < last
+        cls._index_first, cls._index_last = int(first), int(last)
+        cls._business_day_indices.clear()
+
+class AccrualBasis(InternedConvention, ql.DayCounter):
 
     def __init__(self, input : Optional[str]='NONE') -> None:
         self.value_ = None
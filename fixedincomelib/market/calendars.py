@@ -0,0 +1,224 @@
+import numpy as np
+from typing import Optional
+import QuantLib as ql
+from fixedincomelib.date.basics import serials_to_datetime64, datetime64_to_serials
+
+### compiled business-day index for a QuantLib calendar
+### the calendar is evaluated once for every day in [first, last] and kept as numpy arrays:
+###   1) a business-day bitmap
+###   2) the cumulative business-day count
+###   3) the next / previous business day of every day
+### adjust, advance and business-days-between then become array lookups
+### dates are QuantLib serial numbers; anything outside the range falls back to QuantLib
+
+def _month_ids(serials: np.ndarray) -> np.ndarray:
+    return serials_to_datetime64(serials).astype('datetime64[M]').astype(np.int64)
+
+
+def _add_months(serials: np.ndarray, months: int) -> np.ndarray:
+    # same as ql.Date + n Months, i.e., day-of-month clamped to the target month length
+    days = serials_to_datetime64(serials)
+    this_month = days.astype('datetime64[M]')
+    day_of_month = (days - this_month.astype('datetime64[D]')).astype(np.int64)
+    target_month = this_month + months
+    month_length = ((target_month + 1).astype('datetime64[D]') - target_month.astype('datetime64[D]')).astype(np.int64)
+    target = target_month.astype('datetime64[D]') + np.minimum(day_of_month, month_length - 1)
+    return datetime64_to_serials(target)
+
+
+def _last_day_of_month(serials: np.ndarray) -> np.ndarray:
+    this_month = serials_to_datetime64(serials).astype('datetime64[M]')
+    return datetime64_to_serials((this_month + 1).astype('datetime64[D]') - 1)
+
+
+class BusinessDayIndex:
+
+    _native_conventions = (
+        ql.Following, ql.ModifiedFollowing, ql.Preceding, ql.ModifiedPreceding, ql.Unadjusted)
+
+    def __init__(self, calendar : ql.Calendar, first : int, last : int) -> None:
+        assert first < last
+        self.calendar_ = calendar
+        self.first_ = int(first)
+        self.last_ = int(last)
+        # one calendar query per day, never again
+        self.is_business_ = np.fromiter(
+            (calendar.isBusinessDay(ql.Date(d)) for d in range(self.first_, self.last_ + 1)),
+            dtype=bool,
+            count=self.last_ - self.first_ + 1)
+        # cum_count_[k] = number of business days in [first, first + k]
+        self.cum_count_ = np.cumsum(self.is_business_, dtype=np.int32)
+        self.business_days_ = (np.flatnonzero(self.is_business_) + self.first_).astype(np.int32)
+        # next_[k] / prev_[k] = first business day on or after / on or before first + k, -1 if not in range
+        pos = self.cum_count_ - self.is_business_
+        next_ = np.full(len(self.is_business_), -1, dtype=np.int32)
+        has_next = pos < len(self.business_days_)
+        next_[has_next] = self.business_days_[pos[has_next]]
+        prev_ = np.full(len(self.is_business_), -1, dtype=np.int32)
+        has_prev = self.cum_count_ > 0
+        prev_[has_prev] = self.business_days_[self.cum_count_[has_prev] - 1]
+        self.next_, self.prev_ = next_, prev_
+        self.month_ids_ = _month_ids(np.arange(self.first_, self.last_ + 1))
+
+    @property
+    def calendar(self) -> ql.Calendar:
+        return self.calendar_
+
+    @property
+    def first(self) -> int:
+        return self.first_
+
+    @property
+    def last(self) -> int:
+        return self.last_
+
+    @property
+    def num_business_days(self) -> int:
+        return len(self.business_days_)
+
+    def in_range(self, serials) -> np.ndarray:
+        serials = np.asarray(serials)
+        return (serials >= self.first_) & (serials <= self.last_)
+
+    ### scalar entry points, used by date.utilities
+
+    def contains(self, serial : int) -> bool:
+        return self.first_ <= serial <= self.last_
+
+    def is_business_day_serial(self, serial : int) -> bool:
+        if not self.contains(serial):
+            return self.calendar_.isBusinessDay(ql.Date(serial))
+        return bool(self.is_business_[serial - self.first_])
+
+    def adjust_serial(self, serial : int, business_day_convention : int) -> int:
+        if business_day_convention == ql.Unadjusted:
+            return serial
+        res = -1
+        if self.contains(serial) and business_day_convention in self._native_conventions:
+            k = serial - self.first_
+            forward = business_day_convention in (ql.Following, ql.ModifiedFollowing)
+            res = int(self.next_[k] if forward else self.prev_[k])
+            if res >= 0 and business_day_convention in (ql.ModifiedFollowing, ql.ModifiedPreceding) \
+                and self.month_ids_[res - self.first_] != self.month_ids_[k]:
+                res = int(self.prev_[k] if forward else self.next_[k])
+        if res < 0:
+            res = self.calendar_.adjust(ql.Date(serial), business_day_convention).serialNumber()
+        return res
+
+    def advance_serial(self, serial : int, term : ql.Period, business_day_convention : int, end_of_month : Optional[bool]=False) -> int:
+        n = term.length()
+        if n == 0:
+            return self.adjust_serial(serial, business_day_convention)
+        if term.units() == ql.Days and self.contains(serial):
+            k = serial - self.first_
+            pos = int(self.cum_count_[k]) + n - 1 if n > 0 else int(self.cum_count_[k]) - int(self.is_business_[k]) + n
+            if 0 <= pos < len(self.business_days_):
+                return int(self.business_days_[pos])
+        return self.calendar_.advance(ql.Date(serial), term, business_day_convention, end_of_month).serialNumber()
+
+    ### vectorized entry points
+
+    def is_business_day(self, serials) -> np.ndarray:
+        serials = np.asarray(serials, dtype=np.int64)
+        inside = self.in_range(serials)
+        res = np.empty(serials.shape, dtype=bool)
+        res[inside] = self.is_business_[serials[inside] - self.first_]
+        for k in np.flatnonzero(~inside):
+            res.flat[k] = self.calendar_.isBusinessDay(ql.Date(int(serials.flat[k])))
+        return res
+
+    def adjust(self, serials, business_day_convention : int) -> np.ndarray:
+        serials = np.asarray(serials, dtype=np.int64)
+        if business_day_convention not in self._native_conventions:
+            return self._ql_adjust(serials, business_day_convention, np.ones(serials.shape, dtype=bool))
+        if business_day_convention == ql.Unadjusted:
+            return serials.astype(np.int32)
+        inside = self.in_range(serials)
+        k = np.where(inside, serials - self.first_, 0)
+        if business_day_convention in (ql.Following, ql.ModifiedFollowing):
+            res = self.next_[k].astype(np.int64)
+            if business_day_convention == ql.ModifiedFollowing:
+                rolled = (res >= 0) & (self.month_ids_[np.clip(res - self.first_, 0, None)] != self.month_ids_[k])
+                res = np.where(rolled, self.prev_[k], res)
+        else:
+            res = self.prev_[k].astype(np.int64)
+            if business_day_convention == ql.ModifiedPreceding:
+                rolled = (res >= 0) & (self.month_ids_[np.clip(res - self.first_, 0, None)] != self.month_ids_[k])
+                res = np.where(rolled, self.next_[k], res)
+        res = np.where(inside, res, -1)
+        return self._ql_adjust(serials, business_day_convention, res < 0, res)
+
+    def advance(self, serials, term : ql.Period, business_day_convention : int, end_of_month : Optional[bool]=False) -> np.ndarray:
+        # same semantics as ql.Calendar.advance
+        serials = np.asarray(serials, dtype=np.int64)
+        n, unit = term.length(), term.units()
+        if n == 0:
+            return self.adjust(serials, business_day_convention)
+        if unit == ql.Days:
+            inside = self.in_range(serials)
+            k = np.where(inside, serials - self.first_, 0)
+            if n > 0:
+                pos = self.cum_count_[k].astype(np.int64) + n - 1
+            else:
+                pos = self.cum_count_[k].astype(np.int64) - self.is_business_[k] + n
+            ok = inside & (pos >= 0) & (pos < len(self.business_days_))
+            res = np.where(ok, self.business_days_[np.clip(pos, 0, len(self.business_days_) - 1)], -1)
+            return self._ql_advance(serials, term, business_day_convention, end_of_month, ~ok, res)
+        if unit == ql.Weeks:
+            return self.adjust(serials + 7 * n, business_day_convention)
+        months = n if unit == ql.Months else 12 * n
+        rolled = _add_months(serials, months)
+        res = self.adjust(rolled, business_day_convention).astype(np.int64)
+        if end_of_month:
+            if business_day_convention == ql.Unadjusted:
+                eom = _last_day_of_month(serials) == serials
+                res = np.where(eom, _last_day_of_month(rolled), res)
+            else:
+                eom = self.is_end_of_month(serials)
+                res = np.where(eom, self.end_of_month(rolled), res)
+        return res.astype(np.int32)
+
+    def is_end_of_month(self, serials) -> np.ndarray:
+        # same as ql.Calendar.isEndOfMonth
+        serials = np.asarray(serials, dtype=np.int64)
+        return _month_ids(serials) != _month_ids(self.adjust(serials + 1, ql.Following))
+
+    def end_of_month(self, serials) -> np.ndarray:
+        # same as ql.Calendar.endOfMonth
+        return self.adjust(_last_day_of_month(np.asarray(serials, dtype=np.int64)), ql.Preceding)
+
+    def business_days_between(self, from_serials, to_serials, include_first : Optional[bool]=True, include_last : Optional[bool]=False) -> np.ndarray:
+        # same as ql.Calendar.businessDaysBetween
+        a = np.asarray(from_serials, dtype=np.int64)
+        b = np.asarray(to_serials, dtype=np.int64)
+        a, b = np.broadcast_arrays(a, b)
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        inside = self.in_range(lo) & self.in_range(hi)
+        k_lo = np.where(inside, lo - self.first_, 0)
+        k_hi = np.where(inside, hi - self.first_, 0)
+        bd_lo, bd_hi = self.is_business_[k_lo], self.is_business_[k_hi]
+        # business days strictly inside (lo, hi)
+        strict = self.cum_count_[k_hi].astype(np.int64) - bd_hi - self.cum_count_[k_lo]
+        # when from > to the roles of include_first / include_last swap
+        inc_lo = np.where(a <= b, include_first, include_last)
+        inc_hi = np.where(a <= b, include_last, include_first)
+        res = strict + (inc_lo & bd_lo) + (inc_hi & bd_hi)
+        res = np.where(a < b, res, np.where(a > b, -res, include_first & include_last & bd_lo))
+        for k in np.flatnonzero(~inside):
+            res.flat[k] = self.calendar_.businessDaysBetween(
+                ql.Date(int(a.flat[k])), ql.Date(int(b.flat[k])), include_first, include_last)
+        return res.astype(np.int64)
+
+    ### QuantLib fallback for whatever the index cannot answer
+
+    def _ql_adjust(self, serials, business_day_convention, mask, res=None) -> np.ndarray:
+        res = np.zeros(serials.shape, dtype=np.int64) if res is None else res
+        for k in np.flatnonzero(mask):
+            res.flat[k] = self.calendar_.adjust(ql.Date(int(serials.flat[k])), business_day_convention).serialNumber()
+        return res.astype(np.int32)
+
+    def _ql_advance(self, serials, term, business_day_convention, end_of_month, mask, res) -> np.ndarray:
+        for k in np.flatnonzero(mask):
+            res.flat[k] = self.calendar_.advance(
+                ql.Date(int(serials.flat[k])), term, business_day_convention, end_of_month).serialNumber()
+        return res.astype(np.int32)
@@ -0,0 +1,161 @@
+import threading
+import numpy as np
+from typing import List, Optional, Union
+from fixedincomelib.date import Date, to_serials, datetime64_to_serials
+from fixedincomelib.market.basics import AccrualBasis
+from fixedincomelib.utilities.numerics import (
+    InterpMethod,
+    ExtrapMethod,
+    InterpolatorFactory,
+    Interpolator1D)
+
+### discount / forward curve on an Interpolator1D of the instantaneous forward rate f(t)
+### t is the year fraction (accrual_basis) from the reference date to a date, so
+###   df(d) = exp(-int_0^t(d) f),  zero(d) = -log(df(d)) / t(d),  fwd(s, e) = (df(s) / df(e) - 1) / tau(s, e)
+### the pillars are dates, the interpolator is built on their times
+### date -> time goes through a table indexed by serial number, filled once per serial and grown on
+### demand, so repeated query grids are a gather and only new dates cost a day count;
+### the table is one immutable (first serial, year fractions) tuple, swapped in by a single assignment
+
+def _year_fractions(start_serials : np.ndarray, end_serials : np.ndarray, accrual_basis : AccrualBasis) -> np.ndarray:
+    # imported here, the date utilities import this package
+    from fixedincomelib.date import year_fraction_batch
+    return year_fraction_batch(start_serials, end_serials, accrual_basis)
+
+def _serials(dates) -> np.ndarray:
+    dates = np.asarray(dates)
+    if np.issubdtype(dates.dtype, np.datetime64):
+        return datetime64_to_serials(dates).astype(np.int64)
+    return to_serials(dates).astype(np.int64)
+
+class YieldCurve:
+
+    # the time table grows by at least this many days at a time
+    _table_block = 3660
+
+    def __init__(
+            self,
+            reference_date : Date,
+            pillar_dates : Union[List[Date], np.ndarray],
+            values : Union[List[float], np.ndarray],
+            accrual_basis : Optional[AccrualBasis]=AccrualBasis('ACT/365 FIXED'),
+            interpolation_method : Optional[InterpMethod]=InterpMethod.PIECEWISE_CONSTANT_LEFT_CONTINUOUS,
+            extrapolation_method : Optional[ExtrapMethod]=ExtrapMethod.FLAT) -> None:
+
+        self.reference_serial_ = Date(reference_date).serialNumber()
+        self.accrual_basis_ = accrual_basis
+        self.table_ = (self.reference_serial_, np.zeros(0, dtype=np.float64))
+        self.table_lock_ = threading.Lock()
+        self.pillar_serials_ = _serials(pillar_dates)
+        if len(self.pillar_serials_) == 0 or np.any(np.diff(self.pillar_serials_) <= 0):
+            raise Exception('Pillar dates must be increasing.')
+        if self.pillar_serials_[0] <= self.reference_serial_:
+            raise Exception('Pillar dates must be after the reference date.')
+        values = np.asarray(values, dtype=float)
+        if values.shape != self.pillar_serials_.shape:
+            raise Exception('One value per pillar date is expected.')
+        self.interpolator_ = InterpolatorFactory.create_1d_interpolator(
+            self.times(self.pillar_serials_), values, interpolation_method, extrapolation_method)
+
+    ### date -> time
+
+    def _extend_table(self, lo : int, hi : int) -> None:
+        # covers serials [lo, hi], readers see either the old or the new table
+        with self.table_lock_:
+            start, table = self.table_
+            end = start + len(table)
+            if start <= lo and hi < end:
+                return
+            new_start = min(start, lo - self._table_block) if len(table) else lo
+            new_end = max(end, hi + 1 + self._table_block) if len(table) else hi + 1 + self._table_block
+            serials = np.arange(new_start, new_end, dtype=np.int64)
+            new_table = np.empty(len(serials), dtype=np.float64)
+            old = (serials >= start) & (serials < end)
+            new_table[old] = table
+            new_table[~old] = _year_fractions(
+                np.full(int((~old).sum()), self.reference_serial_), serials[~old], self.accrual_basis_)
+            new_table.flags.writeable = False
+            self.table_ = (new_start, new_table)
+
+    def times(self, dates) -> np.ndarray:
+        ### year fractions from the reference date, dates as serials, Dates, iso strings or datetime64
+        serials = _serials(dates)
+        if serials.size == 0:
+            return np.zeros(serials.shape, dtype=np.float64)
+        lo, hi = int(serials.min()), int(serials.max())
+        # one read of the table, start and fractions always belong together;
+        # a concurrent clear_time_cache may drop the extension, so extend until the read covers [lo, hi]
+        start, table = self.table_
+        while lo < start or hi >= start + len(table):
+            self._extend_table(lo, hi)
+            start, table = self.table_
+        return table[serials - start]
+
+    def clear_time_cache(self) -> None:
+        with self.table_lock_:
+            self.table_ = (self.reference_serial_, np.zeros(0, dtype=np.float64))
+
+    ### queries
+
+    def discount_factors(self, dates) -> np.ndarray:
+        t = self.times(dates)
+        return np.exp(-self.interpolator_.integrate_batch(np.zeros_like(t), t))
+
+    def zero_rates(self, dates) -> np.ndarray:
+        # continuously compounded, the instantaneous forward at the reference date itself
+        t = self.times(dates)
+        integral = self.interpolator_.integrate_batch(np.zeros_like(t), t)
+        at_reference = t == 0.
+        safe_t = np.where(at_reference, 1., t)
+        return np.where(at_reference, self.interpolator_.interpolate_batch(t), integral / safe_t)
+
+    def forward_rates(self, start_dates, end_dates, accrual_basis : Optional[AccrualBasis]=None) -> np.ndarray:
+        # simply compounded over [start, end), accrued in accrual_basis (the curve's by default)
+        starts, ends = np.broadcast_arrays(_serials(start_dates), _serials(end_dates))
+        if np.any(ends <= starts):
+            raise Exception('Forward periods must end after they start.')
+        growth = np.exp(self.interpolator_.integrate_batch(self.times(starts), self.times(ends)))
+        basis = self.accrual_basis_ if accrual_basis is None else accrual_basis
+        tau = self.times(ends) - self.times(starts) if basis is self.accrual_basis_ \
+            else _year_fractions(starts, ends, basis)
+        return (growth - 1.) / tau
+
+    def instantaneous_forwards(self, dates) -> np.ndarray:
+        return self.interpolator_.interpolate_batch(self.times(dates))
+
+    def discount_factor_gradients(self, dates) -> np.ndarray:
+        # d df / d values, one row per date
+        t = self.times(dates)
+        df = np.exp(-self.interpolator_.integrate_batch(np.zeros_like(t), t))
+        return -df[:, None] * self.interpolator_.gradient_of_integrated_value_wrt_ordinate_batch(np.zeros_like(t), t)
+
+    def set_values(self, values : np.ndarray) -> None:
+        self.interpolator_.set_values(values)
+
+    @property
+    def reference_date(self) -> Date:
+        return Date.from_serial(self.reference_serial_)
+
+    @property
+    def pillar_dates(self) -> List[Date]:
+        return [Date.from_serial(int(s)) for s in self.pillar_serials_]
+
+    @property
+    def pillar_serials(self) -> np.ndarray:
+        return self.pillar_serials_
+
+    @property
+    def pillar_times(self) -> np.ndarray:
+        return self.interpolator_.axis1
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.interpolator_.values
+
+    @property
+    def accrual_basis(self) -> AccrualBasis:
+        return self.accrual_basis_
+
+    @property
+    def interpolator(self) -> Interpolator1D:
+        return self.interpolator_
@@ -59,7 +59,7 @@ class DataConventionRegFunction(Registry):
 
     def register(self, key : Any, value : Any) -> None:
         super().register(key, value)
-        self._map[key] = value
+        self._set(key, value)
 
 class DataConventionRegistry(Registry):
 
@@ -72,7 +72,7 @@ class DataConventionRegistry(Registry):
         type = value_['type']
         value_.pop('type')
         func = DataConventionRegFunction().get(type)
-        self._map[key] = func(key, value_)
+        self._set(key, func(key, value_))
 
     def display_all_data_conventions(self) -> pd.DataFrame:
         to_print = []
@@ -0,0 +1,222 @@
+import os, json, hashlib, threading
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+from fixedincomelib.date import to_serials, datetime64_to_serials
+
+### columnar fixings of one index
+### dates are sorted int32 QuantLib serial numbers, fixings are float64, both aligned
+### point lookups are binary searches, ranges are slices (views, no copy)
+### both arrays sit in one (dates, fixings) tuple that writers replace as a whole under a lock,
+### readers take the tuple once per call and never see dates from one version with fixings of another
+
+class IndexFixingSeries:
+
+    def __init__(self, dates : Optional[np.ndarray]=None, fixings : Optional[np.ndarray]=None) -> None:
+        dates = np.empty(0, dtype=np.int32) if dates is None else to_serials(dates)
+        fixings = np.empty(0, dtype=np.float64) if fixings is None else np.asarray(fixings, dtype=np.float64)
+        assert dates.shape == fixings.shape
+        # sort by date, the last of duplicated dates wins (same as loading into a dict)
+        order = np.argsort(dates, kind='stable')
+        dates, fixings = dates[order], fixings[order]
+        keep = np.ones(len(dates), dtype=bool)
+        keep[:-1] = dates[:-1] != dates[1:]
+        self.data_ = (
+            np.ascontiguousarray(dates[keep], dtype=np.int32),
+            np.ascontiguousarray(fixings[keep], dtype=np.float64))
+        self.write_lock_ = threading.Lock()
+
+    @classmethod
+    def from_csv(cls, path : str) -> 'IndexFixingSeries':
+        # csv with columns date (%Y-%m-%d) and fixing
+        df = pd.read_csv(path, usecols=['date', 'fixing'], dtype={'date' : str, 'fixing' : np.float64})
+        days = pd.to_datetime(df['date'], format='%Y-%m-%d').to_numpy().astype('datetime64[D]')
+        return cls(datetime64_to_serials(days), df['fixing'].to_numpy())
+
+    @classmethod
+    def from_arrays(cls, dates : np.ndarray, fixings : np.ndarray) -> 'IndexFixingSeries':
+        # adopt arrays that are already sorted and unique, e.g., read-only memory maps
+        obj = cls.__new__(cls)
+        obj.data_ = (dates, fixings)
+        obj.write_lock_ = threading.Lock()
+        return obj
+
+    def __len__(self) -> int:
+        return len(self.data_[0])
+
+    def __getstate__(self) -> dict:
+        return {'data_' : self.data_}
+
+    def __setstate__(self, state : dict) -> None:
+        self.data_ = state['data_']
+        self.write_lock_ = threading.Lock()
+
+    @property
+    def dates_(self) -> np.ndarray:
+        return self.data_[0]
+
+    @property
+    def fixings_(self) -> np.ndarray:
+        return self.data_[1]
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self.data_[0]
+
+    @property
+    def fixings(self) -> np.ndarray:
+        return self.data_[1]
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        # consistent (dates, fixings), unaffected by later inserts / removes
+        return self.data_
+
+    @staticmethod
+    def _locate(dates : np.ndarray, serials : np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        serials = np.asarray(serials, dtype=np.int32)
+        pos = np.searchsorted(dates, serials)
+        found = np.zeros(serials.shape, dtype=bool)
+        inside = pos < len(dates)
+        found[inside] = dates[pos[inside]] == serials[inside]
+        return pos, found
+
+    def locate(self, serials : np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # position of each date in the series and whether it is there
+        return self._locate(self.data_[0], serials)
+
+    def contains(self, serial : int) -> bool:
+        dates = self.data_[0]
+        pos = np.searchsorted(dates, serial)
+        return bool(pos < len(dates) and dates[pos] == serial)
+
+    def get(self, serial : int) -> Optional[float]:
+        dates, fixings = self.data_
+        pos = np.searchsorted(dates, serial)
+        if pos < len(dates) and dates[pos] == serial:
+            return float(fixings[pos])
+        return None
+
+    def get_many(self, serials : np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # fixings (nan where missing) and the missing mask
+        dates, fixings = self.data_
+        pos, found = self._locate(dates, serials)
+        res = np.full(pos.shape, np.nan, dtype=np.float64)
+        res[found] = fixings[pos[found]]
+        return res, ~found
+
+    def range(self, start : int, end : int, include_end : Optional[bool]=True) -> Tuple[np.ndarray, np.ndarray]:
+        dates, fixings = self.data_
+        lo = np.searchsorted(dates, start, side='left')
+        hi = np.searchsorted(dates, end, side='right' if include_end else 'left')
+        return dates[lo:hi], fixings[lo:hi]
+
+    def insert(self, serial : int, fixing : float) -> bool:
+        # existing fixings are kept, returns whether anything was inserted
+        with self.write_lock_:
+            dates, fixings = self.data_
+            pos = np.searchsorted(dates, serial)
+            if pos < len(dates) and dates[pos] == serial:
+                return False
+            self.data_ = (np.insert(dates, pos, serial).astype(np.int32, copy=False), np.insert(fixings, pos, fixing))
+        return True
+
+    def remove(self, serial : int) -> None:
+        with self.write_lock_:
+            dates, fixings = self.data_
+            pos = np.searchsorted(dates, serial)
+            if pos >= len(dates) or dates[pos] != serial:
+                raise KeyError(f'No fixing for serial date {serial}.')
+            self.data_ = (np.delete(dates, pos), np.delete(fixings, pos))
+
+
+### binary cache of the csv sources
+### <cache_dir>/<name>.dates.npy, <name>.fixings.npy and <name>.meta.json (source mtime, size, sha256)
+### the arrays are memory-mapped read-only, so processes on one host share the same pages;
+### inserts / removes replace the arrays in memory and never touch the files
+
+def _source_stamp(path : str) -> dict:
+    st = os.stat(path)
+    return {'mtime_ns' : st.st_mtime_ns, 'size' : st.st_size}
+
+def _source_hash(path : str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _cache_files(cache_dir : str, name : str) -> Tuple[str, str, str]:
+    prefix = os.path.join(cache_dir, name.lower())
+    return f'{prefix}.dates.npy', f'{prefix}.fixings.npy', f'{prefix}.meta.json'
+
+def _replace_atomically(path : str, write) -> None:
+    # readers in other processes see either the old file or the complete new one
+    tmp = f'{path}.{os.getpid()}.tmp'
+    write(tmp)
+    os.replace(tmp, path)
+
+def _write_array(path : str, array : np.ndarray) -> None:
+    def write(tmp):
+        with open(tmp, 'wb') as f:
+            np.save(f, array)
+    _replace_atomically(path, write)
+
+def _write_meta(path : str, meta : dict) -> None:
+    def write(tmp):
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+    _replace_atomically(path, write)
+
+def _write_cache(series : IndexFixingSeries, cache_dir : str, name : str, meta : dict) -> None:
+    dates_file, fixings_file, meta_file = _cache_files(cache_dir, name)
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_array(dates_file, series.dates)
+    _write_array(fixings_file, series.fixings)
+    # meta last, it is what marks the cache valid
+    _write_meta(meta_file, meta)
+
+def _read_cache(cache_dir : str, name : str, source_path : str) -> Optional[IndexFixingSeries]:
+    dates_file, fixings_file, meta_file = _cache_files(cache_dir, name)
+    if not os.path.exists(meta_file):
+        return None
+    with open(meta_file, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    stamp = _source_stamp(source_path)
+    if meta.get('mtime_ns') != stamp['mtime_ns'] or meta.get('size') != stamp['size']:
+        # touched but maybe not changed, the content hash decides
+        if meta.get('size') != stamp['size'] or meta.get('sha256') != _source_hash(source_path):
+            return None
+        meta.update(stamp)
+        try:
+            _write_meta(meta_file, meta)
+        except OSError:
+            pass
+    try:
+        dates = np.load(dates_file, mmap_mode='r')
+        fixings = np.load(fixings_file, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if dates.shape != fixings.shape or len(dates) != meta.get('length'):
+        return None
+    return IndexFixingSeries.from_arrays(dates, fixings)
+
+def load_fixing_series(source_path : str, cache_dir : Optional[str]=None) -> IndexFixingSeries:
+    ### csv -> series, through the binary cache when cache_dir is given
+    if cache_dir is None:
+        return IndexFixingSeries.from_csv(source_path)
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    cached = _read_cache(cache_dir, name, source_path)
+    if cached is not None:
+        return cached
+    series = IndexFixingSeries.from_csv(source_path)
+    meta = _source_stamp(source_path)
+    meta['sha256'] = _source_hash(source_path)
+    meta['length'] = len(series)
+    try:
+        _write_cache(series, cache_dir, name, meta)
+    except OSError:
+        # read-only or missing cache location, just use the parsed csv
+        return series
+    # hand out the memory map rather than the private copy
+    cached = _read_cache(cache_dir, name, source_path)
+    return series if cached is None else cached
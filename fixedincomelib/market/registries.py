@@ -1,20 +1,67 @@
 import os, csv, json
 from abc import ABC
 import datetime as dt
+import numpy as np
 import pandas as pd
-from typing import Self, Any, Optional
+from typing import Self, Any, Optional, Tuple
 import QuantLib as ql
-from fixedincomelib.date import Date, Period
+from fixedincomelib.date import Date, Period, to_serials
 from fixedincomelib.date.basics import TermOrTerminationDate
+from fixedincomelib.market.basics import Currency, HolidayConvention
+from fixedincomelib.market.fixings import IndexFixingSeries, load_fixing_series
 from fixedincomelib.utilities import Registry, get_config
 
 ######################################### REGISTRY #########################################
 
+class IndexHandle:
+
+    ### an index resolved once: registry key, QuantLib index and what products derive from it
+    ### builders pass the handle to every cashflow instead of looking the key up again;
+    ### handles pickle by key and are resolved again on load
+
+    __slots__ = ('name_', 'index_', 'currency_', 'fixing_holiday_convention_')
+
+    def __init__(self, name : str, index : ql.Index) -> None:
+        self.name_ = name
+        self.index_ = index
+        self.currency_ = Currency(index.currency().code())
+        self.fixing_holiday_convention_ = HolidayConvention(index.fixingCalendar().name())
+
+    @property
+    def name(self) -> str:
+        return self.name_
+
+    @property
+    def index(self) -> ql.Index:
+        return self.index_
+
+    @property
+    def currency(self) -> Currency:
+        return self.currency_
+
+    @property
+    def fixing_holiday_convention(self) -> HolidayConvention:
+        return self.fixing_holiday_convention_
+
+    def __reduce__(self):
+        return (IndexRegistry.resolve, (self.name_,))
+
+    def __repr__(self) -> str:
+        return f'IndexHandle({self.name_})'
+
 class IndexRegistry(Registry):
+
+    ### keys are stored upper-cased, with a reverse map from QuantLib index name to key
+    ### and a resolved handle per key
     
     def __new__(cls) -> Self:
         return super().__new__(cls, 'indices', 'Index')
 
+    def _initialize(self) -> None:
+        # there even if the static file is not found, so lookups fail with the registry's own error
+        self._by_ql_name = {}
+        self._handles = {}
+
     def register(self, key : Any, value : Any) -> None:
         super().register(key, value)
         # delegate index to ql
@@ -25,18 +72,58 @@ class IndexRegistry(Registry):
             raise KeyError(f"QuantLib has no attribute '{value}' for key '{key}'")
         try:
             # if this is not an termed index
-            self._map[key.upper()] = ql_object()
+            this_index = ql_object()
         except:
             err_msg = f'Cannot create a term index for key {key}.'
             tenor = str(key).split('-')[-1]
             if not TermOrTerminationDate(tenor).is_term():
                 raise Exception(err_msg)
-            self._map[key] = ql_object(Period(tenor))
+            this_index = ql_object(Period(tenor))
+        self._set(key.upper(), this_index)
+        self._by_ql_name.setdefault(this_index.name(), key.upper())
 
     def get(self, key: Any, **args) -> Any:
-        if key.upper() not in self._map:
-            raise Exception(f'Cannot find {key} in index registry.')
-        return self._map[key.upper()]
+        this_index = self._map.get(key)
+        if this_index is None:
+            this_index = self._map.get(key.upper())
+            if this_index is None:
+                raise Exception(f'Cannot find {key} in index registry.')
+        return this_index
+
+    def erase(self, key : Any) -> None:
+        key = key.upper()
+        with self._write_lock:
+            if not self.exists(key):
+                raise KeyError('Cannot find this key.')
+            this_index = self._map[key]
+            super().erase(key)
+            if self._by_ql_name.get(this_index.name()) == key:
+                self._by_ql_name.pop(this_index.name())
+            self._handles.pop(key, None)
+
+    def clear(self) -> None:
+        with self._write_lock:
+            super().clear()
+            self._by_ql_name.clear()
+            self._handles.clear()
+
+    def get_handle(self, key : Any) -> IndexHandle:
+        handle = self._handles.get(key)
+        if handle is None:
+            name = key.upper()
+            handle = self._handles.get(name)
+            if handle is None:
+                # two threads may build one each, the first stored is the one everybody gets
+                handle = self._handles.setdefault(name, IndexHandle(name, self.get(name)))
+        return handle
+
+    @classmethod
+    def resolve(cls, key : Any) -> IndexHandle:
+        # handle of an index key (or a handle itself), the singleton is not re-entered once built
+        if isinstance(key, IndexHandle):
+            return key
+        registry = cls._instance if cls._instance is not None else cls()
+        return registry.get_handle(key)
 
     def display_all_indices(self) -> pd.DataFrame:
         to_print = []
@@ -48,55 +135,65 @@ class IndexRegistry(Registry):
     
     @classmethod
     def look_up_index_name(cls, index : ql.Index):
-        for k, v in cls._instance._map.items():
-            if index.name() == v.name():
-                return k
-        raise Exception(f'Cannot find index name for {index.name()}.')
+        registry = cls._instance if cls._instance is not None else cls()
+        key = registry._by_ql_name.get(index.name())
+        if key is None:
+            raise Exception(f'Cannot find index name for {index.name()}.')
+        return key
 
 class IndexFixingsManager(Registry):
 
+    ### fixings are held per index in a columnar IndexFixingSeries (sorted serial dates + values)
+    ### csv sources are parsed once into a binary cache that later processes memory-map,
+    ### the cache is opt-in : FIXING_CACHE in config sets its location, without it (or '') the csv files are parsed
+    ### on every load and nothing is written next to the source data
+
     _fixing_path = None
+    _fixing_cache_path = None
 
     def __new__(cls) -> Self:
         if cls._fixing_path is None:
             this_config = get_config()
             cls._fixing_path = this_config['FIXING_SOURCE']
+            cls._fixing_cache_path = this_config.get('FIXING_CACHE') or None
         return super().__new__(cls, 'fixings', 'IndexFixings')
     
     def register(self, key : Any, value : Any) -> None:
         super().register(key, value)
         this_path = os.path.join(self._fixing_path, f'{key.lower()}.csv')
         if os.path.exists(this_path):
-            with open(this_path, newline='') as csv_file:
-                csv_reader = csv.DictReader(csv_file)
-                for this_line in csv_reader:
-                    fixing_date = Date(dt.datetime.strptime(this_line['date'], '%Y-%m-%d').date())
-                    self._map.setdefault(key.upper(), {})[fixing_date] = float(this_line["fixing"])
+            self._set(key.upper(), load_fixing_series(this_path, self._fixing_cache_path))
+        else:
+            self._set(key.upper(), IndexFixingSeries())
+
+    def get_series(self, index : str) -> IndexFixingSeries:
+        return self.get(index.lower())
     
     def insert_fixing(self, index : str, date : Date, fixing : float):
-        this_map = self.get(index.lower())
-        if date in this_map:
-            return
-        else:
-            this_map[date] = fixing
+        self.get_series(index).insert(date.serialNumber(), fixing)
 
     def exist_fixing(self, index : str, date : Date):
-        this_map = self.get(index.lower())
-        return date in this_map
+        return self.get_series(index).contains(date.serialNumber())
 
     def get_fixing(self, index : str, date : Date):
-        this_map = self.get(index.lower())
-        if date in this_map:
-            return this_map[date]
-        else:
+        fixing = self.get_series(index).get(date.serialNumber())
+        if fixing is None:
             raise Exception(f'Cannot find {index} for date {date.ISO()}')
+        return fixing
+
+    def get_fixings(self, index : str, dates) -> Tuple[np.ndarray, np.ndarray]:
+        # vectorized lookup, returns fixings (nan where missing) and the missing mask
+        return self.get_series(index).get_many(to_serials(dates))
+
+    def get_fixings_in_range(self, index : str, start_date : Date, end_date : Date, include_end : Optional[bool]=True) -> Tuple[np.ndarray, np.ndarray]:
+        # serial dates and fixings within [start_date, end_date], e.g., a compounding window
+        return self.get_series(index).range(start_date.serialNumber(), end_date.serialNumber(), include_end)
         
     def remove_fixing(self, index : str, date : Optional[Date]=None):
         if date is None:
             self.erase(index)
         else:
-            this_map : dict = self.get(index)
-            this_map.pop(Date(date))
+            self.get_series(index).remove(Date(date).serialNumber())
 
 
 class DataIdentifierRegistry(Registry):
@@ -106,7 +203,7 @@ class DataIdentifierRegistry(Registry):
 
     def register(self, key : Any, value : Any) -> None:
         super().register(key, value)
-        self._map[key] = value
+        self._set(key, value)
 
 
 ############################################################################################
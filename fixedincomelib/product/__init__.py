@@ -1,6 +1,7 @@
 from fixedincomelib.product.product_interfaces import (Product, ProductBuilderRegistry)
 from fixedincomelib.product.utilities import (LongOrShort, PayOrReceive)
-from fixedincomelib.product.product_portfolio import (ProductPortfolio)
+from fixedincomelib.product.portfolio_index import PortfolioIndex
+from fixedincomelib.product.product_portfolio import (ProductPortfolio, MutableProductPortfolio)
 from fixedincomelib.product.linear_products import (
     ProductBulletCashflow, 
     ProductFixedAccrued,
@@ -8,5 +9,18 @@ from fixedincomelib.product.linear_products import (
     ProductRFRFuture,
     InterestRateStream)
 from fixedincomelib.product.product_display_visitor import ProductDisplayVisitor
+from fixedincomelib.product.product_loader import (
+    register_product_builders,
+    build_product,
+    build_product_list,
+    build_products,
+    deserialize_portfolio)
+register_product_builders()
+from fixedincomelib.product.product_store import (
+    write_product_file,
+    read_product_file,
+    read_product_contents,
+    read_product_table,
+    filter_products)
 # from fixedincomelib.product.product_display_visitor import ProductDisplayVisitor
 # from fixedincomelib.product.product_factory import ProductFactory
\ No newline at end of file
@@ -1,5 +1,7 @@
+import inspect
+import numpy as np
 import pandas as pd
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 import QuantLib as ql
 from fixedincomelib.market.basics import *
 from fixedincomelib.market.registries import IndexRegistry  # , DataConventionRegistry
@@ -14,6 +16,7 @@ from fixedincomelib.market import (
     HolidayConvention,
     # DataConventionRegistry,
     IndexRegistry,
+    IndexHandle,
     # DataConventionRFRFuture,
 )
 from fixedincomelib.product.utilities import LongOrShort, PayOrReceive
@@ -21,12 +24,17 @@ from fixedincomelib.product.product_interfaces import (
     Product,
     ProductVisitor,
     ProductBuilderRegistry,
+    SerialDateAttribute,
 )
 from fixedincomelib.date import (
     Date,
     Period,
     TermOrTerminationDate,
     make_schedule,
+    make_schedule_batch,
+    trade_schedule,
+    trade_schedules,
+    BatchSchedule,
     accrued,
 )
 from fixedincomelib.product.product_portfolio import ProductPortfolio
@@ -34,9 +42,13 @@ from fixedincomelib.product.product_portfolio import ProductPortfolio
 
 class ProductBulletCashflow(Product):
 
+    __slots__ = ("payment_serial_",)
+
     _version = 1
     _product_type = "PRODUCT_BULLET_CASHFLOW"
 
+    paymnet_date_ = SerialDateAttribute("payment_serial_")
+
     def __init__(
         self,
         termination_date: Date,
@@ -67,9 +79,22 @@ class ProductBulletCashflow(Product):
 
 class ProductFixedAccrued(Product):
 
+    __slots__ = (
+        "payment_serial_",
+        "accrual_basis_",
+        "business_day_convention_",
+        "holiday_convention_",
+        "accrued_",
+    )
+
     _version = 1
     _product_type = "PRODUCT_FIXED_ACCRUED"
 
+    # effective / termination dates share the first / last date slots
+    effective_date_ = SerialDateAttribute("first_serial_")
+    termination_date_ = SerialDateAttribute("last_serial_")
+    paymnet_date_ = SerialDateAttribute("payment_serial_")
+
     def __init__(
         self,
         effective_date: Date,
@@ -139,14 +164,27 @@ class ProductFixedAccrued(Product):
 
 class ProductOvernightIndexCashflow(Product):
 
+    __slots__ = (
+        "payment_serial_",
+        "on_index_str_",
+        "on_index_",
+        "compounding_method_",
+        "spread_",
+    )
+
     _version = 1
     _product_type = "PRODUCT_OVERNIGHT_INDEX_CASHFLOW"
 
+    # effective / termination dates share the first / last date slots
+    effective_date_ = SerialDateAttribute("first_serial_")
+    termination_date_ = SerialDateAttribute("last_serial_")
+    paymentDate_ = SerialDateAttribute("payment_serial_")
+
     def __init__(
         self,
         effective_date: Date,
         term_or_termination_date: TermOrTerminationDate,
-        on_index: str,
+        on_index: Union[str, IndexHandle],
         compounding_method: CompoundingMethod,
         spread: float,
         notional: float,
@@ -155,11 +193,10 @@ class ProductOvernightIndexCashflow(Product):
 
         super().__init__()
 
-        # get index
-        self.on_index_str_ = on_index
-        self.on_index_: ql.QuantLib.OvernightIndex = IndexRegistry().get(
-            self.on_index_str_
-        )
+        # get index, builders pass a handle resolved once for all their cashflows
+        handle = IndexRegistry.resolve(on_index)
+        self.on_index_str_ = on_index if isinstance(on_index, str) else handle.name
+        self.on_index_: ql.QuantLib.OvernightIndex = handle.index
         # sort out date
         self.first_date_ = self.effective_date_ = effective_date
         self.termination_date_ = term_or_termination_date.get_date()
@@ -181,7 +218,7 @@ class ProductOvernightIndexCashflow(Product):
         self.long_or_short_ = LongOrShort.LONG if notional >= 0 else LongOrShort.SHORT
         self.compounding_method_ = compounding_method
         self.spread_ = spread
-        self.currency_ = Currency(self.on_index_.currency().code())
+        self.currency_ = handle.currency
 
     @property
     def on_index(self) -> ql.QuantLib.OvernightIndex:
@@ -210,6 +247,16 @@ class ProductOvernightIndexCashflow(Product):
     def accept(self, visitor: ProductVisitor):
         return visitor.visit(self)
 
+    def __getstate__(self) -> dict:
+        # the QuantLib index does not pickle, it is looked up by name again on load
+        slots = Product.__slots__ + ProductOvernightIndexCashflow.__slots__
+        return {k: getattr(self, k) for k in slots if k != "on_index_"}
+
+    def __setstate__(self, state: dict) -> None:
+        for k, v in state.items():
+            setattr(self, k, v)
+        self.on_index_ = IndexRegistry.resolve(self.on_index_str_).index
+
     def serialize(self) -> dict:
         content = {}
         content["VERSION"] = self._version
@@ -357,6 +404,10 @@ class ProductRFRFuture(Product):
 
 class InterestRateStream(ProductPortfolio):
 
+    ### the schedule is kept columnar (int32 serial dates, float64 accruals, see BatchSchedule)
+    ### and portfolio aggregates are read straight off it; cashflow products are only built
+    ### when cashflow(i) / element(i) asks for them, or all upfront unless lazy
+
     def __init__(
         self,
         effective_date: Date,
@@ -367,7 +418,7 @@ class InterestRateStream(ProductPortfolio):
         accrual_basis : AccrualBasis,
         buseinss_day_convention: BusinessDayConvention,
         holiday_convention: HolidayConvention,
-        float_index: Optional[str]=None,
+        float_index: Optional[Union[str, IndexHandle]]=None,
         fixed_rate: Optional[float]=None,
         is_on_index: Optional[bool]=True,
         # has default values
@@ -378,61 +429,185 @@ class InterestRateStream(ProductPortfolio):
         payment_business_day_convention : Optional[BusinessDayConvention]=BusinessDayConvention('F'),
         payment_holiday_convention: Optional[HolidayConvention]=HolidayConvention('USGS'),
         rule: Optional[str]='BACKWARD',
-        end_of_month: Optional[bool]=False):
+        end_of_month: Optional[bool]=False,
+        lazy: Optional[bool]=False,
+        schedule: Optional[BatchSchedule]=None):
 
         if float_index is None and fixed_rate is None:
             raise Exception('Cannot have both floating index and fixed rate invalid.')
+        if float_index and not is_on_index:
+            # TODO : ibor
+            raise Exception('NOT IMPLEMENTED')
+
+        # a schedule generated upfront (see make_schedules) must match the other arguments,
+        # otherwise it comes from the shared schedule cache
+        if schedule is None:
+            schedule = trade_schedule(
+                start_date=effective_date,
+                end_date=termination_date,
+                accrual_period=accrual_period,
+                holiday_convention=holiday_convention,
+                business_day_convention=buseinss_day_convention,
+                accrual_basis=accrual_basis,
+                rule=rule,
+                end_of_month=bool(end_of_month),
+                fix_in_arrear=bool(fixing_in_arrear),
+                payment_offset=payment_offset,
+                payment_business_day_convention=payment_business_day_convention,
+                payment_holiday_convention=payment_holiday_convention)
+        assert schedule.num_trades == 1
+        self.schedule_ = schedule
+
+        # what it takes to build a cashflow later on
+        self.float_index_ = float_index
+        self.fixed_rate_ = fixed_rate
+        self.stream_notional_ = notional
+        self.accrual_basis_ = accrual_basis
+        self.business_day_convention_ = buseinss_day_convention
+        self.holiday_convention_ = holiday_convention
+        self.ois_compounding_ = ois_compounding
+        self.ois_spread_ = ois_spread
+
+        # portfolio aggregates, no cashflow needed
+        Product.__init__(self)
+        self.num_elements_ = self.schedule_.num_periods
+        assert self.num_elements_ != 0
+        self.cashflows_ : List[Optional[Product]] = [None] * self.num_elements_
+        # periods are in date order
+        self.first_date_ = Date.from_serial(int(self.start_dates[0]))
+        self.last_date_ = Date.from_serial(int(self.end_dates[-1]))
+        self.notional_ = notional * self.num_elements_
+        self.long_or_short_ = [LongOrShort.LONG if notional >= 0 else LongOrShort.SHORT] * self.num_elements_
+        if float_index:
+            currency = IndexRegistry.resolve(float_index).currency
+        self.currency_ = [currency]
+
+        if not lazy:
+            for i in range(self.num_elements_):
+                self.cashflow(i)
 
-        schedule = make_schedule(
-            start_date=effective_date, 
-            end_date=termination_date, 
-            accrual_period=accrual_period, 
-            holiday_convention=holiday_convention, 
-            business_day_convention=buseinss_day_convention, 
-            accrual_basis=accrual_basis,
-            rule=rule, 
-            end_of_month=end_of_month,
-            fix_in_arrear=fixing_in_arrear, 
-            payment_offset=payment_offset,
-            payment_business_day_convention=payment_business_day_convention,
-            payment_holiday_convention=payment_holiday_convention)
-        
-        products, weights = [], []
-        for _, row in schedule.iterrows():
-            if float_index:
-                if not is_on_index:
-                    # TODO : ibor
-                    raise Exception('NOT IMPLEMENTED')
-                else:
-                    cf = ProductOvernightIndexCashflow(
-                        row.StartDate,
-                        TermOrTerminationDate(row.EndDate),
-                        float_index, 
-                        ois_compounding, 
-                        ois_spread, 
-                        notional,
-                        row.PaymentDate)
-            else:
-                cf = ProductFixedAccrued(
-                    row.StartDate, 
-                    row.EndDate,
-                    currency,
-                    notional,
-                    accrual_basis,
-                    row.PaymentDate,
-                    buseinss_day_convention,
-                    holiday_convention)
-
-            products.append(cf)
-            weights.append(1.0)
-
-        super().__init__(products, weights)
+    @classmethod
+    def make_schedules(cls, streams: List[dict]) -> List[BatchSchedule]:
+        ### schedules of many streams, through the schedule cache, misses in one make_schedule_batch call
+        ### each entry holds InterestRateStream keyword arguments, schedule i is that of stream i
+        defaults = {k: v.default for k, v in inspect.signature(cls.__init__).parameters.items()}
+        def column(name):
+            return [stream.get(name, defaults[name]) for stream in streams]
+        return trade_schedules(
+            start_dates=column('effective_date'),
+            end_dates=column('termination_date'),
+            accrual_period=column('accrual_period'),
+            holiday_convention=column('holiday_convention'),
+            business_day_convention=column('buseinss_day_convention'),
+            accrual_basis=column('accrual_basis'),
+            rule=column('rule'),
+            end_of_month=[bool(x) for x in column('end_of_month')],
+            fix_in_arrear=[bool(x) for x in column('fixing_in_arrear')],
+            payment_offset=column('payment_offset'),
+            payment_business_day_convention=column('payment_business_day_convention'),
+            payment_holiday_convention=column('payment_holiday_convention'))
+
+    def _build_cashflow(self, i: int) -> Product:
+        start = Date.from_serial(self.start_dates[i])
+        end = Date.from_serial(self.end_dates[i])
+        payment = Date.from_serial(self.payment_dates[i])
+        if self.float_index_:
+            return ProductOvernightIndexCashflow(
+                start,
+                TermOrTerminationDate(end),
+                self.float_index_, 
+                self.ois_compounding_, 
+                self.ois_spread_, 
+                self.stream_notional_,
+                payment)
+        return ProductFixedAccrued(
+            start, 
+            end,
+            self.currency_[0],
+            self.stream_notional_,
+            self.accrual_basis_,
+            payment,
+            self.business_day_convention_,
+            self.holiday_convention_)
 
     def cashflow(self, i: int) -> Product:
-        return self.element(i)
+        assert 0 <= i < self.num_elements_
+        cf = self.cashflows_[i]
+        if cf is None:
+            cf = self._build_cashflow(i)
+            self.cashflows_[i] = cf
+        return cf
     
     def num_cashflows(self) -> int:
         return self.num_elements_
+
+    def element(self, i: int) -> Product:
+        return self.cashflow(i)
+
+    def weight(self, i: int) -> float:
+        assert 0 <= i < self.num_elements_
+        return 1.0
+
+    @property
+    def elements_(self) -> List[Tuple[Product, float]]:
+        # materializes every cashflow, prefer the schedule arrays where possible
+        return [(self.cashflow(i), 1.0) for i in range(self.num_elements_)]
+
+    @property
+    def num_materialized(self) -> int:
+        return sum(cf is not None for cf in self.cashflows_)
+
+    @property
+    def schedule(self) -> BatchSchedule:
+        return self.schedule_
+
+    @property
+    def start_dates(self) -> np.ndarray:
+        return self.schedule_.start_dates
+
+    @property
+    def end_dates(self) -> np.ndarray:
+        return self.schedule_.end_dates
+
+    @property
+    def fixing_dates(self) -> np.ndarray:
+        return self.schedule_.fixing_dates
+
+    @property
+    def payment_dates(self) -> np.ndarray:
+        return self.schedule_.payment_dates
+
+    @property
+    def accrued(self) -> np.ndarray:
+        return self.schedule_.accrued
+
+    @property
+    def cashflow_notionals(self) -> np.ndarray:
+        return np.full(self.num_elements_, self.stream_notional_, dtype=float)
+
+    @property
+    def notional_signs(self) -> np.ndarray:
+        # +1 received, -1 paid
+        return np.full(self.num_elements_, 1. if self.stream_notional_ >= 0 else -1., dtype=float)
+
+    @property
+    def arrays(self) -> dict:
+        # columnar view of the stream, read-only schedule arrays are shared, not copied
+        return {
+            'StartDate' : self.start_dates,
+            'EndDate' : self.end_dates,
+            'PaymentDate' : self.payment_dates,
+            'Accrued' : self.accrued,
+            'NotionalSign' : self.notional_signs}
+
+    def periods(self):
+        # (start, end, fixing, payment) serial dates and accrued of each period, no products built
+        return zip(
+            self.start_dates.tolist(),
+            self.end_dates.tolist(),
+            self.fixing_dates.tolist(),
+            self.payment_dates.tolist(),
+            self.accrued.tolist())
     
 class ProductRFRSwap(Product):
 
@@ -454,12 +629,14 @@ class ProductRFRSwap(Product):
         pay_business_day_convention : Optional[BusinessDayConvention]=BusinessDayConvention('F'),
         pay_holiday_convention : Optional[HolidayConvention]=HolidayConvention('USGS'),
         spread: Optional[float] = 0.0,
-        compounding_method : Optional[CompoundingMethod]=CompoundingMethod.COMPOUND) -> None:
+        compounding_method : Optional[CompoundingMethod]=CompoundingMethod.COMPOUND,
+        build_legs : Optional[bool]=True) -> None:
 
         super().__init__()
 
         self.on_index_str_ = on_index
-        self.on_index_ : ql.QuantLib.OvernightIndex = IndexRegistry().get(self.on_index_str_)
+        self.on_index_handle_ = IndexRegistry.resolve(on_index)
+        self.on_index_ : ql.QuantLib.OvernightIndex = self.on_index_handle_.index
         self.pay_business_day_convention_ = pay_business_day_convention
         self.pay_holiday_convention_ = pay_holiday_convention
         self.first_date_ = self.effective_date_ = effective_date
@@ -473,7 +650,7 @@ class ProductRFRSwap(Product):
                 self.on_index_.businessDayConvention()))
         self.last_date_ = self.termination_date_
         # other attributes
-        self.currency_ = Currency(self.on_index_.currency().code())
+        self.currency_ = self.on_index_handle_.currency
         self.fixed_rate_ = fixed_rate
         self.notional_ = notional
         self.spread_ = spread
@@ -484,32 +661,38 @@ class ProductRFRSwap(Product):
         self.accrual_period_ = accrual_period
         self.floating_leg_accrual_period_ = self.accrual_period_ if floating_leg_accrual_period is None else floating_leg_accrual_period
         self.compounding_method_ = compounding_method
+        self.floating_leg_ = None
+        self.fixed_leg_ = None
+        self.legs_share_schedule_ = False
+        if build_legs:
+            self._build_legs()
+
+    def _leg_arguments(self) -> Tuple[dict, dict]:
+        # InterestRateStream arguments of the floating and the fixed leg
         fixed_leg_sign = 1. if self.pay_or_rec_ == PayOrReceive.PAY else -1.
-
-        # floating leg
-        self.floating_leg_ = InterestRateStream(
+        floating_leg = dict(
             effective_date=self.effective_date_,
             termination_date=self.termination_date_,
             accrual_period=self.floating_leg_accrual_period_,
             notional=self.notional_ * fixed_leg_sign * -1.,
-            currency=Currency(self.on_index_.currency().code()),
+            currency=self.on_index_handle_.currency,
             accrual_basis=self.accrual_basis_,
             buseinss_day_convention=self.pay_business_day_convention_, # not the best
-            holiday_convention=HolidayConvention(self.on_index_.fixingCalendar().name()),
-            float_index=on_index,
+            holiday_convention=self.on_index_handle_.fixing_holiday_convention,
+            float_index=self.on_index_handle_,
             ois_compounding=self.compounding_method_,
-            ois_spread=spread,
+            ois_spread=self.spread_,
             fixing_in_arrear=True,
             payment_offset=self.pay_offset_,
             payment_business_day_convention=self.pay_business_day_convention_,
-            payment_holiday_convention=self.pay_holiday_convention_)
-        # fixed leg
-        self.fixed_leg_ = InterestRateStream(
+            payment_holiday_convention=self.pay_holiday_convention_,
+            lazy=True)
+        fixed_leg = dict(
             effective_date=self.effective_date_,
             termination_date=self.termination_date_,
             accrual_period=self.accrual_period_,
             notional=self.notional_ * fixed_leg_sign,
-            currency=Currency(self.on_index_.currency().code()),
+            currency=self.on_index_handle_.currency,
             accrual_basis=self.accrual_basis_,
             buseinss_day_convention=self.pay_business_day_convention_,
             holiday_convention=self.pay_holiday_convention_,
@@ -517,8 +700,61 @@ class ProductRFRSwap(Product):
             is_on_index=False,
             payment_offset=self.pay_offset_,
             payment_business_day_convention=self.pay_business_day_convention_,
-            payment_holiday_convention=self.pay_holiday_convention_)
+            payment_holiday_convention=self.pay_holiday_convention_,
+            lazy=True)
+        return floating_leg, fixed_leg
+
+    @staticmethod
+    def _legs_share_schedule(floating_leg: dict, fixed_leg: dict) -> bool:
+        # both legs have the same dates and payment conventions (see _leg_arguments),
+        # only the accrual period and the holiday convention may differ
+        floating_period, fixed_period = floating_leg['accrual_period'], fixed_leg['accrual_period']
+        return floating_period.length() == fixed_period.length() \
+            and floating_period.units() == fixed_period.units() \
+            and floating_leg['holiday_convention'].value_str.upper() == fixed_leg['holiday_convention'].value_str.upper()
+
+    def _build_legs(self, schedules: Optional[Tuple[BatchSchedule, BatchSchedule]]=(None, None)) -> None:
+        ### a schedule common to both legs is generated once and held by both
+        floating_leg, fixed_leg = self._leg_arguments()
+        self.legs_share_schedule_ = self._legs_share_schedule(floating_leg, fixed_leg)
+        self.floating_leg_ = InterestRateStream(schedule=schedules[0], **floating_leg)
+        fixed_schedule = self.floating_leg_.schedule if self.legs_share_schedule_ else schedules[1]
+        self.fixed_leg_ = InterestRateStream(schedule=fixed_schedule, **fixed_leg)
+
+    @classmethod
+    def build_legs_batch(cls, swaps: List['ProductRFRSwap']) -> None:
+        ### legs of swaps created with build_legs=False, every distinct schedule generated once
+        if len(swaps) == 0:
+            return
+        arguments = [swap._leg_arguments() for swap in swaps]
+        shared = [cls._legs_share_schedule(*a) for a in arguments]
+        streams = [a[0] for a in arguments] + [a[1] for a, s in zip(arguments, shared) if not s]
+        schedules = InterestRateStream.make_schedules(streams)
+        fixed = iter(schedules[len(swaps):])
+        for i, swap in enumerate(swaps):
+            swap._build_legs((schedules[i], schedules[i] if shared[i] else next(fixed)))
     
+    @property
+    def floating_leg(self) -> InterestRateStream:
+        return self.floating_leg_
+
+    @property
+    def fixed_leg(self) -> InterestRateStream:
+        return self.fixed_leg_
+
+    @property
+    def legs_share_schedule(self) -> bool:
+        return self.legs_share_schedule_
+
+    @property
+    def floating_leg_arrays(self) -> dict:
+        # StartDate, EndDate, PaymentDate (serials), Accrued and NotionalSign of each floating period
+        return self.floating_leg_.arrays
+
+    @property
+    def fixed_leg_arrays(self) -> dict:
+        return self.fixed_leg_.arrays
+
     def floating_leg_cash_flow(self, i: int) -> Product:
         assert 0 <= i < self.floating_leg_.num_cashflows()
         return self.floating_leg_.element(i)
@@ -585,6 +821,18 @@ class ProductRFRSwap(Product):
     
     def accept(self, visitor: ProductVisitor):
         return visitor.visit(self)
+
+    def __getstate__(self) -> dict:
+        # as for the cashflows, the QuantLib index is looked up by name again on load
+        state = {k: getattr(self, k) for k in Product.__slots__}
+        state.update(self.__dict__)
+        state.pop('on_index_')
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        for k, v in state.items():
+            setattr(self, k, v)
+        self.on_index_ = IndexRegistry.resolve(self.on_index_str_).index
     
     def serialize(self) -> dict:
         content = {}
@@ -610,7 +858,7 @@ class ProductRFRSwap(Product):
         return content
 
     @classmethod
-    def deserialize(cls, input_dict) -> 'ProductRFRFuture':
+    def deserialize(cls, input_dict, build_legs: Optional[bool]=True) -> 'ProductRFRFuture':
         effective_date = Date(input_dict['EFFECTIVE_DATE'])
         term_or_termination_date = TermOrTerminationDate(input_dict['TERM_OR_TERMINATION_DATE'])
         pay_offset = Period(input_dict['PAYMENT_OFFSET'])
@@ -639,5 +887,13 @@ class ProductRFRSwap(Product):
             pay_business_day_convention,
             pay_holiday_convention,
             spread,
-            compounding_method)
+            compounding_method,
+            build_legs)
+
+    @classmethod
+    def deserialize_many(cls, input_dicts: List[dict]) -> List['ProductRFRSwap']:
+        # as deserialize, with the leg schedules of all swaps generated together
+        swaps = [cls.deserialize(input_dict, build_legs=False) for input_dict in input_dicts]
+        cls.build_legs_batch(swaps)
+        return swaps
 
@@ -0,0 +1,118 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+from fixedincomelib.date import Date
+from fixedincomelib.product.product_interfaces import Product
+
+### secondary indexes over portfolio elements
+### elements are identified by a key, the position in a ProductPortfolio or the handle in a MutableProductPortfolio
+###   1) hash indexes : currency code, overnight index name, product type -> set of keys
+###   2) sorted index : (last date serial, key), range queries by bisection
+### add / remove keep them current, so nothing is rescanned between queries
+
+def _currency_codes(product : Product) -> List[str]:
+    currency = product.currency
+    currencies = currency if isinstance(currency, list) else [currency]
+    return sorted({c.value_str.upper() for c in currencies if c is not None})
+
+def _index_name(product : Product) -> str:
+    return str(getattr(product, 'on_index_str_', '') or '').upper()
+
+class PortfolioIndex:
+
+    def __init__(self) -> None:
+        self.by_currency_ : Dict[str, Set[Hashable]] = {}
+        self.by_index_ : Dict[str, Set[Hashable]] = {}
+        self.by_product_type_ : Dict[str, Set[Hashable]] = {}
+        self.by_last_date_ : List[Tuple[int, Hashable]] = []
+        self.last_dates_ : Dict[Hashable, int] = {}
+
+    @classmethod
+    def from_products(cls, keys : List[Hashable], products : List[Product]) -> 'PortfolioIndex':
+        obj = cls()
+        for key, product in zip(keys, products):
+            obj._add_hashed(key, product)
+        # one sort rather than n insertions
+        obj.by_last_date_ = sorted((obj.last_dates_[k], k) for k in keys)
+        return obj
+
+    def __len__(self) -> int:
+        return len(self.last_dates_)
+
+    def _add_hashed(self, key : Hashable, product : Product) -> None:
+        if key in self.last_dates_:
+            raise KeyError(f'Key {key} is already indexed.')
+        for code in _currency_codes(product):
+            self.by_currency_.setdefault(code, set()).add(key)
+        self.by_index_.setdefault(_index_name(product), set()).add(key)
+        self.by_product_type_.setdefault(product.product_type, set()).add(key)
+        self.last_dates_[key] = product.last_date.serialNumber()
+
+    def add(self, key : Hashable, product : Product) -> None:
+        self._add_hashed(key, product)
+        insort(self.by_last_date_, (self.last_dates_[key], key))
+
+    def remove(self, key : Hashable, product : Product) -> None:
+        if key not in self.last_dates_:
+            raise KeyError(f'Key {key} is not indexed.')
+        for this_map, values in [
+            (self.by_currency_, _currency_codes(product)),
+            (self.by_index_, [_index_name(product)]),
+            (self.by_product_type_, [product.product_type])]:
+            for value in values:
+                keys = this_map[value]
+                keys.discard(key)
+                if len(keys) == 0:
+                    del this_map[value]
+        serial = self.last_dates_.pop(key)
+        pos = bisect_left(self.by_last_date_, (serial, key))
+        del self.by_last_date_[pos]
+
+    @property
+    def currencies(self) -> List[str]:
+        return sorted(self.by_currency_.keys())
+
+    @property
+    def indices(self) -> List[str]:
+        return sorted(k for k in self.by_index_.keys() if k != '')
+
+    @property
+    def product_types(self) -> List[str]:
+        return sorted(self.by_product_type_.keys())
+
+    def query(
+        self,
+        currency : Optional[str]=None,
+        index : Optional[str]=None,
+        product_type : Optional[str]=None,
+        maturity_from : Optional[Date]=None,
+        maturity_to : Optional[Date]=None) -> List[Hashable]:
+
+        ### sorted keys of the elements matching every given criterion, maturity bounds are inclusive
+        ### cost is driven by the smallest hash bucket or maturity slice, not by the portfolio size
+        buckets = []
+        for this_map, value in [
+            (self.by_currency_, currency),
+            (self.by_index_, index),
+            (self.by_product_type_, product_type)]:
+            if value is not None:
+                buckets.append(this_map.get(value.upper(), set()))
+        lo_serial = None if maturity_from is None else Date(maturity_from).serialNumber()
+        hi_serial = None if maturity_to is None else Date(maturity_to).serialNumber()
+        lo = 0 if lo_serial is None else bisect_left(self.by_last_date_, (lo_serial,))
+        hi = len(self.by_last_date_) if hi_serial is None else bisect_right(self.by_last_date_, (hi_serial + 1,))
+
+        if len(buckets) == 0:
+            return sorted(k for _, k in self.by_last_date_[lo : hi])
+        buckets.sort(key=len)
+        if (lo_serial is not None or hi_serial is not None) and max(hi - lo, 0) < len(buckets[0]):
+            # the maturity slice is the narrowest criterion
+            return sorted(k for _, k in self.by_last_date_[lo : hi] if all(k in b for b in buckets))
+        res = []
+        for k in buckets[0]:
+            if not all(k in b for b in buckets[1:]):
+                continue
+            serial = self.last_dates_[k]
+            if (lo_serial is not None and serial < lo_serial) or (hi_serial is not None and serial > hi_serial):
+                continue
+            res.append(k)
+        return sorted(res)
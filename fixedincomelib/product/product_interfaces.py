@@ -13,16 +13,39 @@ class ProductBuilderRegistry(Registry):
 
     def register(self, key : Any, value : Any) -> None:
         super().register(key, value)
-        self._map[key] = value
+        self._set(key, value)
 
 class ProductVisitor(metaclass=ABCMeta):
     pass
 
+class SerialDateAttribute:
+
+    ### Date-valued attribute kept as its QuantLib serial number in a slot,
+    ### so products do not each hold several SWIG Date objects; reads return a fresh Date
+
+    def __init__(self, slot : str) -> None:
+        self.slot_ = slot
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        serial = getattr(obj, self.slot_)
+        return None if serial is None else Date.from_serial(serial)
+
+    def __set__(self, obj, value) -> None:
+        setattr(obj, self.slot_, None if value is None else value.serialNumber())
+
 class Product(metaclass=ABCMeta):
     
+    ### leaf products declare __slots__ (no per-instance __dict__), containers may not
+    __slots__ = ('first_serial_', 'last_serial_', 'notional_', 'long_or_short_', 'currency_')
+
     _version = -1
     _product_type = ''
 
+    first_date_ = SerialDateAttribute('first_serial_')
+    last_date_ = SerialDateAttribute('last_serial_')
+
     def __init__(self) -> None:
         self.first_date_ = None
         self.last_date_ = None
@@ -0,0 +1,130 @@
+import os, time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+import pandas as pd
+from fixedincomelib.product.product_interfaces import Product, ProductBuilderRegistry
+from fixedincomelib.product.product_portfolio import ProductPortfolio
+from fixedincomelib.product.linear_products import (
+    ProductOvernightIndexCashflow,
+    ProductRFRFuture,
+    ProductRFRSwap)
+
+### builders by product type, plus the <type>_DES alias used by qfReadProductFromFile
+### and <type>_BATCH for products that build many at once (deserialize_many)
+
+_buildable_products = [
+    ProductOvernightIndexCashflow,
+    ProductRFRFuture,
+    ProductRFRSwap,
+    ProductPortfolio]
+
+def register_product_builders() -> None:
+    # idempotent, also run in every pool worker
+    registry = ProductBuilderRegistry()
+    for product_cls in _buildable_products:
+        for key in [product_cls._product_type, f'{product_cls._product_type}_DES']:
+            if not registry.exists(key):
+                registry.register(key, product_cls.deserialize)
+        batch_key = f'{product_cls._product_type}_BATCH'
+        if hasattr(product_cls, 'deserialize_many') and not registry.exists(batch_key):
+            registry.register(batch_key, product_cls.deserialize_many)
+
+def build_product(content : dict) -> Product:
+    return ProductBuilderRegistry().get(content['TYPE'])(content)
+
+def build_product_list(contents : List[dict]) -> List[Product]:
+    # same as build_product on each, products of one type go through their batch builder if any
+    registry = ProductBuilderRegistry()
+    by_type = {}
+    for i, content in enumerate(contents):
+        by_type.setdefault(content['TYPE'], []).append(i)
+    products = [None] * len(contents)
+    for prod_type, members in by_type.items():
+        batch_key = f'{prod_type}_BATCH'
+        if registry.exists(batch_key):
+            built = registry.get(batch_key)([contents[i] for i in members])
+        else:
+            func = registry.get(prod_type)
+            built = [func(contents[i]) for i in members]
+        for i, product in zip(members, built):
+            products[i] = product
+    return products
+
+### parallel construction
+### serialized elements are cut into contiguous chunks and built in a process pool;
+### workers re-create the registries (indices, builders) from the parent's working directory,
+### built products come back pickled (QuantLib handles are re-resolved by name) and are
+### put back in their original order
+
+_timing_columns = ['Chunk', 'First', 'Size', 'Worker', 'BuildSeconds', 'WallSeconds']
+
+def _init_worker(cwd : str) -> None:
+    # registries read their static files relative to the working directory
+    os.chdir(cwd)
+    register_product_builders()
+
+def _build_chunk(chunk_id : int, contents : List[dict]) -> Tuple[int, List[Product], int, float]:
+    start = time.perf_counter()
+    products = build_product_list(contents)
+    return chunk_id, products, os.getpid(), time.perf_counter() - start
+
+def build_products(
+        contents : List[dict],
+        num_workers : Optional[int]=None,
+        chunk_size : Optional[int]=None,
+        mp_context : Optional[str]=None) -> Tuple[List[Product], pd.DataFrame]:
+
+    ### builds products from serialized contents, returns them in input order with a per-chunk timing report
+    ### num_workers defaults to the cpu count, 1 builds in this process;
+    ### chunk_size defaults to about four chunks per worker
+
+    num_workers = (os.cpu_count() or 1) if num_workers is None else num_workers
+    n = len(contents)
+    if chunk_size is None:
+        chunk_size = max(1, -(-n // (4 * max(num_workers, 1))))
+    assert chunk_size > 0
+    chunks = [(i, contents[first : first + chunk_size]) for i, first in enumerate(range(0, n, chunk_size))]
+
+    results = {}
+    timings = []
+    if num_workers <= 1 or len(chunks) <= 1:
+        register_product_builders()
+        for chunk_id, chunk in chunks:
+            wall = time.perf_counter()
+            _, products, pid, seconds = _build_chunk(chunk_id, chunk)
+            results[chunk_id] = products
+            timings.append([chunk_id, chunk_id * chunk_size, len(chunk), pid, seconds, time.perf_counter() - wall])
+    else:
+        context = mp.get_context(mp_context)
+        with ProcessPoolExecutor(
+            max_workers=min(num_workers, len(chunks)),
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(os.getcwd(),)) as pool:
+            submitted = {}
+            for chunk_id, chunk in chunks:
+                future = pool.submit(_build_chunk, chunk_id, chunk)
+                submitted[future] = (chunk_id, len(chunk), time.perf_counter())
+            for future in as_completed(submitted):
+                chunk_id, size, wall = submitted[future]
+                _, products, pid, seconds = future.result()
+                results[chunk_id] = products
+                # wall time includes queueing and shipping the products back
+                timings.append([chunk_id, chunk_id * chunk_size, size, pid, seconds, time.perf_counter() - wall])
+
+    products = [product for chunk_id, _ in chunks for product in results[chunk_id]]
+    report = pd.DataFrame(sorted(timings), columns=_timing_columns)
+    return products, report
+
+def deserialize_portfolio(
+        input_dict : dict,
+        num_workers : Optional[int]=None,
+        chunk_size : Optional[int]=None,
+        mp_context : Optional[str]=None) -> Tuple[ProductPortfolio, pd.DataFrame]:
+
+    ### same as ProductPortfolio.deserialize, with the elements built in a process pool
+    assert 'WEIGHTS' in input_dict
+    contents = [v for k, v in input_dict.items() if k not in ['VERSION', 'TYPE', 'WEIGHTS']]
+    products, report = build_products(contents, num_workers, chunk_size, mp_context)
+    return ProductPortfolio(products, input_dict['WEIGHTS']), report
@@ -1,6 +1,10 @@
-from typing import List, Optional, Tuple
+import heapq
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from fixedincomelib.date import Date
 from fixedincomelib.product.product_interfaces import (
     Product, ProductBuilderRegistry)
+from fixedincomelib.product.portfolio_index import PortfolioIndex
 
 class ProductPortfolio(Product):
     
@@ -15,7 +19,7 @@ class ProductPortfolio(Product):
         self.num_elements_ = len(products)
         assert self.num_elements_ != 0
         if weights is None:
-            weights = [1.0] * self.num_products
+            weights = [1.0] * self.num_elements_
         assert len(weights) == len(products)
         self.elements_: List[Tuple[Product, float]] = \
             list(zip(products, weights))
@@ -31,11 +35,35 @@ class ProductPortfolio(Product):
                 self.first_date_ = product.first_date
             if product.last_date >= self.last_date:
                 self.last_date_ = product.last_date
-            ccys.add(product.currency)
+            # nested portfolios and streams carry a list
+            currency = product.currency
+            ccys.update(currency if isinstance(currency, list) else [currency])
             self.long_or_short_.append(product.long_or_short)
             self.notional_ += product.notional * weight
         self.currency_ = list(ccys)
 
+    @classmethod
+    def from_aggregates(
+        cls,
+        elements: List[Tuple[Product, float]],
+        first_date: Date,
+        last_date: Date,
+        currency: list,
+        long_or_short: list,
+        notional: float) -> 'ProductPortfolio':
+        # adopts aggregates kept elsewhere (e.g., MutableProductPortfolio), no scan
+        assert len(elements) != 0
+        obj = cls.__new__(cls)
+        Product.__init__(obj)
+        obj.num_elements_ = len(elements)
+        obj.elements_ = elements
+        obj.first_date_ = first_date
+        obj.last_date_ = last_date
+        obj.currency_ = currency
+        obj.long_or_short_ = long_or_short
+        obj.notional_ = notional
+        return obj
+
     @property
     def num_elemnts(self):
         return self.num_elements_
@@ -48,6 +76,33 @@ class ProductPortfolio(Product):
         assert 0 <= i < self.num_elemnts
         return self.elements_[i][1]
 
+    @property
+    def portfolio_index(self) -> PortfolioIndex:
+        # built on first use, elements are keyed by position
+        if getattr(self, 'portfolio_index_', None) is None:
+            positions = list(range(self.num_elemnts))
+            self.portfolio_index_ = PortfolioIndex.from_products(positions, [self.element(i) for i in positions])
+        return self.portfolio_index_
+
+    def query(
+        self,
+        currency: Optional[str]=None,
+        index: Optional[str]=None,
+        product_type: Optional[str]=None,
+        maturity_from: Optional[Date]=None,
+        maturity_to: Optional[Date]=None) -> List[int]:
+        # positions of the matching elements, see PortfolioIndex.query
+        return self.portfolio_index.query(currency, index, product_type, maturity_from, maturity_to)
+
+    def sub_portfolio(self, positions: List[int]) -> 'ProductPortfolio':
+        if len(positions) == 0:
+            raise Exception('Cannot build an empty portfolio.')
+        return ProductPortfolio([self.element(i) for i in positions], [self.weight(i) for i in positions])
+
+    def select(self, **criteria) -> 'ProductPortfolio':
+        # matching elements with their weights, criteria as in query
+        return self.sub_portfolio(self.query(**criteria))
+
     def accept(self, visitor):
         return visitor.visit(self)
 
@@ -65,7 +120,12 @@ class ProductPortfolio(Product):
         return content
 
     @classmethod
-    def deserialize(cls, input_dict) -> 'Product':
+    def deserialize(cls, input_dict, num_workers: Optional[int]=1) -> 'Product':
+        # see product_loader, imported here as it depends on the concrete products
+        from fixedincomelib.product.product_loader import build_product_list, deserialize_portfolio
+        if num_workers != 1:
+            # elements built in a process pool
+            return deserialize_portfolio(input_dict, num_workers)[0]
         input_dict_ = input_dict.copy()
         assert 'VERSION' in input_dict_
         version = input_dict_['VERSION']
@@ -76,10 +136,171 @@ class ProductPortfolio(Product):
         assert 'WEIGHTS' in input_dict_
         weights = input_dict_['WEIGHTS']
         input_dict_.pop('WEIGHTS')
-        prod_list = []
-        for k, v in input_dict_.items():
-            func = ProductBuilderRegistry().get(v['TYPE'])
-            prod = func(v)
-            prod_list.append(prod)
+        # products of one type are built together where they support it
+        prod_list = build_product_list(list(input_dict_.values()))
         return cls(prod_list, weights)
-    
\ No newline at end of file
+    
+
+class MutableProductPortfolio(Product):
+
+    ### portfolio under construction / maintenance, elements are addressed by the handle add() returns
+    ### aggregates are kept up to date on every change instead of rescanning:
+    ###   1) first / last date from min-heaps of serial numbers, removed entries are dropped lazily
+    ###   2) currencies from a counter, a currency goes when its count reaches zero
+    ###   3) weighted notional as a running sum
+    ### add is O(log n), remove / reweight O(1), the dates O(1) amortized;
+    ### freeze() hands the aggregates to a ProductPortfolio (insertion order) without a rescan
+
+    _version = 1
+    _product_type = 'PRODUCT_MUTABLE_PORTFOLIO'
+
+    def __init__(self,
+                 products: Optional[List[Product]]=None,
+                 weights: Optional[List[float]]=None):
+
+        super().__init__()
+        self.elements_: Dict[int, Tuple[Product, float]] = {}
+        self.next_handle_ = 0
+        self.first_heap_ : List[Tuple[int, int]] = []
+        self.last_heap_ : List[Tuple[int, int]] = []
+        self.currency_count_ = Counter()
+        self.notional_ = 0.
+        self.portfolio_index_ : Optional[PortfolioIndex] = None
+        products = [] if products is None else products
+        weights = [1.0] * len(products) if weights is None else weights
+        assert len(weights) == len(products)
+        for product, weight in zip(products, weights):
+            self.add(product, weight)
+
+    @classmethod
+    def from_portfolio(cls, portfolio: ProductPortfolio) -> 'MutableProductPortfolio':
+        return cls(
+            [portfolio.element(i) for i in range(portfolio.num_elemnts)],
+            [portfolio.weight(i) for i in range(portfolio.num_elemnts)])
+
+    @staticmethod
+    def _currencies(product: Product) -> list:
+        currency = product.currency
+        return currency if isinstance(currency, list) else [currency]
+
+    def add(self, product: Product, weight: Optional[float]=1.0) -> int:
+        handle = self.next_handle_
+        self.next_handle_ += 1
+        self.elements_[handle] = (product, weight)
+        heapq.heappush(self.first_heap_, (product.first_date.serialNumber(), handle))
+        heapq.heappush(self.last_heap_, (-product.last_date.serialNumber(), handle))
+        self.currency_count_.update(self._currencies(product))
+        self.notional_ += product.notional * weight
+        if self.portfolio_index_ is not None:
+            self.portfolio_index_.add(handle, product)
+        return handle
+
+    def remove(self, handle: int) -> Tuple[Product, float]:
+        if handle not in self.elements_:
+            raise KeyError(f'No element with handle {handle}.')
+        product, weight = self.elements_.pop(handle)
+        # heap entries of this handle are now stale and dropped when they surface
+        for currency in self._currencies(product):
+            self.currency_count_[currency] -= 1
+            if self.currency_count_[currency] == 0:
+                del self.currency_count_[currency]
+        self.notional_ -= product.notional * weight
+        if self.portfolio_index_ is not None:
+            self.portfolio_index_.remove(handle, product)
+        if len(self.first_heap_) > 2 * len(self.elements_) + 16:
+            self._compact()
+        return product, weight
+
+    def reweight(self, handle: int, weight: float) -> None:
+        if handle not in self.elements_:
+            raise KeyError(f'No element with handle {handle}.')
+        product, old_weight = self.elements_[handle]
+        self.elements_[handle] = (product, weight)
+        self.notional_ += product.notional * (weight - old_weight)
+
+    def _compact(self) -> None:
+        self.first_heap_ = [x for x in self.first_heap_ if x[1] in self.elements_]
+        self.last_heap_ = [x for x in self.last_heap_ if x[1] in self.elements_]
+        heapq.heapify(self.first_heap_)
+        heapq.heapify(self.last_heap_)
+
+    def _heap_top(self, heap: List[Tuple[int, int]]) -> Optional[int]:
+        while heap and heap[0][1] not in self.elements_:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    @property
+    def num_elements(self) -> int:
+        return len(self.elements_)
+
+    def __len__(self) -> int:
+        return len(self.elements_)
+
+    def __contains__(self, handle: int) -> bool:
+        return handle in self.elements_
+
+    @property
+    def handles(self) -> List[int]:
+        return list(self.elements_.keys())
+
+    def element(self, handle: int) -> Product:
+        return self.elements_[handle][0]
+
+    def weight(self, handle: int) -> float:
+        return self.elements_[handle][1]
+
+    @property
+    def first_date(self) -> Optional[Date]:
+        serial = self._heap_top(self.first_heap_)
+        return None if serial is None else Date.from_serial(serial)
+
+    @property
+    def last_date(self) -> Optional[Date]:
+        serial = self._heap_top(self.last_heap_)
+        return None if serial is None else Date.from_serial(-serial)
+
+    @property
+    def currency(self) -> list:
+        return list(self.currency_count_.keys())
+
+    @property
+    def long_or_short(self) -> list:
+        return [product.long_or_short for product, _ in self.elements_.values()]
+
+    @property
+    def portfolio_index(self) -> PortfolioIndex:
+        # built on first use, then kept current by add / remove
+        if self.portfolio_index_ is None:
+            handles = self.handles
+            self.portfolio_index_ = PortfolioIndex.from_products(handles, [self.element(h) for h in handles])
+        return self.portfolio_index_
+
+    def query(
+        self,
+        currency: Optional[str]=None,
+        index: Optional[str]=None,
+        product_type: Optional[str]=None,
+        maturity_from: Optional[Date]=None,
+        maturity_to: Optional[Date]=None) -> List[int]:
+        # handles of the matching elements, see PortfolioIndex.query
+        return self.portfolio_index.query(currency, index, product_type, maturity_from, maturity_to)
+
+    def select(self, **criteria) -> ProductPortfolio:
+        handles = self.query(**criteria)
+        if len(handles) == 0:
+            raise Exception('Cannot build an empty portfolio.')
+        return ProductPortfolio([self.element(h) for h in handles], [self.weight(h) for h in handles])
+
+    def accept(self, visitor):
+        return visitor.visit(self)
+
+    def freeze(self) -> ProductPortfolio:
+        if len(self.elements_) == 0:
+            raise Exception('Cannot freeze an empty portfolio.')
+        return ProductPortfolio.from_aggregates(
+            list(self.elements_.values()),
+            self.first_date,
+            self.last_date,
+            self.currency,
+            self.long_or_short,
+            self.notional_)
@@ -0,0 +1,320 @@
+import json, zipfile
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+from fixedincomelib.date import Date
+from fixedincomelib.product.product_interfaces import Product
+from fixedincomelib.product.product_portfolio import ProductPortfolio
+from fixedincomelib.product.portfolio_index import PortfolioIndex
+from fixedincomelib.product.product_loader import build_product_list, build_products
+
+### columnar product file (numpy .npz, uncompressed)
+### the serialized elements of a portfolio (or a single product) are stored as one table per
+### (_product_type, _version), one column per serialize() key:
+###   1) numbers (float64 / int64 / bool) as they are
+###   2) strings dictionary-encoded, int32 codes plus a categories array
+###   3) anything else (lists, nested dicts) as json strings, dictionary-encoded as well
+### every table also carries per-trade filter columns, so subsets are selected before any product is built
+###   __POSITION__ (element position), __WEIGHT__, __FIRST_DATE__ / __LAST_DATE__ (serial numbers),
+###   __CURRENCY__ (codes, comma separated) and __INDEX__ (overnight index, '' if none)
+### nested portfolios are flattened : every row is a node (__NODE__, numbered depth first) under its __PARENT__
+### (-1 for the top level), a portfolio row only holds the filter columns and its elements follow as rows of
+### their own, __POSITION__ / __WEIGHT__ being within the parent; filters select top level elements only
+### array names are <table>/<column>, the layout sits as json under __format__
+
+_format_name = 'FIXEDINCOMELIB_COLUMNAR'
+_format_version = 2
+_meta_key = '__format__'
+_content_keys = ['VERSION', 'TYPE']
+
+def _table_name(prod_type : str, version : int) -> str:
+    return f'{prod_type}_V{version}'
+
+def _currency_codes(product : Product) -> str:
+    currency = product.currency
+    currencies = currency if isinstance(currency, list) else [currency]
+    return ','.join(sorted(c.value_str for c in currencies if c is not None))
+
+def _encode_categories(values : List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    categories, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return codes.reshape(-1).astype(np.int32), categories
+
+def _encode_column(values : list) -> Tuple[str, Dict[str, np.ndarray]]:
+    if all(isinstance(v, bool) for v in values):
+        return 'bool', {'' : np.asarray(values, dtype=bool)}
+    if all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in values):
+        return 'int64', {'' : np.asarray(values, dtype=np.int64)}
+    if all(isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool) for v in values):
+        return 'float64', {'' : np.asarray(values, dtype=np.float64)}
+    if all(isinstance(v, str) for v in values):
+        encoding, values_ = 'category', values
+    else:
+        encoding, values_ = 'json', [json.dumps(v) for v in values]
+    codes, categories = _encode_categories(values_)
+    return encoding, {'' : codes, '/categories' : categories}
+
+def _decode_column(encoding : str, read, name : str, rows : np.ndarray) -> list:
+    values = read(name)[rows]
+    if encoding in ['category', 'json']:
+        decoded = read(f'{name}/categories')[values].tolist()
+        return [json.loads(v) for v in decoded] if encoding == 'json' else decoded
+    return values.tolist()
+
+def _check_writable(product : Product) -> None:
+    if isinstance(product, ProductPortfolio) and type(product) is not ProductPortfolio:
+        # e.g., an InterestRateStream serializes as a plain portfolio and would not come back as itself
+        raise Exception(f'{type(product).__name__} cannot be written to a product file, write a ProductPortfolio of it instead.')
+
+def write_product_file(product : Product, path : str) -> None:
+
+    ### portfolio elements (or the product itself) go to their type / version table, nested portfolios flattened
+    _check_writable(product)
+    if type(product) is ProductPortfolio:
+        elements = [(product.element(i), product.weight(i)) for i in range(product.num_elemnts)]
+    else:
+        elements = [(product, 1.0)]
+
+    tables = {}
+    num_nodes = 0
+    # (parent, position, element, weight), depth first so a parent is numbered before its elements
+    stack = [(-1, position, element, weight) for position, (element, weight) in reversed(list(enumerate(elements)))]
+    while stack:
+        parent, position, element, weight = stack.pop()
+        _check_writable(element)
+        node = num_nodes
+        num_nodes += 1
+        if type(element) is ProductPortfolio:
+            content = {'TYPE' : element._product_type, 'VERSION' : element._version}
+            stack.extend((node, i, element.element(i), element.weight(i)) for i in reversed(range(element.num_elemnts)))
+        else:
+            content = element.serialize()
+        name = _table_name(content['TYPE'], content['VERSION'])
+        table = tables.setdefault(name, {'TYPE' : content['TYPE'], 'VERSION' : content['VERSION'], 'rows' : []})
+        filters = {
+            '__NODE__' : node,
+            '__PARENT__' : parent,
+            '__POSITION__' : position,
+            '__WEIGHT__' : float(weight),
+            '__FIRST_DATE__' : element.first_date.serialNumber(),
+            '__LAST_DATE__' : element.last_date.serialNumber(),
+            '__CURRENCY__' : _currency_codes(element),
+            '__INDEX__' : str(getattr(element, 'on_index_str_', '') or '').upper()}
+        table['rows'].append((filters, {k : v for k, v in content.items() if k not in _content_keys}))
+
+    arrays = {}
+    layout = {}
+    for name, table in tables.items():
+        rows = table['rows']
+        columns = list(dict.fromkeys(k for _, content in rows for k in content))
+        encodings = {}
+        for column in list(rows[0][0].keys()) + columns:
+            if column.startswith('__'):
+                values = [filters[column] for filters, _ in rows]
+            else:
+                if any(column not in content for _, content in rows):
+                    raise Exception(f'{name} : column {column} is missing for some trades.')
+                values = [content[column] for _, content in rows]
+            encoding, parts = _encode_column(values)
+            encodings[column] = encoding
+            for suffix, array in parts.items():
+                arrays[f'{name}/{column}{suffix}'] = array
+        layout[name] = {
+            'TYPE' : table['TYPE'],
+            'VERSION' : table['VERSION'],
+            'NUM_ROWS' : len(rows),
+            'COLUMNS' : encodings}
+
+    meta = {
+        'FORMAT' : _format_name,
+        'FORMAT_VERSION' : _format_version,
+        'ROOT_TYPE' : product._product_type,
+        'ROOT_VERSION' : product._version,
+        'NUM_ELEMENTS' : len(elements),
+        'NUM_NODES' : num_nodes,
+        'TABLES' : layout}
+    arrays[_meta_key] = np.array(json.dumps(meta))
+    with open(path, 'wb') as handle:
+        np.savez(handle, **arrays)
+
+def is_product_file(path : str) -> bool:
+    return zipfile.is_zipfile(path)
+
+def read_product_layout(path : str) -> dict:
+    with np.load(path, allow_pickle=False) as data:
+        return _read_meta(data)
+
+def _read_meta(data) -> dict:
+    meta = json.loads(str(data[_meta_key]))
+    if meta.get('FORMAT') != _format_name:
+        raise Exception('Not a columnar product file.')
+    if meta['FORMAT_VERSION'] > _format_version:
+        raise Exception(f'Product file format version {meta["FORMAT_VERSION"]} is not supported.')
+    return meta
+
+def _parents(read, name : str) -> np.ndarray:
+    # files written before nested portfolios were flattened only hold top level rows
+    try:
+        return read(f'{name}/__PARENT__')
+    except KeyError:
+        return np.full(len(read(f'{name}/__POSITION__')), -1, dtype=np.int64)
+
+def _select_rows(
+        read,
+        name : str,
+        currency : Optional[str]=None,
+        index : Optional[str]=None,
+        maturity_from : Optional[Date]=None,
+        maturity_to : Optional[Date]=None) -> np.ndarray:
+
+    # only the filter columns are read here, rows of nested portfolios are never selected
+    mask = _parents(read, name) == -1
+    if currency:
+        codes, categories = read(f'{name}/__CURRENCY__'), read(f'{name}/__CURRENCY__/categories')
+        hit = np.array([currency.upper() in c.split(',') for c in categories.tolist()], dtype=bool)
+        mask &= hit[codes]
+    if index:
+        codes, categories = read(f'{name}/__INDEX__'), read(f'{name}/__INDEX__/categories')
+        mask &= (categories == index.upper())[codes]
+    if maturity_from is not None or maturity_to is not None:
+        last_dates = read(f'{name}/__LAST_DATE__')
+        if maturity_from is not None:
+            mask &= last_dates >= Date(maturity_from).serialNumber()
+        if maturity_to is not None:
+            mask &= last_dates <= Date(maturity_to).serialNumber()
+    return np.flatnonzero(mask)
+
+def read_product_contents(
+        path : str,
+        product_type : Optional[str]=None,
+        currency : Optional[str]=None,
+        index : Optional[str]=None,
+        maturity_from : Optional[Date]=None,
+        maturity_to : Optional[Date]=None) -> Tuple[dict, List[Tuple[int, float, dict]]]:
+
+    ### serialized contents of the elements passing the filters, no product is built
+    ### returns the file layout and (position, weight, content) in element order,
+    ### a nested portfolio comes back in the ProductPortfolio.serialize layout
+    with np.load(path, allow_pickle=False) as data:
+        meta = _read_meta(data)
+        cache = {}
+        def read(key):
+            if key not in cache:
+                cache[key] = data[key]
+            return cache[key]
+
+        # 1) top level rows passing the filters, then every node below them
+        rows, nodes, parents = {}, [], []
+        for name, table in meta['TABLES'].items():
+            top = np.array([], dtype=np.int64)
+            if not product_type or table['TYPE'] == product_type.upper():
+                top = _select_rows(read, name, currency, index, maturity_from, maturity_to)
+            rows[name] = top
+            if f'{name}/__NODE__' in data:
+                nodes.append(read(f'{name}/__NODE__'))
+                parents.append(read(f'{name}/__PARENT__'))
+        selected_nodes = set()
+        if nodes:
+            for name, top in rows.items():
+                if f'{name}/__NODE__' in data:
+                    selected_nodes.update(read(f'{name}/__NODE__')[top].tolist())
+            nodes, parents = np.concatenate(nodes), np.concatenate(parents)
+            # parents are numbered before their elements
+            for node, parent in sorted(zip(nodes.tolist(), parents.tolist())):
+                if parent in selected_nodes:
+                    selected_nodes.add(node)
+            for name in rows:
+                if f'{name}/__NODE__' in data:
+                    rows[name] = np.flatnonzero(np.isin(read(f'{name}/__NODE__'), list(selected_nodes)))
+
+        # 2) decode the selected rows only
+        entries = []
+        for name, table in meta['TABLES'].items():
+            these_rows = rows[name]
+            if len(these_rows) == 0:
+                continue
+            columns = {
+                column : _decode_column(encoding, read, f'{name}/{column}', these_rows)
+                for column, encoding in table['COLUMNS'].items()}
+            keys = [k for k in columns if not k.startswith('__')]
+            nested = '__NODE__' in columns
+            for j in range(len(these_rows)):
+                content = {'VERSION' : table['VERSION'], 'TYPE' : table['TYPE']}
+                for k in keys:
+                    content[k] = columns[k][j]
+                entries.append((
+                    columns['__NODE__'][j] if nested else None,
+                    columns['__PARENT__'][j] if nested else -1,
+                    columns['__POSITION__'][j],
+                    columns['__WEIGHT__'][j],
+                    content))
+
+    # 3) elements back into their portfolios, deepest first
+    children = {}
+    for node, parent, position, weight, content in entries:
+        if parent != -1:
+            children.setdefault(parent, []).append((position, weight, content))
+    for node, _, _, _, content in sorted(entries, key=lambda x: -1 if x[0] is None else x[0], reverse=True):
+        if node in children:
+            elements = sorted(children.pop(node), key=lambda x: x[0])
+            for i, (_, _, element) in enumerate(elements):
+                content[f'PRODUCT_{i}'] = element
+            content['WEIGHTS'] = [weight for _, weight, _ in elements]
+    selected = [(position, weight, content) for _, parent, position, weight, content in entries if parent == -1]
+    selected.sort(key=lambda x: x[0])
+    return meta, selected
+
+def read_product_table(path : str, product_type : str, version : Optional[int]=None, **filters) -> pd.DataFrame:
+    # one product table as a frame, e.g., to inspect a book without building it
+    meta, selected = read_product_contents(path, product_type=product_type, **filters)
+    rows = [dict(content, POSITION=position, WEIGHT=weight) for position, weight, content in selected
+            if version is None or content['VERSION'] == version]
+    return pd.DataFrame(rows)
+
+def filter_products(
+        product : Product,
+        product_type : Optional[str]=None,
+        currency : Optional[str]=None,
+        index : Optional[str]=None,
+        maturity_from : Optional[Date]=None,
+        maturity_to : Optional[Date]=None) -> Product:
+
+    ### an already built product restricted as read_product_file would, e.g., one read from a legacy pickle
+    ### a portfolio keeps its matching elements with their weights, a single product has to match itself
+    criteria = dict(
+        currency=currency or None,
+        index=index or None,
+        product_type=product_type or None,
+        maturity_from=maturity_from,
+        maturity_to=maturity_to)
+    if all(v is None for v in criteria.values()):
+        return product
+    if type(product) is ProductPortfolio:
+        positions = product.query(**criteria)
+        if len(positions) == 0:
+            raise Exception('No product matches the filters.')
+        return product.sub_portfolio(positions)
+    if len(PortfolioIndex.from_products([0], [product]).query(**criteria)) == 0:
+        raise Exception('No product matches the filters.')
+    return product
+
+def read_product_file(
+        path : str,
+        product_type : Optional[str]=None,
+        currency : Optional[str]=None,
+        index : Optional[str]=None,
+        maturity_from : Optional[Date]=None,
+        maturity_to : Optional[Date]=None,
+        num_workers : Optional[int]=1) -> Product:
+
+    ### products passing the filters, as a ProductPortfolio unless the file holds a single product
+    meta, selected = read_product_contents(path, product_type, currency, index, maturity_from, maturity_to)
+    if len(selected) == 0:
+        raise Exception(f'No product in {path} matches the filters.')
+    contents = [content for _, _, content in selected]
+    if num_workers == 1:
+        products = build_product_list(contents)
+    else:
+        products = build_products(contents, num_workers)[0]
+    if meta['ROOT_TYPE'] != ProductPortfolio._product_type:
+        return products[0]
+    return ProductPortfolio(products, [weight for _, weight, _ in selected])
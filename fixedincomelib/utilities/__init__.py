@@ -4,4 +4,6 @@ from fixedincomelib.utilities.numerics import (
     ExtrapMethod,
     InterpolatorFactory,
     Interpolator1D,
-    Interpolator1DPCP)
\ No newline at end of file
+    Interpolator1DPCP,
+    Interpolator1DLinear,
+    Interpolator1DLogLinear)
\ No newline at end of file
@@ -1,5 +1,6 @@
 import copy
 import numpy as np
+import scipy.sparse as sp
 from abc import ABC, abstractmethod
 from enum import Enum
 from typing import List, Optional
@@ -8,6 +9,7 @@ class InterpMethod(Enum):
 
     PIECEWISE_CONSTANT_LEFT_CONTINUOUS = 'PIECEWISE_CONSTANT_LEFT_CONTINUOUS'
     LINEAR = 'LINEAR'
+    LOG_LINEAR = 'LOG_LINEAR'
 
     @classmethod
     def from_string(cls, value: str) -> 'InterpMethod':
@@ -40,6 +42,16 @@ class ExtrapMethod(Enum):
 
 class Interpolator1D(ABC):
 
+    ### scalar methods take floats; *_batch methods take numpy arrays and
+    ### return one value (or one gradient row) per query point
+    ### query points / intervals registered up front get a cached CSR jacobian, which survives
+    ### set_values unless the gradient depends on the ordinates, and is dropped by set_axis1
+
+    _gradient_depends_on_values = True
+    _jacobian_chunk = 4096
+    # pillars may repeat unless the interpolator divides by the gaps between them
+    _strictly_increasing_axis = False
+
     def __init__(self,
                  axis1 : np.ndarray, 
                  values : np.ndarray, 
@@ -51,6 +63,9 @@ class Interpolator1D(ABC):
         self.interp_method_ = interpolation_method
         self.extrap_method_ = extrpolation_method
         self.length_ = len(self.axis1)
+        self.query_points_ = None
+        self.query_intervals_ = None
+        self._invalidate_jacobians()
 
     @abstractmethod
     def interpolate(self, x : float) -> float:
@@ -67,7 +82,142 @@ class Interpolator1D(ABC):
     @abstractmethod
     def gradient_of_integrated_value_wrt_ordinate(self, start_x : float, end_x : float):
         pass
+
+    @abstractmethod
+    def interpolate_batch(self, x : np.ndarray) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def integrate_batch(self, start_x : np.ndarray, end_x : np.ndarray) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def gradient_wrt_ordinate_batch(self, x : np.ndarray) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def gradient_of_integrated_value_wrt_ordinate_batch(self, start_x : np.ndarray, end_x : np.ndarray) -> np.ndarray:
+        pass
     
+    def adjoint_of_integrated_value_wrt_ordinate_batch(self, start_x : np.ndarray, end_x : np.ndarray, adjoints : np.ndarray) -> np.ndarray:
+        # sum_i adjoints[i] * d integrate(start_x[i], end_x[i]) / d values, without the full gradient matrix in memory
+        start_x = np.asarray(start_x, dtype=float)
+        end_x = np.asarray(end_x, dtype=float)
+        adjoints = np.asarray(adjoints, dtype=float)
+        res = np.zeros(self.length, dtype=float)
+        for k in range(0, len(start_x), self._jacobian_chunk):
+            chunk = slice(k, k + self._jacobian_chunk)
+            res += adjoints[chunk] @ self.gradient_of_integrated_value_wrt_ordinate_batch(start_x[chunk], end_x[chunk])
+        return res
+
+    def _build_cumulative(self) -> None:
+        pass
+
+    def set_values(self, values : np.ndarray) -> None:
+        values = np.asarray(values, dtype=float)
+        assert values.shape == (self.length,)
+        self.values_ = values
+        self._build_cumulative()
+        if self._gradient_depends_on_values:
+            self._invalidate_jacobians()
+
+    def set_axis1(self, axis1 : np.ndarray) -> None:
+        axis1 = np.asarray(axis1, dtype=float)
+        assert axis1.shape == (self.length,)
+        assert np.all(np.diff(axis1) > 0) if self._strictly_increasing_axis else np.all(np.diff(axis1) >= 0)
+        self.axis1_ = axis1
+        self._build_cumulative()
+        self._invalidate_jacobians()
+
+    def set_query_points(self, x : np.ndarray) -> None:
+        self.query_points_ = np.asarray(x, dtype=float)
+        self.query_point_rows_ = {v : k for k, v in enumerate(self.query_points_.tolist())}
+        self.query_jacobian_ = None
+        self.point_gradients_ = {}
+
+    def set_query_intervals(self, start_x : np.ndarray, end_x : np.ndarray) -> None:
+        start_x = np.asarray(start_x, dtype=float)
+        end_x = np.asarray(end_x, dtype=float)
+        assert start_x.shape == end_x.shape
+        self.query_intervals_ = (start_x, end_x)
+        self.query_interval_rows_ = {v : k for k, v in enumerate(zip(start_x.tolist(), end_x.tolist()))}
+        self.integrated_query_jacobian_ = None
+        self.interval_gradients_ = {}
+
+    @property
+    def query_jacobian(self) -> sp.csr_matrix:
+        # d interpolate(query_points) / d values, one row per query point
+        if self.query_points_ is None:
+            raise Exception('No query points registered.')
+        if self.query_jacobian_ is None:
+            self.query_jacobian_ = self._sparse_rows(
+                self.gradient_wrt_ordinate_batch, self.query_points_)
+        return self.query_jacobian_
+
+    @property
+    def integrated_query_jacobian(self) -> sp.csr_matrix:
+        # d integrate(query_intervals) / d values, one row per query interval
+        if self.query_intervals_ is None:
+            raise Exception('No query intervals registered.')
+        if self.integrated_query_jacobian_ is None:
+            self.integrated_query_jacobian_ = self._sparse_rows(
+                self.gradient_of_integrated_value_wrt_ordinate_batch, *self.query_intervals_)
+        return self.integrated_query_jacobian_
+
+    def _sparse_rows(self, gradient_batch, *queries) -> sp.csr_matrix:
+        # dense gradients are built chunk by chunk so memory stays bounded
+        num_rows = len(queries[0])
+        blocks = [
+            sp.csr_matrix(gradient_batch(*(q[k : k + self._jacobian_chunk] for q in queries)))
+            for k in range(0, num_rows, self._jacobian_chunk)]
+        if len(blocks) == 0:
+            return sp.csr_matrix((0, self.length), dtype=float)
+        return sp.vstack(blocks, format='csr')
+
+    def _invalidate_jacobians(self) -> None:
+        self.query_jacobian_ = None
+        self.integrated_query_jacobian_ = None
+        self.point_gradients_ = {}
+        self.interval_gradients_ = {}
+
+    @staticmethod
+    def _query_key(x):
+        # registered queries are looked up by float, anything but a scalar is not one of them
+        return float(x) if np.ndim(x) == 0 else None
+
+    def _cached_gradient(self, x : float):
+        # a fresh copy of the query jacobian row if x is a registered query point, the rows kept are read-only
+        if self.query_points_ is None:
+            return None
+        x = self._query_key(x)
+        if x is None:
+            return None
+        grad = self.point_gradients_.get(x)
+        if grad is None:
+            k = self.query_point_rows_.get(x)
+            if k is None:
+                return None
+            grad = self.query_jacobian.getrow(k).toarray()[0]
+            grad.flags.writeable = False
+            self.point_gradients_[x] = grad
+        return grad.copy()
+
+    def _cached_integrated_gradient(self, start_x : float, end_x : float):
+        if self.query_intervals_ is None:
+            return None
+        key = (self._query_key(start_x), self._query_key(end_x))
+        if None in key:
+            return None
+        grad = self.interval_gradients_.get(key)
+        if grad is None:
+            k = self.query_interval_rows_.get(key)
+            if k is None:
+                return None
+            grad = self.integrated_query_jacobian.getrow(k).toarray()[0]
+            grad.flags.writeable = False
+            self.interval_gradients_[key] = grad
+        return grad.copy()
+
     @property
     def axis1(self) -> np.ndarray:
         return self.axis1_
@@ -90,123 +240,280 @@ class Interpolator1D(ABC):
 
 class Interpolator1DPCP(Interpolator1D):
 
+    ### piecewise constant, flat extrapolation
+    ###   x <  axis1[0]                  -> values[0]
+    ###   axis1[i-1] <= x < axis1[i]     -> values[i]
+    ###   x >= axis1[-1]                 -> values[-1]
+    ### bucket(x) = min(searchsorted(axis1, x, 'right'), n - 1) is the ordinate used at x
+    ### integrals use the antiderivative F(x) = int_{axis1[0]}^{x}, with F(axis1[i]) precomputed
+
+    _gradient_depends_on_values = False
+
     def __init__(self, axis1: np.ndarray, values: np.ndarray, extrpolation_method: ExtrapMethod) -> None:
-        super().__init__(axis1, values, InterpMethod.LINEAR, extrpolation_method)
+        super().__init__(axis1, values, InterpMethod.PIECEWISE_CONSTANT_LEFT_CONTINUOUS, extrpolation_method)
         assert self.extrap_method_ == ExtrapMethod.FLAT
+        self.axis1_ = np.asarray(self.axis1_, dtype=float)
+        self.values_ = np.asarray(self.values_, dtype=float)
+        self._build_cumulative()
+
+    def _build_cumulative(self) -> None:
+        # cum_[i] = int_{axis1[0]}^{axis1[i]}, the ordinate on [axis1[i-1], axis1[i]) is values[i]
+        self.cum_ = np.zeros(self.length, dtype=float)
+        if self.length > 1:
+            self.cum_[1:] = np.cumsum(np.diff(self.axis1) * self.values[1:])
+        # integration region of each ordinate, the outermost ones are unbounded
+        self.region_lo_ = np.concatenate([[-np.inf], self.axis1[:-1]])
+        self.region_hi_ = np.concatenate([self.axis1[:-1], [np.inf]])
+
+    def _bucket(self, x : np.ndarray) -> np.ndarray:
+        return np.minimum(np.searchsorted(self.axis1, x, side='right'), self.length - 1)
+
+    def _antiderivative(self, x : np.ndarray, j : np.ndarray) -> np.ndarray:
+        # j = searchsorted(axis1, x, 'right')
+        left = np.maximum(j - 1, 0)
+        return self.cum_[left] + self.values[np.minimum(j, self.length - 1)] * (x - self.axis1[left])
+
+    def _antiderivative_gradient(self, x : np.ndarray) -> np.ndarray:
+        # d F(x) / d values, i.e., signed length of each region between axis1[0] and x
+        x = x[:, None]
+        return np.clip(x, self.region_lo_, self.region_hi_) - \
+            np.clip(self.axis1[0], self.region_lo_, self.region_hi_)
 
     def interpolate(self, x: float) -> float:
-        
-        if x < self.axis1[0]:
-            # flat left extrapolation
-            return self.values[0]
-        if x >= self.axis1[-1]:
-            # flat right extrpolation
-            return self.values[-1]
-        
-        for i in range(len(self.axis1) - 1):
-            if x >= self.axis1[i] and x < self.axis1[i+1]:
-                return self.values[i+1]
+        return self.values[self._bucket(x)]
     
     def gradient_wrt_ordinate(self, x : float):
-        
+        cached = self._cached_gradient(x)
+        if cached is not None:
+            return cached
         grad = np.zeros(self.length, dtype=float)
+        grad[self._bucket(x)] = 1.0
+        return grad
+
+    def integrate(self, start_x : float, end_x : float):
+        return float(self.integrate_batch(np.array([start_x]), np.array([end_x]))[0])
+
+    def gradient_of_integrated_value_wrt_ordinate(self, start_x : float, end_x : float):
+        cached = self._cached_integrated_gradient(start_x, end_x)
+        if cached is not None:
+            return cached
+        return self.gradient_of_integrated_value_wrt_ordinate_batch(
+            np.array([start_x]), np.array([end_x]))[0]
+
+    def interpolate_batch(self, x : np.ndarray) -> np.ndarray:
+        return self.values[self._bucket(np.asarray(x, dtype=float))]
+
+    def integrate_batch(self, start_x : np.ndarray, end_x : np.ndarray) -> np.ndarray:
+        start_x = np.asarray(start_x, dtype=float)
+        end_x = np.asarray(end_x, dtype=float)
+        j_s = np.searchsorted(self.axis1, start_x, side='right')
+        j_e = np.searchsorted(self.axis1, end_x, side='right')
+        res = self._antiderivative(end_x, j_e) - self._antiderivative(start_x, j_s)
+        # no cancellation when both ends sit in the same bucket
+        b_s = np.minimum(j_s, self.length - 1)
+        same = b_s == np.minimum(j_e, self.length - 1)
+        res[same] = (end_x[same] - start_x[same]) * self.values[b_s[same]]
+        return res
 
-        if x < self.axis1[0]:
-            # flat left extrapolation
-            grad[0] = 1.0
-            return grad
-        if x >= self.axis1[-1]:
-            # flat right extrpolation
-            grad[-1] = 1.0
-            return grad
-
-        for i in range(len(self.axis1) - 1):
-            if x >= self.axis1[i] and x < self.axis1[i+1]:
-                grad[i+1] = 1
+    def gradient_wrt_ordinate_batch(self, x : np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=float)
+        grad = np.zeros((len(x), self.length), dtype=float)
+        grad[np.arange(len(x)), self._bucket(x)] = 1.0
         return grad
 
+    def gradient_of_integrated_value_wrt_ordinate_batch(self, start_x : np.ndarray, end_x : np.ndarray) -> np.ndarray:
+        start_x = np.asarray(start_x, dtype=float)
+        end_x = np.asarray(end_x, dtype=float)
+        return self._antiderivative_gradient(end_x) - self._antiderivative_gradient(start_x)
+
+    def _weighted_clip_sums(self, x : np.ndarray, weights : np.ndarray) -> np.ndarray:
+        # sum_i weights[i] * clip(x[i], region_lo_[j], region_hi_[j]) for every region j, by prefix sums over sorted x
+        order = np.argsort(x, kind='stable')
+        x, weights = x[order], weights[order]
+        cum_w = np.concatenate([[0.], np.cumsum(weights)])
+        cum_wx = np.concatenate([[0.], np.cumsum(weights * x)])
+        k_lo = np.searchsorted(x, self.region_lo_, side='left')
+        k_hi = np.searchsorted(x, self.region_hi_, side='left')
+        # points below / above a region sit on its bounds, the unbounded outer regions have none there
+        lo = np.where(np.isfinite(self.region_lo_), self.region_lo_, 0.)
+        hi = np.where(np.isfinite(self.region_hi_), self.region_hi_, 0.)
+        return lo * cum_w[k_lo] + (cum_wx[k_hi] - cum_wx[k_lo]) + hi * (cum_w[-1] - cum_w[k_hi])
+
+    def adjoint_of_integrated_value_wrt_ordinate_batch(self, start_x : np.ndarray, end_x : np.ndarray, adjoints : np.ndarray) -> np.ndarray:
+        # d F(x) / d values is a clip of x per region (see _antiderivative_gradient), the axis1[0] terms cancel
+        start_x = np.asarray(start_x, dtype=float)
+        end_x = np.asarray(end_x, dtype=float)
+        adjoints = np.asarray(adjoints, dtype=float)
+        if len(start_x) == 0:
+            return np.zeros(self.length, dtype=float)
+        return self._weighted_clip_sums(end_x, adjoints) - self._weighted_clip_sums(start_x, adjoints)
+
+class Interpolator1DSegmented(Interpolator1D):
+
+    ### shared machinery for interpolators that are continuous between consecutive pillars
+    ### subclasses supply the kernels on one segment [axis1[i], axis1[i+1]], as functions of
+    ### the offset t into the segment, together with their derivatives wrt values[i] / values[i+1]
+    ### FLAT extrapolation holds the end ordinates, LINEAR extrapolation extends the end segments
+    ### integrals use the antiderivative F(x) = int_{axis1[0]}^{x}, with F(axis1[i]) precomputed
+
+    _strictly_increasing_axis = True
+
+    def __init__(self,
+                 axis1 : np.ndarray,
+                 values : np.ndarray,
+                 interpolation_method : InterpMethod,
+                 extrpolation_method : ExtrapMethod) -> None:
+        super().__init__(axis1, values, interpolation_method, extrpolation_method)
+        self.axis1_ = np.asarray(self.axis1_, dtype=float)
+        self.values_ = np.asarray(self.values_, dtype=float)
+        if self.length < 2:
+            raise Exception(f'{self.interp_method} interpolation needs at least two pillars.')
+        assert np.all(np.diff(self.axis1) > 0)
+        self._build_cumulative()
+
+    @abstractmethod
+    def _segment_value(self, i : np.ndarray, t : np.ndarray):
+        # returns value, d value / d values[i], d value / d values[i+1]
+        pass
+
+    @abstractmethod
+    def _segment_integral(self, i : np.ndarray, t : np.ndarray):
+        # int_{axis1[i]}^{axis1[i] + t}, and its derivatives wrt values[i] / values[i+1]
+        pass
+
+    def _build_cumulative(self) -> None:
+        self.widths_ = np.diff(self.axis1)
+        seg = np.arange(self.length - 1)
+        integral, d_lo, d_hi = self._segment_integral(seg, self.widths_)
+        self.cum_ = np.concatenate([[0.], np.cumsum(integral)])
+        rows = np.zeros((self.length - 1, self.length), dtype=float)
+        rows[seg, seg] = d_lo
+        rows[seg, seg + 1] = d_hi
+        self.cum_grad_ = np.zeros((self.length, self.length), dtype=float)
+        self.cum_grad_[1:] = np.cumsum(rows, axis=0)
+
+    def _locate(self, x : np.ndarray):
+        # segment, offset into the segment and the lengths run flat beyond each end
+        x = np.asarray(x, dtype=float)
+        xc = x
+        if self.extrap_method_ == ExtrapMethod.FLAT:
+            xc = np.clip(x, self.axis1[0], self.axis1[-1])
+        i = np.clip(np.searchsorted(self.axis1, xc, side='right') - 1, 0, self.length - 2)
+        t = xc - self.axis1[i]
+        return i, t, np.minimum(x - xc, 0.), np.maximum(x - xc, 0.)
+
+    def _antiderivative(self, x : np.ndarray) -> np.ndarray:
+        i, t, left, right = self._locate(x)
+        return self.cum_[i] + self._segment_integral(i, t)[0] + \
+            self.values[0] * left + self.values[-1] * right
+
+    def _antiderivative_gradient(self, x : np.ndarray) -> np.ndarray:
+        i, t, left, right = self._locate(x)
+        _, d_lo, d_hi = self._segment_integral(i, t)
+        grad = self.cum_grad_[i]
+        rows = np.arange(len(i))
+        grad[rows, i] += d_lo
+        grad[rows, i + 1] += d_hi
+        grad[:, 0] += left
+        grad[:, -1] += right
+        return grad
+
+    def interpolate(self, x : float) -> float:
+        return float(self.interpolate_batch(np.array([x]))[0])
+
     def integrate(self, start_x : float, end_x : float):
-        
-        if self.length == 1:
-            return (end_x - start_x) * self.values[0]
-
-        acc = 0.
-        start_fixed = False
-        # two pointers
-        for i in range(self.length + 1):
-            interval_s, interval_e, interval_v = None, None, None
-            if i == 0:
-                interval_s, interval_e = -np.inf, self.axis1[0]
-                interval_v = self.values[0]
-            elif i == self.length:
-                interval_s, interval_e = self.axis1[-1], np.inf
-                interval_v = self.values[-1]
-            else:
-                interval_s, interval_e = self.axis1[i-1], self.axis1[i]
-                interval_v = self.values[i]
-            # if both of them are in the same interval
-            if start_x >= interval_s and start_x < interval_e and \
-                end_x >= interval_s and end_x < interval_e:
-                acc = (end_x - start_x) * interval_v
-                break
-            # if start hits this interval
-            if not start_fixed and start_x >= interval_s and start_x < interval_e:
-                acc += (interval_e - start_x) * interval_v
-                start_fixed = True
-                continue
-            # start already fixed, end hits this interval
-            if start_fixed:
-                if end_x >= interval_s and end_x < interval_e:
-                    # if hit, wrap up
-                    acc += (end_x - interval_s) * interval_v
-                    break
-                else:
-                    #  otherwise, count in the whole interval
-                    acc += (interval_e - interval_s) * interval_v
-
-        return acc
+        return float(self.integrate_batch(np.array([start_x]), np.array([end_x]))[0])
+
+    def gradient_wrt_ordinate(self, x : float):
+        cached = self._cached_gradient(x)
+        if cached is not None:
+            return cached
+        return self.gradient_wrt_ordinate_batch(np.array([x]))[0]
 
     def gradient_of_integrated_value_wrt_ordinate(self, start_x : float, end_x : float):
+        cached = self._cached_integrated_gradient(start_x, end_x)
+        if cached is not None:
+            return cached
+        return self.gradient_of_integrated_value_wrt_ordinate_batch(
+            np.array([start_x]), np.array([end_x]))[0]
 
-        grad = np.zeros(self.length, dtype=float)
-        
-        if self.length == 1:
-            grad[0] = end_x - start_x
-            return grad
-
-        # acc = 0.
-        start_fixed = False
-        # two pointers
-        for i in range(self.length + 1):            
-            interval_s, interval_e, interval_i = None, None, None
-            if i == 0:
-                interval_s, interval_e, interval_i = 0, self.axis1[0], 0
-            elif i == self.length:
-                interval_s, interval_e, interval_i = self.axis1[-1], np.inf, self.length - 1                 
-            else:
-                interval_s, interval_e, interval_i = self.axis1[i-1], self.axis1[i], 0
-            # if both of them are in the same interval
-            if start_x >= interval_s and start_x < interval_e and \
-                end_x >= interval_s and end_x < interval_e:
-                grad[interval_i] += (end_x - start_x)
-                break
-            # if start hits this interval
-            if not start_fixed and start_x >= interval_s and start_x < interval_e:                
-                grad[interval_i] += (interval_e - start_x)
-                start_fixed = True
-                continue
-            # start already fixed, end hits this interval
-            if start_fixed:
-                if end_x >= interval_s and end_x < interval_e:
-                    # if hit, wrap up                    
-                    grad[interval_i] += (end_x - interval_s)
-                    break
-                else:
-                    #  otherwise, count in the whole interval                    
-                    grad[interval_i] += (interval_e - interval_s)
+    def interpolate_batch(self, x : np.ndarray) -> np.ndarray:
+        i, t, _, _ = self._locate(x)
+        return self._segment_value(i, t)[0]
+
+    def integrate_batch(self, start_x : np.ndarray, end_x : np.ndarray) -> np.ndarray:
+        return self._antiderivative(end_x) - self._antiderivative(start_x)
 
+    def gradient_wrt_ordinate_batch(self, x : np.ndarray) -> np.ndarray:
+        i, t, _, _ = self._locate(x)
+        _, d_lo, d_hi = self._segment_value(i, t)
+        grad = np.zeros((len(i), self.length), dtype=float)
+        rows = np.arange(len(i))
+        grad[rows, i] = d_lo
+        grad[rows, i + 1] += d_hi
         return grad
 
+    def gradient_of_integrated_value_wrt_ordinate_batch(self, start_x : np.ndarray, end_x : np.ndarray) -> np.ndarray:
+        return self._antiderivative_gradient(end_x) - self._antiderivative_gradient(start_x)
+
+class Interpolator1DLinear(Interpolator1DSegmented):
+
+    ### linear between pillars, e.g., on zero or forward rates
+
+    _gradient_depends_on_values = False
+
+    def __init__(self, axis1: np.ndarray, values: np.ndarray, extrpolation_method: ExtrapMethod) -> None:
+        super().__init__(axis1, values, InterpMethod.LINEAR, extrpolation_method)
+
+    def _segment_value(self, i : np.ndarray, t : np.ndarray):
+        w = t / self.widths_[i]
+        return (1. - w) * self.values[i] + w * self.values[i + 1], 1. - w, w
+
+    def _segment_integral(self, i : np.ndarray, t : np.ndarray):
+        d_hi = 0.5 * t * t / self.widths_[i]
+        d_lo = t - d_hi
+        return d_lo * self.values[i] + d_hi * self.values[i + 1], d_lo, d_hi
+
+class Interpolator1DLogLinear(Interpolator1DSegmented):
+
+    ### linear in log(values) between pillars, e.g., on discount factors
+    ### on a segment f(t) = values[i] * exp(lambda * t), lambda = log(values[i+1] / values[i]) / width
+
+    _series_threshold = 1e-4
+
+    def __init__(self, axis1: np.ndarray, values: np.ndarray, extrpolation_method: ExtrapMethod) -> None:
+        self._check_values(values)
+        super().__init__(axis1, values, InterpMethod.LOG_LINEAR, extrpolation_method)
+
+    @staticmethod
+    def _check_values(values : np.ndarray) -> None:
+        if np.any(np.asarray(values, dtype=float) <= 0):
+            raise Exception('LOG_LINEAR interpolation needs strictly positive values.')
+
+    def set_values(self, values : np.ndarray) -> None:
+        self._check_values(values)
+        super().set_values(values)
+
+    def _slope(self, i : np.ndarray) -> np.ndarray:
+        return np.log(self.values[i + 1] / self.values[i]) / self.widths_[i]
+
+    def _segment_value(self, i : np.ndarray, t : np.ndarray):
+        w = t / self.widths_[i]
+        f = self.values[i] * np.exp(self._slope(i) * t)
+        return f, (1. - w) * f / self.values[i], w * f / self.values[i + 1]
+
+    def _segment_integral(self, i : np.ndarray, t : np.ndarray):
+        # I0 = int_0^t f(s) ds, I1 = int_0^t s f(s) ds, both through series near lambda * t = 0
+        z = self._slope(i) * t
+        small = np.abs(z) < self._series_threshold
+        z_ = np.where(small, 1., z)
+        phi1 = np.where(small, 1. + z / 2. + z * z / 6., np.expm1(z_) / z_)
+        phi2 = np.where(small, 0.5 + z / 3. + z * z / 8., (np.exp(z_) * (z_ - 1.) + 1.) / (z_ * z_))
+        i0 = self.values[i] * t * phi1
+        i1 = self.values[i] * t * t * phi2
+        h = self.widths_[i]
+        return i0, (i0 - i1 / h) / self.values[i], i1 / (h * self.values[i + 1])
+
 class InterpolatorFactory:
 
     @staticmethod
@@ -228,5 +535,9 @@ class InterpolatorFactory:
     
         if interpolation_method == InterpMethod.PIECEWISE_CONSTANT_LEFT_CONTINUOUS:
             return Interpolator1DPCP(axis1_, values_, extrpolation_method)
+        elif interpolation_method == InterpMethod.LINEAR:
+            return Interpolator1DLinear(axis1_, values_, extrpolation_method)
+        elif interpolation_method == InterpMethod.LOG_LINEAR:
+            return Interpolator1DLogLinear(axis1_, values_, extrpolation_method)
         else:
-            raise Exception('Currently only support PCP interpolation')
+            raise Exception(f'Currently does not support {interpolation_method} interpolation')
@@ -1,4 +1,5 @@
-import os, json
+import os, json, threading
+from types import MappingProxyType
 from typing import Optional, Self, Any
 from abc import ABC, abstractmethod
 
@@ -12,6 +13,13 @@ def get_config():
         return json.load(f)
 
 ### template for registry
+### registries are process-wide singletons shared by threads
+### 1) lazy init is double-checked under a lock, the instance is published once fully loaded
+### 2) the map is copy-on-write : writers build a new dict under the write lock and swap it in,
+###    readers use whichever map is current without locking (snapshot() hands it out read-only)
+
+_registry_init_lock = threading.RLock() # reentrant, a registry may build another one while loading
+
 class Registry(ABC):
 
     _instance = None
@@ -19,27 +27,37 @@ class Registry(ABC):
 
     def __new__(cls, file_name : str, registry_type : str, file_type : Optional[str]='json', **kwargs) -> Self:
         
-        if cls._instance is None:
-            # init
-            obj = super().__new__(cls)
-            obj._map = dict()
-            # read files
-            # path = os.path.join(os.path.pardir, 'static_files')
-            path = os.path.join('..', 'fixedincomelib', 'static_files')
-            file = os.path.join(path, f'{file_name}.{file_type}')
-            if file_name != '' and os.path.exists(file):
-                # resolve content
-                if file_type == 'json':
-                    with open(file, 'r', encoding='utf-8') as f:
-                        for k, v in json.load(f).items():
-                            obj.register(k, v)
-                else:
-                    raise Exception('Currently only supports json raw file.')
-            # finalize
-            cls._instance = obj
-            cls._registry_type = registry_type
+        instance = cls._instance
+        if instance is not None:
+            return instance
+        with _registry_init_lock:
+            if cls._instance is None:
+                # init
+                obj = super().__new__(cls)
+                obj._map = dict()
+                obj._write_lock = threading.RLock()
+                obj._initialize()
+                # read files
+                # path = os.path.join(os.path.pardir, 'static_files')
+                path = os.path.join('..', 'fixedincomelib', 'static_files')
+                file = os.path.join(path, f'{file_name}.{file_type}')
+                if file_name != '' and os.path.exists(file):
+                    # resolve content
+                    if file_type == 'json':
+                        with open(file, 'r', encoding='utf-8') as f:
+                            for k, v in json.load(f).items():
+                                obj.register(k, v)
+                    else:
+                        raise Exception('Currently only supports json raw file.')
+                # finalize, publish last so no thread sees a half-loaded registry
+                cls._registry_type = registry_type
+                cls._instance = obj
         return cls._instance
     
+    def _initialize(self) -> None:
+        # per-instance state of a subclass, set up before the static file is read
+        pass
+
     @abstractmethod
     def register(self, key : Any, value : Any) -> None:
         if self.exists(key):
@@ -51,13 +69,31 @@ class Registry(ABC):
         except:
             raise KeyError(f'no entry for key : {key}.')
 
+    def _set(self, key : Any, value : Any) -> None:
+        # copy-on-write, readers holding the previous map are not affected
+        # the duplicate check is repeated under the lock, two writers may race past register's
+        with self._write_lock:
+            if key in self._map:
+                raise ValueError(f'duplicate key : {key}')
+            new_map = dict(self._map)
+            new_map[key] = value
+            self._map = new_map
+
+    def snapshot(self) -> MappingProxyType:
+        # consistent read-only view, later writes do not show up in it
+        return MappingProxyType(self._map)
+
     def clear(self) -> None:
-        self._map.clear()
+        with self._write_lock:
+            self._map = dict()
 
     def erase(self, key : Any) -> None:
-        if not self.exists(key):
-            raise KeyError('Cannot find this key.')
-        self._map.pop(key)
+        with self._write_lock:
+            if not self.exists(key):
+                raise KeyError('Cannot find this key.')
+            new_map = dict(self._map)
+            new_map.pop(key)
+            self._map = new_map
     
     def exists(self, key : Any) -> None:
         return key in self._map
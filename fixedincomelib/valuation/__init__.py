@@ -0,0 +1,11 @@
+from fixedincomelib.valuation.overnight_projection import (
+    OvernightIndexProjectionEngine,
+    OvernightProjection,
+    fixing_calendar_index)
+from fixedincomelib.valuation.pricing_visitor import ProductPricingVisitor
+from fixedincomelib.valuation.curve_calibration import (
+    CurveCalibrator,
+    CalibrationResult)
+from fixedincomelib.valuation.risk import (
+    bump_and_revalue_delta,
+    compare_bucketed_delta)
@@ -0,0 +1,272 @@
+import time
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+from typing import List, Optional, Union
+from fixedincomelib.date import Date, to_serials
+from fixedincomelib.market.basics import AccrualBasis
+from fixedincomelib.market.curves import YieldCurve
+from fixedincomelib.market.data_conventions import CompoundingMethod
+from fixedincomelib.market.fixings import IndexFixingSeries
+from fixedincomelib.market.registries import IndexHandle, IndexRegistry
+from fixedincomelib.product.linear_products import ProductRFRSwap
+from fixedincomelib.utilities.numerics import InterpMethod, ExtrapMethod
+from fixedincomelib.valuation.overnight_projection import OvernightIndexProjectionEngine
+
+### single curve calibration of an overnight index : one PCP instantaneous forward curve both projects and discounts
+### one pillar per instrument, at its last accrual date, and all pillars are solved together by Newton
+###   swap   : residual = par rate - quote, par = sum_j amount_j df(pay_j) / sum_k accrued_k df(pay_k)
+###   future : residual = period rate - (100 - price) / 100 + convexity adjustment
+### the jacobian is analytic : period rates and their gradients come from the projection engine,
+### discount factors from the interpolator's integrated query jacobian (sparse, registered once;
+### a PCP curve's does not depend on the values, so it is built once for the whole calibration)
+
+class CalibrationResult:
+
+    def __init__(
+            self,
+            curve : YieldCurve,
+            instruments : pd.DataFrame,
+            residual_history : List[float],
+            converged : bool,
+            seconds : float,
+            jacobian : sp.csr_matrix) -> None:
+        self.curve_ = curve
+        self.instruments_ = instruments
+        self.residual_history_ = residual_history
+        self.converged_ = converged
+        self.seconds_ = seconds
+        self.jacobian_ = jacobian
+
+    @property
+    def curve(self) -> YieldCurve:
+        return self.curve_
+
+    @property
+    def instruments(self) -> pd.DataFrame:
+        # Instrument, Maturity, Quote, Model and Residual of each instrument, in pillar order
+        return self.instruments_
+
+    @property
+    def residuals(self) -> np.ndarray:
+        return self.instruments_['Residual'].to_numpy()
+
+    @property
+    def residual_history(self) -> List[float]:
+        # max absolute residual before each iteration and after the last one
+        return self.residual_history_
+
+    @property
+    def iterations(self) -> int:
+        return len(self.residual_history_) - 1
+
+    @property
+    def converged(self) -> bool:
+        return self.converged_
+
+    @property
+    def seconds(self) -> float:
+        return self.seconds_
+
+    @property
+    def jacobian(self) -> sp.csr_matrix:
+        # d residuals / d curve values at the solution
+        return self.jacobian_
+
+    def summary(self) -> pd.DataFrame:
+        return pd.DataFrame([
+            ['Iterations', self.iterations],
+            ['Converged', self.converged],
+            ['MaxAbsResidual', float(np.max(np.abs(self.residuals)))],
+            ['Seconds', self.seconds]], columns=['Name', 'Value'])
+
+class CurveCalibrator:
+
+    def __init__(
+            self,
+            on_index : Union[str, IndexHandle],
+            valuation_date : Date,
+            accrual_basis : Optional[AccrualBasis]=AccrualBasis('ACT/365 FIXED'),
+            fixings : Optional[IndexFixingSeries]=None,
+            tolerance : Optional[float]=1e-12,
+            max_iterations : Optional[int]=20) -> None:
+
+        self.on_index_handle_ = IndexRegistry.resolve(on_index)
+        self.valuation_serial_ = Date(valuation_date).serialNumber()
+        self.accrual_basis_ = accrual_basis
+        self.fixings_ = fixings
+        self.tolerance_ = tolerance
+        self.max_iterations_ = max_iterations
+        self.swaps_ = []
+        self.futures_ = []
+
+    def add_swap(self, swap : ProductRFRSwap, par_rate : Optional[float]=None) -> None:
+        # quoted at its own fixed rate unless par_rate is given
+        if swap.on_index_str_.upper() != self.on_index_handle_.name:
+            raise Exception(f'Swap on {swap.on_index_str_} cannot calibrate a {self.on_index_handle_.name} curve.')
+        if swap.floating_leg_ is None:
+            swap._build_legs()
+        quote = swap.fixed_rate if par_rate is None else par_rate
+        self.swaps_.append((swap, float(quote)))
+
+    def add_future(
+            self,
+            effective_date : Date,
+            termination_date : Date,
+            price : float,
+            compounding_method : Optional[CompoundingMethod]=CompoundingMethod.COMPOUND,
+            convexity_adjustment : Optional[float]=0.) -> None:
+        # reference period [effective, termination) of an RFR future, e.g., IMM to IMM for a 3M SOFR future
+        start, end = int(to_serials([effective_date])[0]), int(to_serials([termination_date])[0])
+        if end <= start:
+            raise Exception('Future reference periods must end after they start.')
+        rate = (100. - price) / 100. - convexity_adjustment
+        self.futures_.append((start, end, compounding_method, float(price), rate))
+
+    @property
+    def num_instruments(self) -> int:
+        return len(self.swaps_) + len(self.futures_)
+
+    ### setup
+
+    def _instruments(self) -> pd.DataFrame:
+        rows = []
+        for k, (swap, quote) in enumerate(self.swaps_):
+            rows.append(['SWAP', k, int(swap.floating_leg.end_dates[-1]), quote])
+        for k, (start, end, _, _, rate) in enumerate(self.futures_):
+            rows.append(['FUTURE', k, end, rate])
+        if len(rows) == 0:
+            raise Exception('No instruments to calibrate to.')
+        res = pd.DataFrame(rows, columns=['Type', 'Position', 'MaturitySerial', 'Quote'])
+        res = res.sort_values('MaturitySerial', kind='stable').reset_index(drop=True)
+        if res['MaturitySerial'].duplicated().any():
+            raise Exception('Instruments must mature on distinct dates, one pillar each.')
+        if res['MaturitySerial'].iloc[0] <= self.valuation_serial_:
+            raise Exception('Instruments must mature after the valuation date.')
+        return res
+
+    def _layout(self, instruments : pd.DataFrame) -> dict:
+        ### every period and payment row of every instrument, with sparse maps from rows to instruments
+        period_rows, payment_rows = [], []   # (instrument, start, end, method, spread) / (instrument, payment, weight, is_fixed)
+        for i, (kind, k) in enumerate(zip(instruments['Type'], instruments['Position'])):
+            if kind == 'FUTURE':
+                start, end, method, _, _ = self.futures_[k]
+                period_rows.append((i, np.array([start]), np.array([end]), method, 0., None))
+                continue
+            swap = self.swaps_[k][0]
+            floating, fixed = swap.floating_leg, swap.fixed_leg
+            period_rows.append((i, floating.start_dates, floating.end_dates, swap.compounding_method, swap.spread, floating.payment_dates))
+            payment_rows.append((i, fixed.payment_dates, fixed.accrued))
+
+        n = len(instruments)
+        counts = np.array([len(r[1]) for r in period_rows])
+        owners = np.repeat([r[0] for r in period_rows], counts)
+        starts = np.concatenate([r[1] for r in period_rows]).astype(np.int64)
+        ends = np.concatenate([r[2] for r in period_rows]).astype(np.int64)
+        methods = [r[3] for r in period_rows for _ in range(len(r[1]))]
+        spreads = np.repeat([r[4] for r in period_rows], counts)
+        # futures settle on their rate, swaps' floating periods are discounted
+        is_swap = np.repeat([r[5] is not None for r in period_rows], counts)
+        floating_payments = np.concatenate([r[5] if r[5] is not None else np.zeros(0) for r in period_rows]).astype(np.int64)
+        fixed_counts = np.array([len(r[1]) for r in payment_rows], dtype=np.int64)
+        fixed_owners = np.repeat([r[0] for r in payment_rows], fixed_counts)
+        fixed_payments = np.concatenate([r[1] for r in payment_rows]).astype(np.int64) if payment_rows else np.zeros(0, dtype=np.int64)
+        fixed_accrued = np.concatenate([r[2] for r in payment_rows]) if payment_rows else np.zeros(0)
+
+        swap_rows = np.flatnonzero(is_swap)
+        future_rows = np.flatnonzero(~is_swap)
+        num_floating, num_fixed = len(swap_rows), len(fixed_payments)
+        return {
+            'Starts' : starts,
+            'Ends' : ends,
+            'Methods' : methods,
+            'Spreads' : spreads,
+            'SwapRows' : swap_rows,
+            'FutureRows' : future_rows,
+            'FutureOwners' : owners[future_rows],
+            # instruments x floating periods / fixed periods, unit notionals
+            'Floating' : sp.csr_matrix((np.ones(num_floating), (owners[swap_rows], np.arange(num_floating))), shape=(n, num_floating)),
+            'Fixed' : sp.csr_matrix((fixed_accrued, (fixed_owners, np.arange(num_fixed))), shape=(n, num_fixed)),
+            # discounted payments, floating then fixed
+            'Payments' : np.concatenate([floating_payments, fixed_payments]),
+            'NumFloating' : num_floating}
+
+    ### newton
+
+    def _residuals(self, curve : YieldCurve, engine : OvernightIndexProjectionEngine, layout : dict, quotes : np.ndarray):
+        interpolator = curve.interpolator
+        projection = engine.project_arrays(
+            layout['Starts'], layout['Ends'], layout['Methods'], layout['Spreads'], 1., with_gradient=True)
+        rate_gradient = sp.csr_matrix(projection.gradient)
+
+        # discount factors and their gradients, rows of the cached integrated jacobian
+        t_pay = curve.times(layout['Payments'])
+        df = np.exp(-interpolator.integrate_batch(np.zeros_like(t_pay), t_pay))
+        df_gradient = sp.diags(-df) @ interpolator.integrated_query_jacobian
+
+        n = len(quotes)
+        model = np.zeros(n)
+        jacobian = sp.csr_matrix((n, interpolator.length))
+
+        swap_rows, nf = layout['SwapRows'], layout['NumFloating']
+        if nf > 0:
+            amount = projection.amount[swap_rows]
+            tau = projection.accrual[swap_rows]
+            df_float, df_fixed = df[:nf], df[nf:]
+            floating_pv = layout['Floating'] @ (amount * df_float)
+            annuity = layout['Fixed'] @ df_fixed
+            d_floating = layout['Floating'] @ (
+                sp.diags(tau * df_float) @ rate_gradient[swap_rows] + sp.diags(amount) @ df_gradient[:nf])
+            d_annuity = layout['Fixed'] @ df_gradient[nf:]
+            is_swap = annuity != 0.
+            safe_annuity = np.where(is_swap, annuity, 1.)
+            par = floating_pv / safe_annuity
+            model[is_swap] = par[is_swap]
+            # d par = (d floating - par d annuity) / annuity
+            jacobian = jacobian + sp.diags(np.where(is_swap, 1. / safe_annuity, 0.)) @ (d_floating - sp.diags(par) @ d_annuity)
+
+        future_rows = layout['FutureRows']
+        if len(future_rows) > 0:
+            owners = layout['FutureOwners']
+            model[owners] = projection.rate[future_rows]
+            selector = sp.csr_matrix((np.ones(len(owners)), (owners, np.arange(len(owners)))), shape=(n, len(owners)))
+            jacobian = jacobian + selector @ rate_gradient[future_rows]
+
+        return model, model - quotes, sp.csr_matrix(jacobian)
+
+    def calibrate(self, initial_rate : Optional[float]=0.03) -> CalibrationResult:
+        ### fits the curve, pillars at the instrument maturities, flat initial_rate as the starting point
+        start_time = time.perf_counter()
+        instruments = self._instruments()
+        curve = YieldCurve(
+            Date.from_serial(self.valuation_serial_),
+            instruments['MaturitySerial'].to_numpy(),
+            np.full(len(instruments), initial_rate),
+            self.accrual_basis_,
+            InterpMethod.PIECEWISE_CONSTANT_LEFT_CONTINUOUS,
+            ExtrapMethod.FLAT)
+        engine = OvernightIndexProjectionEngine.from_curve(self.on_index_handle_, curve, self.fixings_)
+        layout = self._layout(instruments)
+        t_pay = curve.times(layout['Payments'])
+        curve.interpolator.set_query_intervals(np.zeros_like(t_pay), t_pay)
+        quotes = instruments['Quote'].to_numpy()
+
+        model, residuals, jacobian = self._residuals(curve, engine, layout, quotes)
+        history = [float(np.max(np.abs(residuals)))]
+        while history[-1] > self.tolerance_ and len(history) <= self.max_iterations_:
+            step = spla.spsolve(sp.csc_matrix(jacobian), residuals)
+            if not np.all(np.isfinite(step)):
+                raise Exception('Calibration jacobian is singular.')
+            curve.set_values(curve.values - step)
+            model, residuals, jacobian = self._residuals(curve, engine, layout, quotes)
+            history.append(float(np.max(np.abs(residuals))))
+
+        instruments = instruments.assign(
+            Instrument=[f'{t}_{k}' for t, k in zip(instruments['Type'], instruments['Position'])],
+            Maturity=[Date.from_serial(int(s)).ISO() for s in instruments['MaturitySerial']],
+            Model=model,
+            Residual=residuals)[['Instrument', 'Maturity', 'Quote', 'Model', 'Residual']]
+        return CalibrationResult(
+            curve, instruments, history, history[-1] <= self.tolerance_,
+            time.perf_counter() - start_time, jacobian)
@@ -0,0 +1,317 @@
+import numpy as np
+import QuantLib as ql
+from typing import Dict, List, Optional, Union
+from fixedincomelib.date import Date, to_serials, year_fraction_batch
+from fixedincomelib.market.basics import AccrualBasis, HolidayConvention
+from fixedincomelib.market.calendars import BusinessDayIndex
+from fixedincomelib.market.curves import YieldCurve
+from fixedincomelib.market.data_conventions import CompoundingMethod
+from fixedincomelib.market.fixings import IndexFixingSeries
+from fixedincomelib.market.registries import IndexHandle, IndexRegistry
+from fixedincomelib.product.linear_products import ProductOvernightIndexCashflow
+from fixedincomelib.utilities.numerics import Interpolator1D
+
+### projection of overnight index cashflows off an instantaneous forward curve
+### the curve is an Interpolator1D of f(t), t the year fraction (time_basis) from the valuation date
+### the period [start, end) is cut at the index fixing days; the overnight rate r_i of the day
+### [d_i, d_{i+1}) with day count fraction delta_i is projected so that 1 + r_i delta_i = exp(int_{d_i}^{d_{i+1}} f),
+### which makes daily compounding telescope : prod_i (1 + r_i delta_i) = exp(int_{start}^{end} f)
+###   1) COMPOUND, no spread         : (exp(int f) - 1) / tau, one integral per cashflow
+###   2) SIMPLE                      : as above plus the spread, i.e., the spread is not compounded
+###   3) COMPOUND with spread        : (prod_i (1 + (r_i + s) delta_i) - 1) / tau, daily
+###   4) ARITHMETIC                  : sum_i r_i delta_i / tau + s, daily
+### tau = sum_i delta_i is the index day count fraction of the period
+### days fixed before the valuation date take their fixing from the series (daily path);
+### the daily path is vectorized over all the days of all the cashflows, in bounded chunks
+
+_methods = [CompoundingMethod.SIMPLE, CompoundingMethod.ARITHMETIC, CompoundingMethod.COMPOUND]
+_method_codes = {m : k for k, m in enumerate(_methods)}
+_simple, _arithmetic, _compound = range(3)
+
+# compiled fixing calendars of the indices, by QuantLib calendar name
+_fixing_calendar_indices : Dict[str, BusinessDayIndex] = {}
+
+def fixing_calendar_index(calendar : ql.Calendar) -> BusinessDayIndex:
+    # the index's own QuantLib calendar, HolidayConvention does not know every fixing calendar
+    index = _fixing_calendar_indices.get(calendar.name())
+    if index is None:
+        index = _fixing_calendar_indices.setdefault(
+            calendar.name(),
+            BusinessDayIndex(calendar, HolidayConvention._index_first, HolidayConvention._index_last))
+    return index
+
+class OvernightProjection:
+
+    ### projected period rates of a batch of cashflows, in input order
+    ###   rate = period rate, spread included; accrual = tau; amount = notional * rate * tau
+    ###   gradient (optional) = d rate / d forward curve values, one row per cashflow
+    ###   adjoint (optional) = the same, summed over cashflows against amount adjoints
+
+    def __init__(
+            self,
+            rate : np.ndarray,
+            accrual : np.ndarray,
+            notional : np.ndarray,
+            telescoped : np.ndarray,
+            gradient : Optional[np.ndarray]=None,
+            adjoint : Optional[np.ndarray]=None) -> None:
+        self.rate_ = rate
+        self.accrual_ = accrual
+        self.notional_ = notional
+        self.telescoped_ = telescoped
+        self.gradient_ = gradient
+        self.adjoint_ = adjoint
+
+    def __len__(self) -> int:
+        return len(self.rate_)
+
+    @property
+    def rate(self) -> np.ndarray:
+        return self.rate_
+
+    @property
+    def accrual(self) -> np.ndarray:
+        return self.accrual_
+
+    @property
+    def amount(self) -> np.ndarray:
+        return self.notional_ * self.rate_ * self.accrual_
+
+    @property
+    def amount_gradient(self) -> np.ndarray:
+        if self.gradient_ is None:
+            raise Exception('Projection was run without gradient.')
+        return (self.notional_ * self.accrual_)[:, None] * self.gradient_
+
+    @property
+    def telescoped(self) -> np.ndarray:
+        # whether the cashflow took the single integral path
+        return self.telescoped_
+
+    @property
+    def gradient(self) -> Optional[np.ndarray]:
+        return self.gradient_
+
+    @property
+    def adjoint(self) -> Optional[np.ndarray]:
+        # sum of amount_adjoints[i] * d amount_i / d forward curve values, if requested
+        return self.adjoint_
+
+class OvernightIndexProjectionEngine:
+
+    # bound on the number of overnight periods handled at once by the daily path
+    _max_days_per_chunk = 1 << 17
+
+    def __init__(
+            self,
+            on_index : Union[str, IndexHandle],
+            forward_curve : Interpolator1D,
+            valuation_date : Date,
+            time_basis : Optional[AccrualBasis]=AccrualBasis('ACT/365 FIXED'),
+            fixings : Optional[IndexFixingSeries]=None) -> None:
+
+        self.on_index_handle_ = IndexRegistry.resolve(on_index)
+        self.forward_curve_ = forward_curve
+        self.valuation_serial_ = Date(valuation_date).serialNumber()
+        self.time_basis_ = time_basis
+        self.fixings_ = fixings
+        index = self.on_index_handle_.index
+        self.day_counter_ = index.dayCounter()
+        self.calendar_index_ = fixing_calendar_index(index.fixingCalendar())
+        self.curve_ : Optional[YieldCurve] = None
+
+    @classmethod
+    def from_curve(
+            cls,
+            on_index : Union[str, IndexHandle],
+            curve : YieldCurve,
+            fixings : Optional[IndexFixingSeries]=None) -> 'OvernightIndexProjectionEngine':
+        # valued at the curve's reference date, times come from the curve's cached table
+        obj = cls(on_index, curve.interpolator, curve.reference_date, curve.accrual_basis, fixings)
+        obj.curve_ = curve
+        return obj
+
+    @property
+    def on_index_handle(self) -> IndexHandle:
+        return self.on_index_handle_
+
+    @property
+    def forward_curve(self) -> Interpolator1D:
+        return self.forward_curve_
+
+    @property
+    def valuation_date(self) -> Date:
+        return Date.from_serial(self.valuation_serial_)
+
+    def times(self, serials : np.ndarray) -> np.ndarray:
+        # curve time of serial dates
+        serials = np.asarray(serials, dtype=np.int64)
+        if self.curve_ is not None:
+            return self.curve_.times(serials)
+        return year_fraction_batch(np.full(serials.shape, self.valuation_serial_), serials, self.time_basis_)
+
+    def project(self, cashflows : List[ProductOvernightIndexCashflow], with_gradient : Optional[bool]=False) -> OvernightProjection:
+        ### cashflows on this engine's index, e.g., the floating legs of a book
+        name = self.on_index_handle_.name
+        for cf in cashflows:
+            if cf.on_index_str_.upper() != name:
+                raise Exception(f'Cashflow on {cf.on_index_str_} cannot be projected off a {name} curve.')
+        return self.project_arrays(
+            [cf.first_serial_ for cf in cashflows],
+            [cf.last_serial_ for cf in cashflows],
+            [cf.compounding_method for cf in cashflows],
+            [cf.spread for cf in cashflows],
+            [cf.notional for cf in cashflows],
+            with_gradient)
+
+    def project_arrays(
+            self,
+            start_dates,
+            end_dates,
+            compounding_methods : Union[CompoundingMethod, List[CompoundingMethod]],
+            spreads,
+            notionals=1.,
+            with_gradient : Optional[bool]=False,
+            amount_adjoints : Optional[np.ndarray]=None) -> OvernightProjection:
+
+        ### same as project, from columns (serials / Dates / iso strings, and one value or one per cashflow)
+        ### amount_adjoints (one per cashflow) asks for the reverse mode : sum_i amount_adjoints[i] * d amount_i / d values,
+        ### i.e., the projection's contribution to a bucketed delta, with no gradient row per cashflow
+        starts = to_serials(start_dates).astype(np.int64)
+        ends = to_serials(end_dates).astype(np.int64)
+        n = len(starts)
+        if np.any(ends <= starts):
+            raise Exception('Overnight periods must end after they start.')
+        if isinstance(compounding_methods, CompoundingMethod):
+            methods = np.full(n, _method_codes[compounding_methods], dtype=np.int8)
+        else:
+            methods = np.fromiter((_method_codes[m] for m in compounding_methods), dtype=np.int8, count=n)
+        spreads = np.broadcast_to(np.asarray(spreads, dtype=float), (n,)).copy()
+        notionals = np.broadcast_to(np.asarray(notionals, dtype=float), (n,)).copy()
+
+        tau = year_fraction_batch(starts, ends, self.day_counter_)
+        rate = np.zeros(n, dtype=float)
+        gradient = np.zeros((n, self.forward_curve_.length), dtype=float) if with_gradient else None
+        adjoint, rate_adjoints = None, None
+        if amount_adjoints is not None:
+            adjoint = np.zeros(self.forward_curve_.length, dtype=float)
+            rate_adjoints = np.broadcast_to(np.asarray(amount_adjoints, dtype=float), (n,)) * notionals * tau
+
+        # single integral unless the spread is compounded or averaged, or part of the period is fixed
+        telescoped = ((methods == _simple) | ((methods == _compound) & (spreads == 0.))) & \
+            (starts >= self.valuation_serial_)
+        k = np.flatnonzero(telescoped)
+        if len(k) > 0:
+            t_s, t_e = self.times(starts[k]), self.times(ends[k])
+            growth = np.exp(self.forward_curve_.integrate_batch(t_s, t_e))
+            rate[k] = (growth - 1.) / tau[k] + np.where(methods[k] == _simple, spreads[k], 0.)
+            if with_gradient:
+                gradient[k] = (growth / tau[k])[:, None] * \
+                    self.forward_curve_.gradient_of_integrated_value_wrt_ordinate_batch(t_s, t_e)
+            if adjoint is not None:
+                adjoint += self.forward_curve_.adjoint_of_integrated_value_wrt_ordinate_batch(
+                    t_s, t_e, rate_adjoints[k] * growth / tau[k])
+
+        daily = np.flatnonzero(~telescoped)
+        if len(daily) > 0:
+            for chunk in self._daily_chunks(starts[daily], ends[daily]):
+                members = daily[chunk]
+                rate[members], grad, adj = self._project_daily(
+                    starts[members], ends[members], methods[members], spreads[members], tau[members], with_gradient,
+                    None if rate_adjoints is None else rate_adjoints[members])
+                if with_gradient:
+                    gradient[members] = grad
+                if adjoint is not None:
+                    adjoint += adj
+
+        return OvernightProjection(rate, tau, notionals, telescoped, gradient, adjoint)
+
+    ### daily path
+
+    def _daily_chunks(self, starts : np.ndarray, ends : np.ndarray) -> List[np.ndarray]:
+        # consecutive cashflows whose overnight periods add up to at most _max_days_per_chunk
+        num_days = self._num_days(starts, ends)
+        cum = np.cumsum(num_days)
+        chunk_id = (cum - 1) // self._max_days_per_chunk
+        bounds = np.flatnonzero(np.diff(chunk_id)) + 1
+        return np.split(np.arange(len(starts)), bounds)
+
+    def _num_days(self, starts : np.ndarray, ends : np.ndarray) -> np.ndarray:
+        days = self.calendar_index_.business_days_
+        return np.searchsorted(days, ends, side='left') - np.searchsorted(days, starts, side='right') + 1
+
+    def _overnight_periods(self, starts : np.ndarray, ends : np.ndarray):
+        ### [d_i, d_{i+1}) of every cashflow, cut at the fixing days strictly inside (start, end)
+        bdi = self.calendar_index_
+        if not (np.all(bdi.in_range(starts)) and np.all(bdi.in_range(ends))):
+            raise Exception('Overnight periods outside the compiled calendar range.')
+        days = bdi.business_days_
+        lo = np.searchsorted(days, starts, side='right')
+        inside = np.searchsorted(days, ends, side='left') - lo
+        counts = inside + 1
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        owner = np.repeat(np.arange(len(starts)), counts)
+        j = np.arange(offsets[-1]) - offsets[owner]
+        left = np.where(j == 0, starts[owner], days[np.clip(lo[owner] + j - 1, 0, len(days) - 1)])
+        right = np.where(j == inside[owner], ends[owner], days[np.clip(lo[owner] + j, 0, len(days) - 1)])
+        return left.astype(np.int64), right.astype(np.int64), owner, offsets
+
+    def _project_daily(self, starts, ends, methods, spreads, tau, with_gradient, rate_adjoints=None):
+        left, right, owner, offsets = self._overnight_periods(starts, ends)
+        delta = year_fraction_batch(left, right, self.day_counter_)
+        s = spreads[owner]
+
+        # r_i delta_i, projected or fixed
+        fixed = left < self.valuation_serial_
+        r_delta = np.empty(len(left), dtype=float)
+        projected = np.flatnonzero(~fixed)
+        t_l, t_r = self.times(left[projected]), self.times(right[projected])
+        day_growth = np.exp(self.forward_curve_.integrate_batch(t_l, t_r))
+        r_delta[projected] = day_growth - 1.
+        if np.any(fixed):
+            r_delta[fixed] = self._fixed_rates(left[fixed]) * delta[fixed]
+
+        method = methods[owner]
+        # the spread is only compounded by COMPOUND, SIMPLE adds it outside
+        growth = 1. + r_delta + np.where(method == _compound, s * delta, 0.)
+        log_factor = np.add.reduceat(np.log(growth), offsets[:-1])
+        compounded = (np.exp(log_factor) - 1.) / tau
+        averaged = np.add.reduceat(r_delta, offsets[:-1]) / tau
+        rate = np.where(methods == _arithmetic, averaged, compounded) + \
+            np.where(methods == _compound, 0., spreads)
+
+        if not with_gradient and rate_adjoints is None:
+            return rate, None, None
+        # d rate / d (int f over day i), chained to the curve values through the integral jacobian
+        # fixed days do not move with the curve
+        exp_integral = np.zeros(len(left), dtype=float)
+        exp_integral[projected] = day_growth
+        weights = np.where(
+            method == _arithmetic,
+            exp_integral / tau[owner],
+            np.exp(log_factor)[owner] * exp_integral / growth / tau[owner])
+        adjoint = None
+        if rate_adjoints is not None:
+            adjoint = self.forward_curve_.adjoint_of_integrated_value_wrt_ordinate_batch(
+                t_l, t_r, weights[projected] * rate_adjoints[owner[projected]])
+        if not with_gradient:
+            return rate, None, adjoint
+        gradient = np.zeros((len(starts), self.forward_curve_.length), dtype=float)
+        if len(projected) > 0:
+            rows = self.forward_curve_.gradient_of_integrated_value_wrt_ordinate_batch(t_l, t_r) * \
+                weights[projected][:, None]
+            # owners are sorted, one segment sum per cashflow
+            members, first = np.unique(owner[projected], return_index=True)
+            gradient[members] = np.add.reduceat(rows, first, axis=0)
+        return rate, gradient, adjoint
+
+    def _fixed_rates(self, serials : np.ndarray) -> np.ndarray:
+        # fixing of the day, or of the last fixing day before it when the period starts on a holiday
+        if self.fixings_ is None:
+            raise Exception(f'{self.on_index_handle_.name} fixings are needed for periods before the valuation date.')
+        fixing_days = self.calendar_index_.adjust(serials, ql.Preceding)
+        res, missing = self.fixings_.get_many(fixing_days)
+        if np.any(missing):
+            first = Date.from_serial(int(fixing_days[np.argmax(missing)]))
+            raise Exception(f'Cannot find {self.on_index_handle_.name} fixing for {first.ISO()}.')
+        return res
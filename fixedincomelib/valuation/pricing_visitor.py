@@ -0,0 +1,352 @@
+import numpy as np
+import pandas as pd
+from functools import singledispatchmethod
+from typing import Dict, Hashable, List, Optional, Union
+from fixedincomelib.date import Date, year_fraction_batch
+from fixedincomelib.market.basics import AccrualBasis
+from fixedincomelib.market.curves import YieldCurve
+from fixedincomelib.market.registries import IndexRegistry
+from fixedincomelib.product.product_interfaces import Product, ProductVisitor
+from fixedincomelib.product.product_portfolio import ProductPortfolio, MutableProductPortfolio
+from fixedincomelib.product.utilities import LongOrShort
+from fixedincomelib.product.linear_products import (
+    ProductBulletCashflow,
+    ProductFixedAccrued,
+    ProductOvernightIndexCashflow,
+    ProductRFRSwap,
+    InterestRateStream)
+from fixedincomelib.utilities.numerics import Interpolator1D
+from fixedincomelib.valuation.overnight_projection import OvernightIndexProjectionEngine
+
+### PV and annuity of a product tree, priced by leaf cashflow type rather than product by product
+### visit walks the tree once (portfolios, swaps and their legs) and only gathers columns per leaf type,
+### streams hand over their schedule arrays, so no cashflow product is built;
+### price runs one vectorized kernel per leaf type and scatters the weighted results onto the top level elements
+###   1) bullet      : pv = +/- notional * df
+###   2) fixed       : pv = rate * notional * accrued * df, annuity = notional * accrued * df
+###                    (rate is the stream's fixed rate, 1 for a standalone ProductFixedAccrued)
+###   3) overnight   : pv = notional * projected rate * tau * df, one projection per index and compounding method
+### df = exp(-int_0^t f) off the discount curve, an instantaneous forward Interpolator1D on time from the valuation date
+### (or a YieldCurve, see from_curve);
+### cashflows paid before the valuation date are worth nothing
+### bucketed_delta runs the same pass in reverse : leaf adjoints go through the discount integrals and the projection
+### to d PV / d curve values (see Interpolator1D.adjoint_of_integrated_value_wrt_ordinate_batch)
+
+class LeafColumns:
+
+    ### leaves of one type, gathered in chunks (a stream is one chunk)
+    ### array columns hold one array per chunk, scalar columns one value per chunk, repeated on read;
+    ### a column is either kind for every chunk
+
+    def __init__(self) -> None:
+        self.counts_ : List[int] = []
+        self.arrays_ : Dict[str, list] = {}
+        self.scalars_ : Dict[str, list] = {}
+
+    def __len__(self) -> int:
+        return len(self.counts_)
+
+    def append(self, n : int, arrays : Dict[str, np.ndarray], scalars : Dict[str, object]) -> None:
+        self.counts_.append(n)
+        for name, value in arrays.items():
+            self.arrays_.setdefault(name, []).append(value)
+        for name, value in scalars.items():
+            self.scalars_.setdefault(name, []).append(value)
+
+    def column(self, name : str, dtype=float) -> np.ndarray:
+        if name in self.arrays_:
+            return np.concatenate(self.arrays_[name]).astype(dtype, copy=False)
+        return np.repeat(np.asarray(self.scalars_[name], dtype=dtype), self.counts_)
+
+    def chunk_values(self, name : str) -> list:
+        # the scalar of each chunk, e.g., to split leaves by a non numeric attribute
+        return self.scalars_[name]
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.asarray(self.counts_, dtype=np.int64)
+
+class ProductPricingVisitor(ProductVisitor):
+
+    def __init__(
+            self,
+            discount_curve : Interpolator1D,
+            valuation_date : Date,
+            projection_engines : Union[OvernightIndexProjectionEngine, List[OvernightIndexProjectionEngine]],
+            time_basis : Optional[AccrualBasis]=AccrualBasis('ACT/365 FIXED')) -> None:
+
+        super().__init__()
+        self.discount_curve_ = discount_curve
+        self.valuation_serial_ = Date(valuation_date).serialNumber()
+        self.time_basis_ = time_basis
+        if isinstance(projection_engines, OvernightIndexProjectionEngine):
+            projection_engines = [projection_engines]
+        self.projection_engines_ : Dict[str, OvernightIndexProjectionEngine] = \
+            {e.on_index_handle.name.upper() : e for e in projection_engines}
+        self.curve_ : Optional[YieldCurve] = None
+        self.clear()
+
+    @classmethod
+    def from_curve(
+            cls,
+            discount_curve : YieldCurve,
+            projection_engines : Union[OvernightIndexProjectionEngine, List[OvernightIndexProjectionEngine]]) -> 'ProductPricingVisitor':
+        # valued at the curve's reference date, discount factors come from the curve
+        obj = cls(discount_curve.interpolator, discount_curve.reference_date, projection_engines, discount_curve.accrual_basis)
+        obj.curve_ = discount_curve
+        return obj
+
+    def clear(self) -> None:
+        # top level elements and the gathered leaves
+        self.labels_ : List[Hashable] = []
+        self.owner_ = -1
+        self.weight_ = 1.
+        self.depth_ = 0
+        self.bullet_ = LeafColumns()
+        self.fixed_ = LeafColumns()
+        self.overnight_ : Dict[str, LeafColumns] = {}
+        self.results_ : Optional[pd.DataFrame] = None
+
+    ### gathering
+
+    def _overnight(self, index_name : str) -> LeafColumns:
+        name = index_name.upper()
+        if name not in self.projection_engines_:
+            raise Exception(f'No projection engine for {index_name}.')
+        columns = self.overnight_.get(name)
+        if columns is None:
+            columns = self.overnight_[name] = LeafColumns()
+        return columns
+
+    def _leaf(self) -> None:
+        # a product visited on its own is its own top level element
+        self.results_ = None
+        if self.depth_ == 0:
+            self.owner_, self.weight_ = len(self.labels_), 1.
+            self.labels_.append(len(self.labels_))
+
+    def _visit_elements(self, elements) -> None:
+        # elements of a portfolio are the top level at the root, otherwise they price into their owner
+        self.results_ = None
+        root = self.depth_ == 0
+        parent_weight = self.weight_
+        self.depth_ += 1
+        try:
+            for label, product, weight in elements:
+                if root:
+                    self.owner_ = len(self.labels_)
+                    self.labels_.append(label)
+                self.weight_ = weight if root else parent_weight * weight
+                product.accept(self)
+        finally:
+            self.depth_ -= 1
+            self.weight_ = parent_weight
+
+    def _gather_stream(self, stream : InterestRateStream) -> None:
+        # schedule arrays as they are, nothing per period
+        n = stream.num_cashflows()
+        scalars = {'Owner' : self.owner_, 'Weight' : self.weight_, 'Notional' : stream.stream_notional_}
+        if stream.float_index_:
+            index_name = stream.float_index_ if isinstance(stream.float_index_, str) \
+                else IndexRegistry.resolve(stream.float_index_).name
+            scalars.update(Method=stream.ois_compounding_, Spread=stream.ois_spread_)
+            self._overnight(index_name).append(n, {
+                'StartDate' : stream.start_dates,
+                'EndDate' : stream.end_dates,
+                'PaymentDate' : stream.payment_dates}, scalars)
+        else:
+            scalars.update(Rate=stream.fixed_rate_)
+            self.fixed_.append(n, {'PaymentDate' : stream.payment_dates, 'Accrued' : stream.accrued}, scalars)
+
+    @singledispatchmethod
+    def visit(self, product : Product):
+        raise NotImplementedError(f'No pricing for {product.product_type}.')
+
+    @visit.register
+    def _(self, product : ProductPortfolio):
+        self._visit_elements((i, p, w) for i, (p, w) in enumerate(product.elements_))
+        return self
+
+    @visit.register
+    def _(self, product : MutableProductPortfolio):
+        self._visit_elements((h, product.element(h), product.weight(h)) for h in product.handles)
+        return self
+
+    @visit.register
+    def _(self, product : InterestRateStream):
+        self._leaf()
+        self._gather_stream(product)
+        return self
+
+    @visit.register
+    def _(self, product : ProductRFRSwap):
+        self._leaf()
+        if product.floating_leg_ is None:
+            product._build_legs()
+        self._gather_stream(product.floating_leg_)
+        self._gather_stream(product.fixed_leg_)
+        return self
+
+    @visit.register
+    def _(self, product : ProductOvernightIndexCashflow):
+        self._leaf()
+        self._overnight(product.on_index_str_).append(1, {
+            'StartDate' : np.array([product.first_serial_]),
+            'EndDate' : np.array([product.last_serial_]),
+            'PaymentDate' : np.array([product.payment_serial_])}, {
+            'Owner' : self.owner_,
+            'Weight' : self.weight_,
+            'Method' : product.compounding_method,
+            'Spread' : product.spread,
+            'Notional' : product.notional})
+        return self
+
+    @visit.register
+    def _(self, product : ProductFixedAccrued):
+        self._leaf()
+        self.fixed_.append(1, {
+            'PaymentDate' : np.array([product.payment_serial_]),
+            'Accrued' : np.array([product.accrued])}, {
+            'Owner' : self.owner_,
+            'Weight' : self.weight_,
+            'Rate' : 1.,
+            'Notional' : product.notional})
+        return self
+
+    @visit.register
+    def _(self, product : ProductBulletCashflow):
+        self._leaf()
+        sign = -1. if product.long_or_short == LongOrShort.SHORT else 1.
+        self.bullet_.append(1, {}, {
+            'Owner' : self.owner_,
+            'Weight' : self.weight_,
+            'PaymentDate' : product.payment_serial_,
+            'Notional' : sign * product.notional})
+        return self
+
+    ### pricing
+
+    def _payment_times(self, payment_serials : np.ndarray) -> np.ndarray:
+        if self.curve_ is not None:
+            return self.curve_.times(payment_serials)
+        return year_fraction_batch(np.full(payment_serials.shape, self.valuation_serial_), payment_serials, self.time_basis_)
+
+    def discount_factors(self, payment_serials : np.ndarray) -> np.ndarray:
+        # zero for payments before the valuation date
+        payment_serials = np.asarray(payment_serials, dtype=np.int64)
+        t = self._payment_times(payment_serials)
+        df = np.exp(-self.discount_curve_.integrate_batch(np.zeros_like(t), t))
+        return np.where(payment_serials < self.valuation_serial_, 0., df)
+
+    ### kernels : undiscounted leaves against discount factors, plus the projection adjoint when asked
+    ### (amount_adjoints = d pv / d amount of each leaf)
+
+    def _price_bullet(self, leaves : LeafColumns, df : np.ndarray, amount_adjoints : Optional[np.ndarray]):
+        pv = leaves.column('Notional') * df
+        return pv, np.zeros_like(pv), None
+
+    def _price_fixed(self, leaves : LeafColumns, df : np.ndarray, amount_adjoints : Optional[np.ndarray]):
+        annuity = leaves.column('Notional') * leaves.column('Accrued') * df
+        return leaves.column('Rate') * annuity, annuity, None
+
+    def _price_overnight(self, engine : OvernightIndexProjectionEngine, leaves : LeafColumns, df : np.ndarray, amount_adjoints : Optional[np.ndarray]):
+        # one projection per compounding method, a book rarely has more than one
+        starts, ends = leaves.column('StartDate', np.int64), leaves.column('EndDate', np.int64)
+        spreads, notionals = leaves.column('Spread'), leaves.column('Notional')
+        chunk_methods = leaves.chunk_values('Method')
+        methods = np.repeat(np.array([m.value for m in chunk_methods]), leaves.counts)
+        amount = np.zeros(len(starts))
+        adjoint = None if amount_adjoints is None else np.zeros(engine.forward_curve.length)
+        for method in set(chunk_methods):
+            k = np.flatnonzero(methods == method.value)
+            projection = engine.project_arrays(
+                starts[k], ends[k], method, spreads[k], notionals[k],
+                amount_adjoints=None if amount_adjoints is None else amount_adjoints[k])
+            amount[k] = projection.amount
+            if adjoint is not None:
+                adjoint += projection.adjoint
+        pv = amount * df
+        return pv, np.zeros_like(pv), adjoint
+
+    def _groups(self) -> list:
+        # (curve label, kernel, leaves), the label is that of the projection curve if any
+        groups = [(None, self._price_bullet, self.bullet_), (None, self._price_fixed, self.fixed_)]
+        groups += [(name, lambda c, d, a, e=self.projection_engines_[name]: self._price_overnight(e, c, d, a), leaves)
+                   for name, leaves in self.overnight_.items()]
+        return [g for g in groups if len(g[2]) > 0]
+
+    def _sweep(self, with_delta : bool):
+        ### one pass over the leaf types; with_delta adds the reverse pass, adjoints of each leaf
+        ### pushed through the discount integrals and the projection to the curve values
+        n = len(self.labels_)
+        pv, annuity = np.zeros(n), np.zeros(n)
+        deltas = {id(c[0]) : np.zeros(c[0].length) for c in self.delta_curves} if with_delta else None
+        for name, kernel, leaves in self._groups():
+            owner = leaves.column('Owner', np.int64)
+            weight = leaves.column('Weight')
+            payments = leaves.column('PaymentDate', np.int64)
+            df = self.discount_factors(payments)
+            leaf_pv, leaf_annuity, projection_adjoint = kernel(leaves, df, weight * df if with_delta else None)
+            pv += np.bincount(owner, weights=weight * leaf_pv, minlength=n)
+            annuity += np.bincount(owner, weights=weight * leaf_annuity, minlength=n)
+            if with_delta:
+                # pv = amount * exp(-int_0^t f), so d pv / d int_0^t f = -pv
+                t = self._payment_times(payments)
+                deltas[id(self.discount_curve_)] += self.discount_curve_.adjoint_of_integrated_value_wrt_ordinate_batch(
+                    np.zeros_like(t), t, -weight * leaf_pv)
+                if projection_adjoint is not None:
+                    deltas[id(self.projection_engines_[name].forward_curve)] += projection_adjoint
+        return pv, annuity, deltas
+
+    def price(self) -> pd.DataFrame:
+        ### PV and annuity of each top level element, weights applied
+        if self.results_ is not None:
+            return self.results_
+        pv, annuity, _ = self._sweep(False)
+        self.results_ = pd.DataFrame({'Element' : self.labels_, 'PV' : pv, 'Annuity' : annuity})
+        return self.results_
+
+    def revalue(self) -> pd.DataFrame:
+        # the kernels again on the gathered leaves, e.g., after the curves moved
+        self.results_ = None
+        return self.price()
+
+    @property
+    def delta_curves(self) -> list:
+        # [interpolator, labels, pillar serials or None] of each distinct curve, discount first
+        curves = [[self.discount_curve_, ['DISCOUNT'], None if self.curve_ is None else self.curve_.pillar_serials]]
+        for name, engine in self.projection_engines_.items():
+            curve = next((c for c in curves if c[0] is engine.forward_curve), None)
+            if curve is None:
+                curves.append([engine.forward_curve, [name], None if engine.curve_ is None else engine.curve_.pillar_serials])
+            else:
+                curve[1].append(name)
+        return curves
+
+    def bucketed_delta(self, scale : Optional[float]=1e-4) -> pd.DataFrame:
+        ### d PV / d curve values of the whole tree, times scale (a basis point by default), one row per curve pillar
+        ### reverse mode : one pricing pass and one adjoint pass, whatever the number of pillars
+        pv, annuity, deltas = self._sweep(True)
+        self.results_ = pd.DataFrame({'Element' : self.labels_, 'PV' : pv, 'Annuity' : annuity})
+        return _delta_frame(self.delta_curves, [deltas[id(c[0])] * scale for c in self.delta_curves])
+
+    @property
+    def pv(self) -> float:
+        return float(self.price()['PV'].sum())
+
+    @property
+    def annuity(self) -> float:
+        return float(self.price()['Annuity'].sum())
+
+def _delta_frame(curves : list, deltas : List[np.ndarray]) -> pd.DataFrame:
+    # Curve, Pillar (iso date when known), Time and Delta, curves as in ProductPricingVisitor.delta_curves
+    frames = []
+    for (interpolator, labels, pillar_serials), delta in zip(curves, deltas):
+        pillars = [None] * interpolator.length if pillar_serials is None \
+            else [Date.from_serial(int(x)).ISO() for x in pillar_serials]
+        frames.append(pd.DataFrame({
+            'Curve' : '/'.join(labels),
+            'Pillar' : pillars,
+            'Time' : interpolator.axis1,
+            'Delta' : delta}))
+    return pd.concat(frames, ignore_index=True)
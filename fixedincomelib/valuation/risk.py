@@ -0,0 +1,47 @@
+import time
+import numpy as np
+import pandas as pd
+from typing import Optional
+from fixedincomelib.valuation.pricing_visitor import ProductPricingVisitor, _delta_frame
+
+### bucketed delta by bump and revalue, the reference for ProductPricingVisitor.bucketed_delta
+### each pillar of each curve is bumped up and down and the gathered leaves are repriced (central difference),
+### i.e., two revaluations per pillar against one pricing and one adjoint pass
+
+def bump_and_revalue_delta(visitor : ProductPricingVisitor, bump : Optional[float]=1e-4, scale : Optional[float]=1e-4) -> pd.DataFrame:
+    # same layout as bucketed_delta, the curves are restored afterwards
+    curves = visitor.delta_curves
+    deltas = []
+    for interpolator, _, _ in curves:
+        base = interpolator.values.copy()
+        delta = np.zeros(interpolator.length)
+        try:
+            for j in range(interpolator.length):
+                values = base.copy()
+                values[j] += bump
+                interpolator.set_values(values)
+                up = visitor.revalue()['PV'].sum()
+                values[j] -= 2. * bump
+                interpolator.set_values(values)
+                down = visitor.revalue()['PV'].sum()
+                delta[j] = (up - down) / (2. * bump) * scale
+        finally:
+            interpolator.set_values(base)
+            visitor.revalue()
+        deltas.append(delta)
+    return _delta_frame(curves, deltas)
+
+def compare_bucketed_delta(visitor : ProductPricingVisitor, bump : Optional[float]=1e-4, scale : Optional[float]=1e-4) -> pd.DataFrame:
+    ### adjoint against bump and revalue, pillar by pillar, with the time each took (same on every row)
+    start = time.perf_counter()
+    adjoint = visitor.bucketed_delta(scale)
+    adjoint_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    bumped = bump_and_revalue_delta(visitor, bump, scale)
+    bumped_seconds = time.perf_counter() - start
+    res = adjoint.rename(columns={'Delta' : 'Adjoint'})
+    res['BumpAndRevalue'] = bumped['Delta'].to_numpy()
+    res['Difference'] = res['Adjoint'] - res['BumpAndRevalue']
+    res['AdjointSeconds'] = adjoint_seconds
+    res['BumpAndRevalueSeconds'] = bumped_seconds
+    return res
@@ -0,0 +1,11 @@
+import os
+import pytest
+
+### the registries read ../fixedincomelib/static_files, so tests run from a directory next to fixedincomelib
+
+@pytest.fixture(autouse=True, scope='session')
+def _library_directory():
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    yield
+    os.chdir(cwd)
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from fixedincomelib.date import Date
+from fixedincomelib.market import AccrualBasis
+from fixedincomelib.product.linear_products import ProductRFRSwap
+from fixedincomelib.valuation import CurveCalibrator, OvernightIndexProjectionEngine, ProductPricingVisitor
+from fixedincomelib.benchmarks.books import sofr_curve_quotes
+
+### SOFR curve off spot starting OIS and 3M futures : the fitted curve reprices every instrument,
+### the analytic jacobian matches finite differences, degenerate instrument sets are refused
+
+_valuation_date = '2025-01-02'
+
+@pytest.fixture(scope='module')
+def quotes():
+    swaps, futures = sofr_curve_quotes(_valuation_date)
+    return ProductRFRSwap.deserialize_many(swaps), futures
+
+def _calibrator(swaps, futures) -> CurveCalibrator:
+    calibrator = CurveCalibrator('SOFR-1B', _valuation_date)
+    for swap in swaps:
+        calibrator.add_swap(swap)
+    for future in futures:
+        calibrator.add_future(*future)
+    return calibrator
+
+@pytest.fixture(scope='module')
+def calibrated(quotes):
+    calibrator = _calibrator(*quotes)
+    return calibrator, calibrator.calibrate()
+
+def test_calibration_converges(quotes, calibrated):
+    _, result = calibrated
+    assert result.converged
+    assert result.iterations <= 6
+    assert len(result.curve.pillar_serials) == len(quotes[0]) + len(quotes[1])
+    assert np.abs(result.residuals).max() <= 1e-12
+
+def test_swaps_reprice_at_par(quotes, calibrated):
+    # independent pricer, quotes are the swaps' own fixed rates so each is worth nothing
+    swaps, _ = quotes
+    curve = calibrated[1].curve
+    visitor = ProductPricingVisitor.from_curve(curve, OvernightIndexProjectionEngine.from_curve('SOFR-1B', curve))
+    for swap in swaps:
+        swap.accept(visitor)
+    pv = visitor.price()['PV'].to_numpy()
+    assert np.abs(pv).max() < 1e-6
+
+def test_futures_reprice(quotes, calibrated):
+    # compounded SOFR over an IMM period telescopes to the curve's simple forward, ACT/360
+    _, futures = quotes
+    curve = calibrated[1].curve
+    forwards = curve.forward_rates([f[0] for f in futures], [f[1] for f in futures], AccrualBasis('ACT/360'))
+    np.testing.assert_allclose(forwards, [(100. - f[2]) / 100. for f in futures], rtol=0., atol=1e-10)
+
+def test_jacobian_matches_finite_differences(calibrated):
+    calibrator, result = calibrated
+    curve = result.curve
+    engine = OvernightIndexProjectionEngine.from_curve('SOFR-1B', curve)
+    instruments = calibrator._instruments()
+    layout = calibrator._layout(instruments)
+    quotes = instruments['Quote'].to_numpy()
+    base, h = curve.values.copy(), 1e-7
+    finite = np.zeros((len(base), len(base)))
+    try:
+        for j in range(len(base)):
+            values = base.copy()
+            values[j] += h
+            curve.set_values(values)
+            up = calibrator._residuals(curve, engine, layout, quotes)[1]
+            values[j] -= 2. * h
+            curve.set_values(values)
+            down = calibrator._residuals(curve, engine, layout, quotes)[1]
+            finite[:, j] = (up - down) / (2. * h)
+    finally:
+        curve.set_values(base)
+    np.testing.assert_allclose(result.jacobian.toarray(), finite, rtol=0., atol=1e-7)
+
+def test_duplicate_maturities_are_refused(quotes):
+    swaps, futures = quotes
+    calibrator = _calibrator(swaps[:3], [])
+    calibrator.add_swap(swaps[1], 0.04)
+    with pytest.raises(Exception, match='distinct dates'):
+        calibrator.calibrate()
+
+def test_empty_instrument_set_is_refused():
+    with pytest.raises(Exception, match='No instruments'):
+        CurveCalibrator('SOFR-1B', _valuation_date).calibrate()
+
+def test_expired_instruments_are_refused(quotes):
+    _, futures = quotes
+    calibrator = _calibrator([], futures[:2])
+    calibrator.add_future('2024-09-18', '2024-12-18', 95.5)
+    with pytest.raises(Exception, match='mature after the valuation date'):
+        calibrator.calibrate()
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from fixedincomelib.utilities.numerics import ExtrapMethod, InterpMethod, InterpolatorFactory
+
+### registered query points / intervals must not change what the scalar gradients hand out
+
+_methods = [InterpMethod.PIECEWISE_CONSTANT_LEFT_CONTINUOUS, InterpMethod.LINEAR, InterpMethod.LOG_LINEAR]
+
+def _interpolator(method):
+    return InterpolatorFactory.create_1d_interpolator(
+        np.array([0.5, 1., 2., 5., 10.]), np.array([0.03, 0.035, 0.04, 0.038, 0.036]), method, ExtrapMethod.FLAT)
+
+@pytest.mark.parametrize('method', _methods)
+def test_registered_gradients_are_fresh_arrays(method):
+    plain, registered = _interpolator(method), _interpolator(method)
+    registered.set_query_points(np.array([0.7, 3.]))
+    registered.set_query_intervals(np.array([0., 1.]), np.array([3., 7.]))
+    for _ in range(2):
+        grad = registered.gradient_wrt_ordinate(3.)
+        np.testing.assert_allclose(grad, plain.gradient_wrt_ordinate(3.))
+        grad *= 2.
+        grad = registered.gradient_of_integrated_value_wrt_ordinate(1., 7.)
+        np.testing.assert_allclose(grad, plain.gradient_of_integrated_value_wrt_ordinate(1., 7.))
+        grad += 1.
+
+@pytest.mark.parametrize('method', _methods)
+def test_registered_lookup_normalizes_scalars(method):
+    interp = _interpolator(method)
+    interp.set_query_points(np.array([3.]))
+    expected = interp.gradient_wrt_ordinate(3.)
+    np.testing.assert_allclose(interp.gradient_wrt_ordinate(np.float64(3.)), expected)
+    np.testing.assert_allclose(interp.gradient_wrt_ordinate(np.array(3.)), expected)
+    # not a scalar, so not a registered point
+    assert interp._cached_gradient(np.array([3.])) is None
+
+@pytest.mark.parametrize('method', [InterpMethod.LINEAR, InterpMethod.LOG_LINEAR])
+def test_segmented_axis_stays_strictly_increasing(method):
+    interp = _interpolator(method)
+    with pytest.raises(AssertionError):
+        interp.set_axis1(np.array([0.5, 1., 1., 5., 10.]))
@@ -0,0 +1,53 @@
+import pickle
+import pytest
+from fixedincomelib import *
+from fixedincomelib.product import ProductPortfolio
+from fixedincomelib.product.product_store import read_product_layout
+
+### columnar product files : ragged nested books round trip, filters pick top level elements,
+### legacy pickles are filtered the same way
+
+def _swap(term : str, index : str='SOFR-1B'):
+    return qfCreateProductRFRSwap('2025-05-25', term, '2D', index, 0.04, 'pay', 1e6, '3M', 'ACT/360', '', 'MF', 'USGS', 0.005, 'compound')
+
+def _shape(product):
+    # structure, weights and the leaves' identity
+    if type(product) is ProductPortfolio:
+        return [(_shape(product.element(i)), product.weight(i)) for i in range(product.num_elemnts)]
+    return (product.product_type, product.first_date.ISO(), product.last_date.ISO(), product.notional)
+
+@pytest.fixture(scope='module')
+def ragged_book():
+    s2, s5, s10 = _swap('2Y'), _swap('5Y'), _swap('10Y')
+    inner = ProductPortfolio([s10, ProductPortfolio([s2, s5], [4., 5.])], [6., 7.])
+    return ProductPortfolio([ProductPortfolio([s2]), ProductPortfolio([s2, s5, s10], [1., 2., 3.]), s5, inner], [2., 1., .5, .25])
+
+def test_ragged_nested_round_trip(ragged_book, tmp_path):
+    path = str(tmp_path / 'book.qfp')
+    qfWriteProductToFile(ragged_book, path)
+    assert _shape(qfReadProductFromFile(path)) == _shape(ragged_book)
+    assert _shape(qfReadProductFromFile(path, num_workers=2)) == _shape(ragged_book)
+    assert read_product_layout(path)['NUM_ELEMENTS'] == 4
+
+def test_filters_select_top_level_elements(ragged_book, tmp_path):
+    path = str(tmp_path / 'book.qfp')
+    qfWriteProductToFile(ragged_book, path)
+    expected = ragged_book.select(maturity_from=Date('2030-01-01'))
+    assert _shape(qfReadProductFromFile(path, maturity_from='2030-01-01')) == _shape(expected)
+    assert _shape(qfReadProductFromFile(path, product_type='PRODUCT_RFR_SWAP')) == [(_shape(ragged_book.element(2)), .5)]
+
+def test_legacy_pickle_is_filtered(ragged_book, tmp_path):
+    path = str(tmp_path / 'book.pkl')
+    with open(path, 'wb') as handle:
+        pickle.dump(ragged_book.serialize(), handle)
+    assert _shape(qfReadProductFromFile(path)) == _shape(ragged_book)
+    assert _shape(qfReadProductFromFile(path, maturity_from='2030-01-01')) == \
+        _shape(ragged_book.select(maturity_from=Date('2030-01-01')))
+    with pytest.raises(Exception, match='No product matches'):
+        qfReadProductFromFile(path, currency='EUR')
+
+def test_portfolio_subclasses_are_rejected(ragged_book, tmp_path):
+    stream = _swap('2Y').floating_leg_
+    for product in [stream, ProductPortfolio([ragged_book, stream])]:
+        with pytest.raises(Exception, match='cannot be written'):
+            qfWriteProductToFile(product, str(tmp_path / 'stream.qfp'))
@@ -0,0 +1,33 @@
+import pytest
+from fixedincomelib.market.registries import IndexRegistry
+
+### a registry whose static file is not found is empty, not broken
+
+@pytest.fixture
+def empty_index_registry(tmp_path, monkeypatch):
+    # a fresh singleton built where there is no ../fixedincomelib/static_files
+    saved = IndexRegistry._instance
+    monkeypatch.chdir(tmp_path)
+    IndexRegistry._instance = None
+    try:
+        yield IndexRegistry()
+    finally:
+        IndexRegistry._instance = saved
+
+def test_empty_index_registry_lookups(empty_index_registry):
+    assert empty_index_registry.get_keys == []
+    for lookup in [
+        lambda: empty_index_registry.get('SOFR-1B'),
+        lambda: empty_index_registry.get_handle('SOFR-1B'),
+        lambda: IndexRegistry.resolve('SOFR-1B')]:
+        with pytest.raises(Exception, match='Cannot find SOFR-1B in index registry.'):
+            lookup()
+
+def test_empty_index_registry_accepts_registrations(empty_index_registry):
+    empty_index_registry.register('SOFR-1B', 'Sofr')
+    handle = empty_index_registry.get_handle('sofr-1b')
+    assert handle.name == 'SOFR-1B'
+    assert IndexRegistry.look_up_index_name(handle.index) == 'SOFR-1B'
+    empty_index_registry.clear()
+    with pytest.raises(Exception, match='Cannot find'):
+        empty_index_registry.get_handle('SOFR-1B')
@@ -0,0 +1,59 @@
+import itertools
+import numpy as np
+import pytest
+from fixedincomelib.date import Date, Period, make_schedule, make_schedule_batch
+from fixedincomelib.market.basics import AccrualBasis, BusinessDayConvention, HolidayConvention
+
+### make_schedule_batch against make_schedule, trade by trade, over conventions, stubs and end of month
+
+# regular, short / long stubs, month ends and a start on a holiday weekend
+_trades = [
+    ('2025-01-15', '2030-01-15'),
+    ('2025-01-15', '2027-04-02'),
+    ('2024-11-07', '2026-02-20'),
+    ('2025-01-31', '2027-01-31'),
+    ('2024-02-29', '2026-08-31'),
+    ('2025-07-05', '2025-12-24')]
+
+def _serials(schedule) -> np.ndarray:
+    # make_schedule frame as serial numbers, accruals apart
+    return np.array([[d.serialNumber() for d in schedule[c]] for c in ['StartDate', 'EndDate', 'FixingDate', 'PaymentDate']])
+
+def _assert_same(batch, i, expected) -> None:
+    frame = batch.to_frame(i)
+    np.testing.assert_array_equal(_serials(frame), _serials(expected))
+    np.testing.assert_allclose(frame['Accrued'].to_numpy(), expected['Accrued'].to_numpy(dtype=float), rtol=0., atol=1e-15)
+
+@pytest.mark.parametrize('period, holiday, bdc, basis, rule, end_of_month', list(itertools.product(
+    ['3M', '6M', '1Y'],
+    ['USGS', 'LON'],
+    ['MF', 'F', 'P'],
+    ['ACT/360', 'ACT/ACT', '30/360'],
+    ['BACKWARD', 'FORWARD'],
+    [False, True])))
+def test_batch_matches_make_schedule(period, holiday, bdc, basis, rule, end_of_month):
+    conventions = (Period(period), HolidayConvention(holiday), BusinessDayConvention(bdc), AccrualBasis(basis))
+    options = dict(rule=rule, end_of_month=end_of_month, fix_in_arrear=True,
+                   fixing_offset=Period('-2D'), payment_offset=Period('2D'))
+    batch = make_schedule_batch([s for s, _ in _trades], [e for _, e in _trades], *conventions, **options)
+    assert batch.num_trades == len(_trades)
+    for i, (s, e) in enumerate(_trades):
+        _assert_same(batch, i, make_schedule(Date(s), Date(e), *conventions, **options, use_cache=False))
+
+@pytest.mark.parametrize('fixing_offset, payment_offset', [('', ''), ('', Period('2D')), (Period('-2D'), '')])
+@pytest.mark.parametrize('fix_in_arrear', [False, np.bool_(True)])
+def test_no_offsets_and_numpy_flags(fixing_offset, payment_offset, fix_in_arrear):
+    conventions = (Period('3M'), HolidayConvention('USGS'), BusinessDayConvention('MF'), AccrualBasis('ACT/360'))
+    options = dict(end_of_month=np.bool_(True), fix_in_arrear=fix_in_arrear,
+                   fixing_offset=fixing_offset, payment_offset=payment_offset)
+    batch = make_schedule_batch([s for s, _ in _trades], [e for _, e in _trades], *conventions, **options)
+    for i, (s, e) in enumerate(_trades):
+        _assert_same(batch, i, make_schedule(Date(s), Date(e), *conventions, **options, use_cache=False))
+
+def test_per_trade_conventions():
+    periods = [Period(p) for p in ['3M', '6M', '1Y', '3M', '6M', '1Y']]
+    flags = [False, True, False, True, False, True]
+    conventions = (HolidayConvention('USGS'), BusinessDayConvention('MF'), AccrualBasis('ACT/365 FIXED'))
+    batch = make_schedule_batch([s for s, _ in _trades], [e for _, e in _trades], periods, *conventions, end_of_month=flags)
+    for i, (s, e) in enumerate(_trades):
+        _assert_same(batch, i, make_schedule(Date(s), Date(e), periods[i], *conventions, end_of_month=flags[i], use_cache=False))
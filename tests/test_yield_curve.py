@@ -0,0 +1,50 @@
+import sys, threading
+import numpy as np
+from fixedincomelib.date import Date, year_fraction_batch
+from fixedincomelib.market import AccrualBasis, YieldCurve
+
+### the date -> time table is shared by threads, growing and clearing it must never shift a read
+
+def test_times_under_concurrent_growth_and_clears():
+    reference = Date('2025-01-02').serialNumber()
+    basis = AccrualBasis('ACT/ACT')
+    curve = YieldCurve(reference, reference + np.array([365, 3650, 18250]), [0.03, 0.035, 0.04], basis)
+    rng = np.random.default_rng(0)
+    grids = [reference + rng.integers(-400, 20000, 500) + 3000 * (k % 3) for k in range(24)]
+    expected = [year_fraction_batch(np.full(len(g), reference), g, basis) for g in grids]
+    errors = []
+
+    def reader(k):
+        for _ in range(20):
+            for j in range(k, len(grids), 4):
+                if not np.array_equal(curve.times(grids[j]), expected[j]):
+                    errors.append(j)
+
+    def clearer():
+        for _ in range(200):
+            curve.clear_time_cache()
+
+    threads = [threading.Thread(target=reader, args=(k,)) for k in range(4)] + [threading.Thread(target=clearer)]
+    # switch threads as often as possible, so reads land between the writer's stores
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+    np.testing.assert_array_equal(curve.times(grids[0]), expected[0])
+
+def test_time_table_is_published_as_one_tuple():
+    # start and fractions are swapped together, readers unpack a single attribute
+    reference = Date('2025-01-02').serialNumber()
+    curve = YieldCurve(reference, reference + np.array([365, 3650]), [0.03, 0.035])
+    first = curve.table_
+    curve.times(reference + np.array([-5000, 30000]))
+    start, table = curve.table_
+    assert curve.table_ is not first
+    assert start <= reference - 5000 and start + len(table) > reference + 30000
+    assert not table.flags.writeable